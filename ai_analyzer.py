@@ -1,18 +1,67 @@
 import google.generativeai as genai
+import asyncio
+import json
 import logging
+import re
+import threading
 import time
 import traceback
+import weakref
 from typing import Optional, Dict, List
-from config import GEMINI_API_KEY, AI_SETTINGS
+from config import GEMINI_API_KEY, AI_SETTINGS, ANALYSIS_CACHE_SETTINGS, DAILY_SUMMARY_SETTINGS
 from news_fetcher import NewsItem
+from analysis_cache import AnalysisCache
+from rate_limit import RateLimiter, PRIORITY_HIGH, PRIORITY_LOW
+from keyword_matcher import KeywordMatcher
 from datetime import datetime
 
 # Enhanced logging setup
 logger = logging.getLogger(__name__)
 performance_logger = logging.getLogger('performance')
 
+# Fallback analiz üçün açar söz matcher-ləri - modul yüklənəndə bir dəfə qurulur
+MARKET_KEYWORDS = KeywordMatcher({
+    'bullish': [
+        'rise', 'surge', 'pump', 'bull', 'green', 'gain', 'profit',
+        'moon', 'rocket', 'adoption', 'partnership', 'investment',
+        'yüksəliş', 'artım', 'qazanc', 'tərəqqi', 'inkişaf'
+    ],
+    'bearish': [
+        'fall', 'drop', 'crash', 'bear', 'red', 'loss', 'dump',
+        'decline', 'down', 'fear', 'sell', 'panic',
+        'düşüş', 'azalma', 'itki', 'tənəzzül', 'böhran'
+    ],
+    'neutral': [
+        'stable', 'sideways', 'consolidation', 'analysis', 'report',
+        'update', 'news', 'announcement', 'study',
+        'sabit', 'hesabat', 'yenilənmə', 'elan'
+    ]
+})
+
+SENTIMENT_KEYWORDS = KeywordMatcher({
+    'positive': [
+        'good', 'great', 'excellent', 'positive', 'growth', 'increase',
+        'success', 'win', 'benefit', 'opportunity', 'promising',
+        'yaxşı', 'əla', 'müsbət', 'böyümə', 'artım', 'uğur'
+    ],
+    'negative': [
+        'bad', 'terrible', 'negative', 'decrease', 'loss', 'fail',
+        'problem', 'issue', 'concern', 'risk', 'danger',
+        'pis', 'mənfi', 'azalma', 'itki'
+    ]
+})
+
+# Günlük özetdə başlığın ümumi istiqaməti
+HEADLINE_MOOD_KEYWORDS = KeywordMatcher({
+    'bullish': ['rise', 'surge', 'gain', 'up', 'bull'],
+    'bearish': ['fall', 'drop', 'down', 'bear', 'crash']
+})
+
 class AIAnalyzer:
-    def __init__(self):
+    MARKET_IMPACTS = ('Bullish', 'Bearish', 'Neytral')
+    RISK_LEVELS = ('Aşağı', 'Orta', 'Yüksək')
+
+    def __init__(self, cache: Optional[AnalysisCache] = None):
         logger.info("🧠 AI_ANALYZER: Initializing AI Analyzer")
         
         if GEMINI_API_KEY:
@@ -26,7 +75,257 @@ class AIAnalyzer:
         else:
             logger.warning("⚠️  AI_ANALYZER: Gemini API key not configured - fallback mode only")
             self.model = None
-            
+        
+        # Paralel Gemini çağırışları limiti - semafor hər event loop üçün ayrıca yaradılır
+        self.max_concurrent = AI_SETTINGS['max_concurrent_requests']
+        self.request_timeout = AI_SETTINGS['request_timeout']
+        self._semaphores = weakref.WeakKeyDictionary()
+        
+        # Gün ərzində əvvəlcədən hazırlanan günlük özetin vəziyyəti
+        self.daily_summary_state: Dict = {}
+        
+        # RPM / təxmini TPM limiti və istifadə sayğacları
+        self.rate_limiter = RateLimiter()
+        self.fallback_count = 0
+        
+        # Eyni xəbər üçün Gemini təkrar çağırılmır (restart-dan sonra da)
+        self.cache = cache
+        if self.cache is None and ANALYSIS_CACHE_SETTINGS['enabled']:
+            try:
+                self.cache = AnalysisCache()
+            except Exception as e:
+                logger.error(f"💥 AI_ANALYZER: Analysis cache unavailable: {e}")
+        
+        # Sync çağıranlar (bot.py) üçün daimi fon event loop-u - async gRPC client bir loop-a bağlı qalır
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    def run_sync(self, coro):
+        """Coroutine-i fon loop-unda işlədir və nəticəsini gözləyir (sync kod üçün)"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name='ai-analyzer-loop', daemon=True
+                )
+                self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        """Fon event loop-unu və analiz keşini bağlayır"""
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop_thread.join(timeout=5)
+                self._loop.close()
+                self._loop = None
+                self._loop_thread = None
+        if self.cache is not None:
+            stats = self.cache.get_stats()
+            logger.info(f"💾 ANALYSIS_CACHE: Closing - hit rate {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})")
+            self.cache.close()
+            self.cache = None
+
+    def _cached_analysis(self, news_item: NewsItem) -> Optional[str]:
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.get(self.cache.key_for(news_item))
+        except Exception as e:
+            logger.error(f"Analiz keşi oxuma xətası: {e}")
+            return None
+
+    def _store_analysis(self, news_item: NewsItem, analysis: str):
+        """Yalnız Gemini nəticələri keşlənir - fallback növbəti dəfə yenidən cəhd olunur"""
+        if self.cache is None:
+            return
+        try:
+            self.cache.put(self.cache.key_for(news_item), analysis)
+        except Exception as e:
+            logger.error(f"Analiz keşi yazma xətası: {e}")
+
+    def get_usage_stats(self) -> Dict:
+        """Gemini sorğu/token istifadəsi, limit gözləmələri və fallback sayı"""
+        stats = self.rate_limiter.get_stats()
+        stats['fallbacks'] = self.fallback_count
+        return stats
+
+    def get_cache_stats(self) -> Dict:
+        """Analiz keşinin hit rate və ölçü metrikləri"""
+        if self.cache is None:
+            return {'entries': 0, 'hits': 0, 'memory_hits': 0, 'misses': 0, 'hit_rate': 0.0}
+        return self.cache.get_stats()
+
+    def _build_analysis_prompt(self, news_item: NewsItem) -> str:
+        """Tək xəbər üçün analiz promptunu hazırlayır"""
+        news_content = f"""
+Başlıq: {news_item.title}
+Mənbə: {news_item.source}
+Məzmun: {news_item.content[:500]}
+URL: {news_item.url}
+"""
+        return AI_SETTINGS['analysis_prompt'].format(news_content=news_content)
+
+    async def analyze_news_async(self, news_item: NewsItem, priority: int = PRIORITY_HIGH) -> Optional[str]:
+        """Xəbəri AI ilə analiz edir (async, paralel limit və timeout ilə)"""
+        start_time = time.time()
+        logger.info(f"🔍 AI_ANALYSIS: Starting async analysis for: {news_item.title[:50]}...")
+        
+        if not self.model:
+            logger.info("🔄 AI_ANALYSIS: Using fallback analysis (no AI model)")
+            return self._fallback_analysis(news_item)
+        
+        cached = self._cached_analysis(news_item)
+        if cached:
+            logger.info("💾 AI_ANALYSIS: Cache hit, Gemini call skipped")
+            return cached
+        
+        try:
+            response = await self._call_gemini_async(self._build_analysis_prompt(news_item), priority=priority)
+        except Exception as e:
+            logger.error(f"💥 AI_ANALYSIS: Async analysis failed after {time.time() - start_time:.2f}s: {e}")
+            response = None
+        
+        performance_logger.info(f"AI_ANALYSIS_ASYNC completed in {time.time() - start_time:.2f}s")
+        if response:
+            logger.info("✅ AI_ANALYSIS: Gemini analysis completed successfully")
+            self._store_analysis(news_item, response)
+            return response
+        logger.warning("⚠️  AI_ANALYSIS: Gemini returned empty response, using fallback")
+        return self._fallback_analysis(news_item)
+
+    async def analyze_many_async(self, news_items: List[NewsItem]) -> List[Optional[str]]:
+        """Bir neçə xəbəri paralel analiz edir (sıra qorunur)"""
+        if not news_items:
+            return []
+        start_time = time.time()
+        results = await asyncio.gather(*(self.analyze_news_async(news) for news in news_items))
+        performance_logger.info(f"AI_ANALYSIS_BATCH {len(news_items)} items completed in {time.time() - start_time:.2f}s")
+        return list(results)
+
+    async def analyze_news_batch_async(self, news_items: List[NewsItem],
+                                       priority: int = PRIORITY_HIGH) -> List[Optional[str]]:
+        """Bir neçə xəbəri tək Gemini sorğusunda analiz edir (sıra qorunur)
+
+        Keşdə olan xəbərlər sorğuya daxil edilmir. Cavabdan çıxarıla
+        bilməyən xəbərlər ayrıca analiz olunur; sorğunun özü uğursuz olarsa
+        açar söz analizinə keçilir.
+        """
+        if not news_items:
+            return []
+        if not self.model:
+            return [self._fallback_analysis(news) for news in news_items]
+        
+        start_time = time.time()
+        results: List[Optional[str]] = [self._cached_analysis(news) for news in news_items]
+        pending = [index for index, result in enumerate(results) if not result]
+        if pending:
+            batch_size = max(1, AI_SETTINGS['batch_size'])
+            chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+            chunk_results = await asyncio.gather(
+                *(self._analyze_chunk([news_items[index] for index in chunk], priority) for chunk in chunks)
+            )
+            for chunk, analyses in zip(chunks, chunk_results):
+                for index, analysis in zip(chunk, analyses):
+                    results[index] = analysis
+        
+        performance_logger.info(
+            f"AI_ANALYSIS_BATCH {len(news_items)} items ({len(news_items) - len(pending)} cached) "
+            f"completed in {time.time() - start_time:.2f}s"
+        )
+        return results
+
+    def analyze_news_batch(self, news_items: List[NewsItem], priority: int = PRIORITY_HIGH) -> List[Optional[str]]:
+        """analyze_news_batch_async-in sync variantı (bot.py job thread-ləri üçün)"""
+        try:
+            return self.run_sync(self.analyze_news_batch_async(news_items, priority))
+        except Exception as e:
+            logger.error(f"💥 AI_ANALYSIS: Batch analysis failed: {e}")
+            return [self._fallback_analysis(news) for news in news_items]
+
+    async def _analyze_chunk(self, news_items: List[NewsItem], priority: int) -> List[Optional[str]]:
+        """Bir qrup xəbər üçün tək sorğu göndərir və cavabı xəbərlərə bölür"""
+        if len(news_items) == 1:
+            return [await self.analyze_news_async(news_items[0], priority)]
+        
+        logger.info(f"🤖 AI_ANALYSIS: Calling Gemini API for batch of {len(news_items)} items")
+        response = await self._call_gemini_async(
+            self._build_batch_prompt(news_items),
+            max_tokens=AI_SETTINGS['max_tokens'] * len(news_items),
+            priority=priority
+        )
+        if not response:
+            # Sorğu uğursuz oldu - ayrı-ayrı sorğularla yükü artırmırıq
+            logger.warning("⚠️  AI_ANALYSIS: Batch call failed, using fallback for all items")
+            return [self._fallback_analysis(news) for news in news_items]
+        
+        parsed = self._parse_batch_response(response, len(news_items))
+        results: List[Optional[str]] = []
+        missing = []
+        for index, news in enumerate(news_items):
+            analysis = parsed.get(index + 1)
+            if analysis:
+                self._store_analysis(news, analysis)
+            else:
+                missing.append(index)
+            results.append(analysis)
+        
+        if missing:
+            logger.warning(f"⚠️  AI_ANALYSIS: {len(missing)}/{len(news_items)} batch items unparsed, analyzing separately")
+            retried = await asyncio.gather(*(self.analyze_news_async(news_items[index], priority) for index in missing))
+            for index, analysis in zip(missing, retried):
+                results[index] = analysis
+        return results
+
+    def _build_batch_prompt(self, news_items: List[NewsItem]) -> str:
+        """N xəbəri nömrələnmiş bloklarla tək prompta yığır"""
+        blocks = []
+        for index, news in enumerate(news_items, 1):
+            blocks.append(
+                f"[{index}]\nBaşlıq: {news.title}\nMənbə: {news.source}\nMəzmun: {news.content[:500]}"
+            )
+        return AI_SETTINGS['batch_analysis_prompt'].format(
+            count=len(news_items), news_blocks="\n\n".join(blocks)
+        )
+
+    def _parse_batch_response(self, response: str, count: int) -> Dict[int, str]:
+        """JSON cavabından id -> formatlanmış analiz xəritəsi qurur"""
+        # Model bəzən JSON-u ```json bloku içində və ya əlavə mətnlə qaytarır
+        match = re.search(r'\[.*\]', response, re.DOTALL)
+        if not match:
+            logger.warning("⚠️  AI_ANALYSIS: Batch response has no JSON array")
+            return {}
+        try:
+            items = json.loads(match.group(0))
+        except ValueError as e:
+            logger.warning(f"⚠️  AI_ANALYSIS: Batch response JSON error: {e}")
+            return {}
+        
+        parsed = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            try:
+                item_id = int(item.get('id'))
+            except (TypeError, ValueError):
+                continue
+            impact = str(item.get('market_impact', '')).strip()
+            analysis = str(item.get('analysis', '')).strip()
+            risk = str(item.get('risk', '')).strip()
+            if not (1 <= item_id <= count) or impact not in self.MARKET_IMPACTS or not analysis or risk not in self.RISK_LEVELS:
+                continue
+            parsed[item_id] = f"🔥 Market Təsiri: {impact}\n📊 Analiz: {analysis}\n⚠️ Risk: {risk}"
+        return parsed
+
     def analyze_news(self, news_item: NewsItem) -> Optional[str]:
         """Xəbəri AI ilə analiz edir (sync)"""
         start_time = time.time()
@@ -37,16 +336,13 @@ class AIAnalyzer:
                 logger.info("🔄 AI_ANALYSIS: Using fallback analysis (no AI model)")
                 return self._fallback_analysis(news_item)
             
-            # Xəbər məzmununu hazırlayır
-            news_content = f"""
-Başlıq: {news_item.title}
-Mənbə: {news_item.source}
-Məzmun: {news_item.content[:500]}
-URL: {news_item.url}
-"""
+            cached = self._cached_analysis(news_item)
+            if cached:
+                logger.info("💾 AI_ANALYSIS: Cache hit, Gemini call skipped")
+                return cached
             
             # AI promptunu hazırlayır
-            prompt = AI_SETTINGS['analysis_prompt'].format(news_content=news_content)
+            prompt = self._build_analysis_prompt(news_item)
             
             # Gemini API çağırır
             logger.info("🤖 AI_ANALYSIS: Calling Gemini API for analysis")
@@ -57,6 +353,7 @@ URL: {news_item.url}
             
             if response:
                 logger.info("✅ AI_ANALYSIS: Gemini analysis completed successfully")
+                self._store_analysis(news_item, response)
                 return response
             else:
                 logger.warning("⚠️  AI_ANALYSIS: Gemini returned empty response, using fallback")
@@ -68,58 +365,92 @@ URL: {news_item.url}
             logger.error(f"📍 AI_ANALYSIS: Traceback: {traceback.format_exc()}")
             return self._fallback_analysis(news_item)
     
-    def _call_gemini(self, prompt: str) -> Optional[str]:
-        """Gemini API-ni sync çağırır"""
+    def _full_prompt(self, prompt: str) -> str:
+        system_prompt = "Siz kripto xəbərlərini analiz edən mütəxəssissiniz. Azərbaycan dilində cavab verin."
+        return f"{system_prompt}\n\n{prompt}"
+
+    def _generation_config(self, max_tokens: Optional[int] = None):
+        return genai.types.GenerationConfig(
+            max_output_tokens=max_tokens or AI_SETTINGS['max_tokens'],
+            temperature=AI_SETTINGS['temperature']
+        )
+
+    @staticmethod
+    def _response_text(response) -> Optional[str]:
+        if response and hasattr(response, 'text') and response.text:
+            return response.text.strip()
+        return None
+
+    def _generate_sync(self, prompt: str, max_tokens: Optional[int] = None) -> Optional[str]:
+        """Limitsiz, birbaşa sync Gemini çağırışı (xətalar yuxarı ötürülür)"""
+        response = self.model.generate_content(
+            self._full_prompt(prompt),
+            generation_config=self._generation_config(max_tokens)
+        )
+        return self._response_text(response)
+
+    def _estimate_tokens(self, prompt: str, max_tokens: Optional[int]) -> int:
+        return self.rate_limiter.estimate_tokens(self._full_prompt(prompt), max_tokens or AI_SETTINGS['max_tokens'])
+
+    def _handle_api_error(self, error: Exception):
+        """Kvota xətalarını limitləyiciyə bildirir, qalanlarını loglayır"""
+        message = str(error).lower()
+        if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests') or '429' in message or 'quota' in message:
+            self.rate_limiter.record_quota_error()
+        logger.error(f"Gemini API xətası: {error}")
+
+    def _call_gemini(self, prompt: str, max_tokens: Optional[int] = None,
+                     priority: int = PRIORITY_HIGH) -> Optional[str]:
+        """Gemini API-ni sync çağırır (RPM/TPM limiti daxilində)"""
+        if not self.rate_limiter.acquire_sync(self._estimate_tokens(prompt, max_tokens), priority):
+            return None
         try:
-            system_prompt = "Siz kripto xəbərlərini analiz edən mütəxəssissiniz. Azərbaycan dilində cavab verin."
-            full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            response = self.model.generate_content(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=AI_SETTINGS['max_tokens'],
-                    temperature=AI_SETTINGS['temperature']
-                )
-            )
-            
-            if response and hasattr(response, 'text') and response.text:
-                return response.text.strip()
-            else:
-                return None
-            
+            return self._generate_sync(prompt, max_tokens)
         except Exception as e:
-            logger.error(f"Gemini API xətası: {e}")
+            self._handle_api_error(e)
+            return None
+
+    async def _call_gemini_async(self, prompt: str, max_tokens: Optional[int] = None,
+                                 priority: int = PRIORITY_HIGH) -> Optional[str]:
+        """Gemini API-ni async çağırır - RPM/TPM, paralel limit və timeout daxilində
+
+        Timeout olduqda sorğu ləğv edilir və None qaytarılır. Çağıranın öz
+        ləğvi (CancelledError) isə yuxarı ötürülür.
+        """
+        if not await self.rate_limiter.acquire(self._estimate_tokens(prompt, max_tokens), priority):
             return None
+        async with self._get_semaphore():
+            try:
+                if hasattr(self.model, 'generate_content_async'):
+                    response = await asyncio.wait_for(
+                        self.model.generate_content_async(
+                            self._full_prompt(prompt),
+                            generation_config=self._generation_config(max_tokens)
+                        ),
+                        timeout=self.request_timeout
+                    )
+                    return self._response_text(response)
+                # Köhnə SDK - sync çağırış worker thread-də, event loop bloklanmır
+                return await asyncio.wait_for(
+                    asyncio.to_thread(self._generate_sync, prompt, max_tokens),
+                    timeout=self.request_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"⏰ AI_ANALYSIS: Gemini call timed out after {self.request_timeout}s")
+                return None
+            except Exception as e:
+                self._handle_api_error(e)
+                return None
     
     def _fallback_analysis(self, news_item: NewsItem) -> str:
         """AI əlçatmaz olduqda əsas analiz"""
+        self.fallback_count += 1
         try:
-            title_lower = news_item.title.lower()
-            content_lower = news_item.content.lower()
-            
-            # Açar sözlərə əsasən analiz
-            bullish_keywords = [
-                'rise', 'surge', 'pump', 'bull', 'green', 'gain', 'profit', 
-                'moon', 'rocket', 'adoption', 'partnership', 'investment',
-                'yüksəliş', 'artım', 'qazanc', 'tərəqqi', 'inkişaf'
-            ]
-            
-            bearish_keywords = [
-                'fall', 'drop', 'crash', 'bear', 'red', 'loss', 'dump',
-                'decline', 'down', 'fear', 'sell', 'panic',
-                'düşüş', 'azalma', 'itki', 'tənəzzül', 'böhran'
-            ]
-            
-            neutral_keywords = [
-                'stable', 'sideways', 'consolidation', 'analysis', 'report',
-                'update', 'news', 'announcement', 'study',
-                'sabit', 'hesabat', 'yenilənmə', 'elan'
-            ]
-            
-            # Skor hesablayır
-            bullish_score = sum(1 for word in bullish_keywords if word in title_lower or word in content_lower)
-            bearish_score = sum(1 for word in bearish_keywords if word in title_lower or word in content_lower)
-            neutral_score = sum(1 for word in neutral_keywords if word in title_lower or word in content_lower)
+            # Açar sözlərə əsasən analiz - başlıq və məzmun bir keçiddə
+            scores = MARKET_KEYWORDS.count(f"{news_item.title} {news_item.content}")
+            bullish_score = scores['bullish']
+            bearish_score = scores['bearish']
+            neutral_score = scores['neutral']
             
             # Market təsirini müəyyən edir
             if bullish_score > bearish_score and bullish_score > neutral_score:
@@ -145,22 +476,9 @@ URL: {news_item.url}
     
     def analyze_sentiment_keywords(self, text: str) -> Dict[str, int]:
         """Mətnin əhval-ruhiyyəsini açar sözlərə görə analiz edir"""
-        positive_keywords = [
-            'good', 'great', 'excellent', 'positive', 'growth', 'increase',
-            'success', 'win', 'benefit', 'opportunity', 'promising',
-            'yaxşı', 'əla', 'müsbət', 'böyümə', 'artım', 'uğur'
-        ]
-        
-        negative_keywords = [
-            'bad', 'terrible', 'negative', 'decrease', 'loss', 'fail',
-            'problem', 'issue', 'concern', 'risk', 'danger',
-            'pis', 'mənfi', 'azalma', 'itki', 'problem', 'risk'
-        ]
-        
-        text_lower = text.lower()
-        
-        positive_count = sum(1 for word in positive_keywords if word in text_lower)
-        negative_count = sum(1 for word in negative_keywords if word in text_lower)
+        counts = SENTIMENT_KEYWORDS.count(text)
+        positive_count = counts['positive']
+        negative_count = counts['negative']
         
         return {
             'positive': positive_count,
@@ -169,7 +487,12 @@ URL: {news_item.url}
         } 
     
     async def generate_daily_summary(self, news_list: List[NewsItem]) -> Optional[str]:
-        """Son 24 saatın xəbərlərindən günlük özet hazırlayır"""
+        """Son 24 saatın xəbərlərindən günlük özet hazırlayır
+
+        Xəbər sayı chunk_size-dan çoxdursa map-reduce rejimi işləyir:
+        zaman pəncərələri üzrə parçalar paralel xülasə edilir (keşlənir),
+        sonra xülasələr yekun hesabatda birləşdirilir.
+        """
         try:
             if not self.model:
                 return self._fallback_daily_summary(news_list)
@@ -177,6 +500,9 @@ URL: {news_item.url}
             if not news_list:
                 return "📭 Son 24 saatda yeni xəbər tapılmadı."
             
+            if len(news_list) > DAILY_SUMMARY_SETTINGS['chunk_size']:
+                return await self._generate_daily_summary_map_reduce(news_list)
+            
             # Xəbər siyahısını AI üçün formatla
             news_content = "Son 24 saatın kripto xəbərləri:\n\n"
             for i, news in enumerate(news_list, 1):
@@ -185,8 +511,26 @@ URL: {news_item.url}
                 news_content += f"   Məzmun: {news.content[:300]}...\n"
                 news_content += f"   URL: {news.url}\n\n"
             
-            # Günlük özet prompt-u
-            daily_prompt = f"""
+            # AI analysis çağır (event loop bloklanmır)
+            # Toplu iş - təcili xəbər analizindən sonra növbəyə düşür
+            response = await self._call_gemini_async(
+                self._build_daily_prompt(news_content),
+                max_tokens=DAILY_SUMMARY_SETTINGS['report_max_tokens'],
+                priority=PRIORITY_LOW
+            )
+            
+            if response:
+                return response
+            else:
+                return self._fallback_daily_summary(news_list)
+                
+        except Exception as e:
+            logger.error(f"Günlük özet AI xətası: {e}")
+            return self._fallback_daily_summary(news_list)
+
+    def _build_daily_prompt(self, news_content: str) -> str:
+        """Günlük özet hesabatının promptu (tək çağırış və reduce mərhələsi üçün)"""
+        return f"""
 Siz kripto xəbərlərini analiz edən mütəxəssissiniz. Aşağıdakı son 24 saatın xəbərlərini analiz edib Azərbaycan dilində ətraflı günlük özet hazırlayın:
 
 {news_content}
@@ -212,18 +556,122 @@ Siz kripto xəbərlərini analiz edən mütəxəssissiniz. Aşağıdakı son 24
 
 Lütfen xəbərləri önem derecesine göre sıralayın və sadece ÖNEMLİ olanları əhatə edin. Çok uzun yazmayın - maksimum 800 kelime.
 """
-            
-            # AI analysis çağır
-            response = self._call_gemini(daily_prompt)
-            
-            if response:
-                return response
-            else:
-                return self._fallback_daily_summary(news_list)
-                
-        except Exception as e:
-            logger.error(f"Günlük özet AI xətası: {e}")
-            return self._fallback_daily_summary(news_list)
+
+    def _chunk_daily_news(self, news_list: List[NewsItem]) -> List[List[NewsItem]]:
+        """Xəbərləri saata bağlı zaman pəncərələrinə bölür (xronoloji)
+
+        Pəncərə sərhədləri saata bağlı olduğu üçün gün ərzində yalnız son
+        pəncərə dəyişir - əvvəlki parçaların xülasəsi keşdən gəlir.
+        """
+        window_hours = DAILY_SUMMARY_SETTINGS['window_hours']
+        chunk_size = DAILY_SUMMARY_SETTINGS['chunk_size']
+        chunks: List[List[NewsItem]] = []
+        current_window = None
+        for news in sorted(news_list, key=lambda item: (item.published_date, item.hash)):
+            published = news.published_date
+            window = (published.date(), published.hour // window_hours)
+            if window != current_window or len(chunks[-1]) >= chunk_size:
+                chunks.append([])
+                current_window = window
+            chunks[-1].append(news)
+        return chunks
+
+    def _chunk_cache_key(self, chunk: List[NewsItem]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.make_digest('daily_chunk', *sorted(str(news.hash) for news in chunk))
+
+    async def _summarize_chunk(self, chunk: List[NewsItem]) -> tuple:
+        """Map mərhələsi: bir zaman pəncərəsinin qısa xülasəsi (keşlənir)
+
+        (xülasə, keşdən gəlibmi) qaytarır.
+        """
+        cache_key = self._chunk_cache_key(chunk)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached, True
+        
+        news_content = "\n".join(
+            f"{i}. {news.title} ({news.source}) - {news.content[:200]}"
+            for i, news in enumerate(chunk, 1)
+        )
+        prompt = f"""
+Aşağıdakı kripto xəbərlərinin qısa xülasəsini Azərbaycan dilində hazırlayın:
+
+{news_content}
+
+Format:
+• Ən önəmli 2-4 hadisə (hər biri 1 cümlə)
+📊 Əhval: [Bullish/Bearish/Neytral]
+"""
+        response = await self._call_gemini_async(
+            prompt, max_tokens=DAILY_SUMMARY_SETTINGS['chunk_max_tokens'], priority=PRIORITY_LOW
+        )
+        if response:
+            if cache_key:
+                self.cache.put(cache_key, response)
+            return response, False
+        # Xülasə alınmadı - reduce mərhələsi başlıqlarla davam edir (keşlənmir)
+        return "\n".join(f"• {news.title} ({news.source})" for news in chunk[:10]), False
+
+    async def warm_daily_summary(self, news_list: List[NewsItem]) -> Dict:
+        """Günlük özetin hazır hissələrini gün ərzində əvvəlcədən hesablayır
+
+        Yalnız dəyişməyəcək parçalar xülasə edilir: bağlanmış zaman
+        pəncərələri və dolmuş parçalar. Gecə işi bundan sonra yalnız son
+        pəncərəni və reduce mərhələsini hesablayır.
+        """
+        state = {'items': len(news_list), 'chunks': 0, 'ready': 0, 'computed': 0}
+        if self.model and len(news_list) > DAILY_SUMMARY_SETTINGS['chunk_size']:
+            start_time = time.time()
+            window_hours = DAILY_SUMMARY_SETTINGS['window_hours']
+            now = datetime.now()
+            open_window_start = now.replace(hour=now.hour - now.hour % window_hours, minute=0, second=0, microsecond=0)
+            chunks = self._chunk_daily_news(news_list)
+            stable = [
+                chunk for chunk in chunks
+                if chunk[-1].published_date < open_window_start or len(chunk) >= DAILY_SUMMARY_SETTINGS['chunk_size']
+            ]
+            results = await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in stable))
+            state.update(
+                chunks=len(chunks),
+                ready=len(stable),
+                computed=sum(1 for _, from_cache in results if not from_cache)
+            )
+            performance_logger.info(
+                f"DAILY_SUMMARY_WARM {state['ready']}/{state['chunks']} chunks ready "
+                f"({state['computed']} computed) in {time.time() - start_time:.2f}s"
+            )
+        state['updated_at'] = datetime.now()
+        self.daily_summary_state = state
+        return state
+
+    async def _generate_daily_summary_map_reduce(self, news_list: List[NewsItem]) -> Optional[str]:
+        """Parçaları paralel xülasə edir (map), sonra yekun hesabat qurur (reduce)"""
+        start_time = time.time()
+        chunks = self._chunk_daily_news(news_list)
+        chunk_results = await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in chunks))
+        map_duration = time.time() - start_time
+        cached_chunks = sum(1 for _, from_cache in chunk_results if from_cache)
+        
+        sections = []
+        for chunk, (summary, _) in zip(chunks, chunk_results):
+            window_start = chunk[0].published_date.strftime('%H:%M')
+            window_end = chunk[-1].published_date.strftime('%H:%M')
+            sections.append(f"🕐 {window_start}-{window_end} ({len(chunk)} xəbər):\n{summary}")
+        news_content = "Son 24 saatın kripto xəbərlərinin zaman üzrə xülasələri:\n\n" + "\n\n".join(sections)
+        
+        response = await self._call_gemini_async(
+            self._build_daily_prompt(news_content),
+            max_tokens=DAILY_SUMMARY_SETTINGS['report_max_tokens'],
+            priority=PRIORITY_LOW
+        )
+        performance_logger.info(
+            f"DAILY_SUMMARY_MAP_REDUCE {len(news_list)} items / {len(chunks)} chunks ({cached_chunks} cached): "
+            f"map {map_duration:.2f}s, total {time.time() - start_time:.2f}s"
+        )
+        return response or self._fallback_daily_summary(news_list)
     
     def _fallback_daily_summary(self, news_list: List[NewsItem]) -> str:
         """AI əlçatmaz olduqda əsas günlük özet"""
@@ -243,10 +691,10 @@ Lütfen xəbərləri önem derecesine göre sıralayın və sadece ÖNEMLİ olan
                 source_groups[source].append(news)
                 
                 # Basit sentiment analizi
-                title_lower = news.title.lower()
-                if any(word in title_lower for word in ['rise', 'surge', 'gain', 'up', 'bull']):
+                mood = HEADLINE_MOOD_KEYWORDS.count(news.title)
+                if mood['bullish']:
                     bullish_count += 1
-                elif any(word in title_lower for word in ['fall', 'drop', 'down', 'bear', 'crash']):
+                elif mood['bearish']:
                     bearish_count += 1
             
             # Market durumunu belirle
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import AI_SETTINGS, ANALYSIS_CACHE_SETTINGS
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """AI analizləri üçün məzmun ünvanlı, davamlı keş
+
+    Açar promptun giriş məlumatlarının (başlıq, mənbə, qısaldılmış məzmun)
+    digest-idir; model və prompt şablonu da açara daxildir ki, onlar
+    dəyişdikdə köhnə nəticələr istifadə olunmasın. Yaddaşda kiçik LRU,
+    arxasında SQLite cədvəli; TTL və maksimum sətir sayı ilə təmizlənir.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            cache_key TEXT PRIMARY KEY,
+            analysis TEXT NOT NULL,
+            created_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_analysis_cache_created_at ON analysis_cache(created_at);
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or ANALYSIS_CACHE_SETTINGS
+        self.ttl = self.settings['ttl']
+        self.max_entries = self.settings['max_entries']
+        self.memory_size = self.settings['memory_size']
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._conn = sqlite3.connect(self.settings['path'], check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+        # Model və ya prompt şablonu dəyişəndə bütün açarlar dəyişir
+        self._namespace = hashlib.blake2b(
+            f"{AI_SETTINGS['model']}\n{AI_SETTINGS['analysis_prompt']}".encode('utf-8'),
+            digest_size=8
+        ).hexdigest()
+        self._puts_since_prune = 0
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._prune()
+
+    def make_digest(self, *parts: str) -> str:
+        """Namespace daxilində ixtiyari hissələrin sabit digest-i"""
+        payload = "\x1f".join((self._namespace,) + parts)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def make_key(self, title: str, source: str, content: str) -> str:
+        """Prompt girişinin sabit digest-i"""
+        return self.make_digest(title, source, content[:500])
+
+    def key_for(self, news_item) -> str:
+        return self.make_key(news_item.title, news_item.source, news_item.content)
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached and now - cached[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return cached[0]
+            row = self._conn.execute(
+                "SELECT analysis, created_at FROM analysis_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] < self.ttl:
+                self._remember(key, row[0], row[1])
+                self.hits += 1
+                return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, analysis: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, analysis, now)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (cache_key, analysis, created_at) VALUES (?, ?, ?)",
+                    (key, analysis, now)
+                )
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= self.settings['prune_every']:
+                self._prune_locked()
+
+    def _remember(self, key: str, analysis: str, created_at: float):
+        self._memory[key] = (analysis, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _prune(self):
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self):
+        """Vaxtı keçmiş və limitdən artıq (ən köhnə) sətirləri silir"""
+        self._puts_since_prune = 0
+        with self._conn:
+            expired = self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+            overflow = self._conn.execute(
+                """DELETE FROM analysis_cache WHERE cache_key IN (
+                       SELECT cache_key FROM analysis_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            ).rowcount
+        if expired or overflow:
+            logger.info(f"🧹 ANALYSIS_CACHE: Pruned {expired} expired, {overflow} overflow entries")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
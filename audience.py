@@ -0,0 +1,64 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+# Auditoriya adı -> onu idarə edən istifadəçi ayarı (default: açıq)
+AUDIENCES = {
+    'instant': 'instant_notifications',
+    'daily': 'daily_summary'
+}
+
+
+class AudienceIndex:
+    """Abunəçilərin bildiriş növləri üzrə hazır alıcı çoxluqları
+
+    Ayar dəyişəndə, abunə olanda və ya çıxanda yenilənir; yayım zamanı
+    hər istifadəçinin ayarına baxmaq və ya diskə yazmaq lazım olmur.
+    Ayarı olmayan abunəçi bütün auditoriyalara daxildir (default ayarlar kimi).
+    """
+
+    def __init__(self):
+        self._members: Dict[str, set] = {name: set() for name in AUDIENCES}
+        # v13-də handler və job-lar ayrı thread-lərdə işləyir
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _wants(settings: Optional[Dict], key: str) -> bool:
+        return (settings or {}).get(key, True)
+
+    def rebuild(self, subscribers: Iterable[int], user_settings: Dict[int, Dict]):
+        """Başlanğıcda abunəçilər və ayarlardan bütöv indeks qurur"""
+        members = {name: set() for name in AUDIENCES}
+        for user_id in subscribers:
+            settings = user_settings.get(user_id)
+            for name, key in AUDIENCES.items():
+                if self._wants(settings, key):
+                    members[name].add(user_id)
+        with self._lock:
+            self._members = members
+
+    def add(self, user_id: int, settings: Optional[Dict] = None):
+        """Yeni abunəçi - ayarlarına uyğun auditoriyalara əlavə olunur"""
+        self.update(user_id, settings)
+
+    def update(self, user_id: int, settings: Optional[Dict]):
+        """Abunəçinin ayarı dəyişdi - auditoriyalardakı yerini yeniləyir"""
+        with self._lock:
+            for name, key in AUDIENCES.items():
+                if self._wants(settings, key):
+                    self._members[name].add(user_id)
+                else:
+                    self._members[name].discard(user_id)
+
+    def remove(self, user_ids: Iterable[int]):
+        with self._lock:
+            for user_id in user_ids:
+                for members in self._members.values():
+                    members.discard(user_id)
+
+    def recipients(self, name: str) -> List[int]:
+        """Yayım üçün alıcıların anlıq siyahısı"""
+        with self._lock:
+            return list(self._members[name])
+
+    def count(self, name: str) -> int:
+        return len(self._members[name])
@@ -1,11 +1,10 @@
+import asyncio
 import logging
-import json
-import os
-import pytz
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Dict, Set
+from typing import List, Dict, Optional, Set
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Updater, CommandHandler, CallbackQueryHandler, 
@@ -13,9 +12,16 @@ from telegram.ext import (
 )
 from telegram import ParseMode
 
-from config import TELEGRAM_BOT_TOKEN, BOT_SETTINGS
+from config import TELEGRAM_BOT_TOKEN, BOT_SETTINGS, SCHEDULER_SETTINGS, DAILY_SUMMARY_SETTINGS, BROADCAST_SETTINGS, OUTBOX_SETTINGS, RENDER_SETTINGS
 from news_fetcher import NewsFetcher, NewsItem
 from ai_analyzer import AIAnalyzer
+from broadcaster import BroadcastEngine, BroadcastResult, PERMANENT
+from outbox import Outbox
+from audience import AudienceIndex
+from renderer import MessageRenderer, RecentNews, RenderedMessage
+from single_flight import SingleFlight
+from pipeline import NewsPipeline
+from storage import create_storage
 
 # Enhanced logging setup
 logger = logging.getLogger(__name__)
@@ -46,15 +52,33 @@ class CryptoNewsBot:
         logger.info("🚀 SYSTEM: CryptoNewsBot (sync) initialization started")
         
         self.token = TELEGRAM_BOT_TOKEN
-        self.news_fetcher = NewsFetcher()
+        self.storage = create_storage()
+        self.news_fetcher = NewsFetcher(storage=self.storage)
         self.ai_analyzer = AIAnalyzer()
         self.updater = None
+        # v13 send_message bloklayandır - paralel yayım öz thread pool-unda işləyir
+        self._send_executor = ThreadPoolExecutor(
+            max_workers=BROADCAST_SETTINGS['max_concurrency'],
+            thread_name_prefix='broadcast'
+        )
+        # Yarımçıq yayımlar restart-dan sonra outbox-dan davam etdirilir
+        self.outbox = Outbox() if OUTBOX_SETTINGS['enabled'] else None
+        self.broadcaster = BroadcastEngine(self._send_markdown, outbox=self.outbox)
         self.subscribers: Set[int] = set()
         self.admin_users: Set[int] = set()
         self.last_news_check = datetime.now()
-        self.subscribers_file = 'subscribers.json'
-        self.user_settings_file = 'user_settings.json'
         self.user_settings: Dict[int, Dict] = {}
+        # Yayım alıcıları ayar dəyişəndə yenilənir - göndərmə zamanı ayarlara baxılmır
+        self.audience = AudienceIndex()
+        # Hər xəbər bir dəfə analiz edilib formatlaşdırılır, sonra hazır mətn istifadə olunur
+        self.renderer = MessageRenderer()
+        self.recent_news = RecentNews()
+        # Xəbər yoxlama dövrləri üst-üstə düşmür
+        self.news_cycle = SingleFlight('news_check', SCHEDULER_SETTINGS['tick_interval'])
+        self.pipeline = NewsPipeline(
+            self.news_fetcher, self.ai_analyzer, self.renderer,
+            deliver=self._deliver_news, on_rendered=self._publish_news
+        )
         
         # Statistics tracking
         self.stats = {
@@ -70,6 +94,7 @@ class CryptoNewsBot:
         # Başlangıçta subscribe verilerini yükle
         self._load_subscribers()
         self._load_user_settings()
+        self.audience.rebuild(self.subscribers, self.user_settings)
         
         logger.info("✅ SYSTEM: CryptoNewsBot (sync) initialization completed successfully")
         
@@ -97,57 +122,48 @@ class CryptoNewsBot:
             logger.info(log_message)
     
     def _load_subscribers(self):
-        """Subscribe verilerini JSON dosyasından yükler"""
+        """Abunəçiləri storage-dan yükləyir"""
         try:
-            if os.path.exists(self.subscribers_file):
-                with open(self.subscribers_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.subscribers = set(data.get('subscribers', []))
-                    logger.info(f"📂 {len(self.subscribers)} abunəçi yükləndi")
-            else:
-                logger.info("📂 Subscribe faylı tapılmadı, yeni fayl yaradılacaq")
+            self.subscribers = self.storage.load_subscribers()
+            logger.info(f"📂 {len(self.subscribers)} abunəçi yükləndi")
         except Exception as e:
-            logger.error(f"Subscribe fayl yükləmə xətası: {e}")
+            logger.error(f"Subscribe yükləmə xətası: {e}")
             self.subscribers = set()
     
-    def _save_subscribers(self):
-        """Subscribe verilerini JSON dosyasına saxlayır"""
+    def _add_subscriber(self, user_id: int):
+        """Abunəçini əlavə edir və storage-a yazır"""
+        self.subscribers.add(user_id)
+        self.audience.add(user_id, self.user_settings.get(user_id))
         try:
-            data = {
-                'subscribers': list(self.subscribers),
-                'last_updated': datetime.now().isoformat(),
-                'total_count': len(self.subscribers)
-            }
-            with open(self.subscribers_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logger.info(f"💾 {len(self.subscribers)} abunəçi faylda saxlanıldı")
+            self.storage.add_subscriber(user_id)
+            logger.info(f"💾 {len(self.subscribers)} abunəçi saxlanıldı")
         except Exception as e:
-            logger.error(f"Subscribe fayl saxlama xətası: {e}")
+            logger.error(f"Subscribe saxlama xətası: {e}")
+    
+    def _remove_subscribers(self, user_ids: List[int]):
+        """Abunəçiləri silir və storage-dan çıxarır"""
+        for user_id in user_ids:
+            self.subscribers.discard(user_id)
+        self.audience.remove(user_ids)
+        try:
+            self.storage.remove_subscribers(list(user_ids))
+            logger.info(f"💾 {len(self.subscribers)} abunəçi saxlanıldı")
+        except Exception as e:
+            logger.error(f"Subscribe saxlama xətası: {e}")
     
     def _load_user_settings(self):
-        """Kullanıcı ayarlarını JSON dosyasından yükler (sync)"""
+        """Kullanıcı ayarlarını storage-dan yükler (sync)"""
         try:
-            if os.path.exists(self.user_settings_file):
-                with open(self.user_settings_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # String key'leri int'e çevir
-                    self.user_settings = {int(k): v for k, v in data.items()}
-                    logger.info(f"⚙️ {len(self.user_settings)} kullanıcı ayarı yükləndi")
-            else:
-                logger.info("⚙️ Kullanıcı ayarları faylı tapılmadı, yeni yaradılacaq")
-                self.user_settings = {}
+            self.user_settings = self.storage.load_user_settings()
+            logger.info(f"⚙️ {len(self.user_settings)} kullanıcı ayarı yükləndi")
         except Exception as e:
             logger.error(f"Kullanıcı ayarları yükləmə xətası: {e}")
             self.user_settings = {}
     
-    def _save_user_settings(self):
-        """Kullanıcı ayarlarını JSON dosyasına kaydet (sync)"""
+    def _save_user_settings(self, user_id: int):
+        """Kullanıcının ayarlarını storage-a kaydet (sync)"""
         try:
-            # Int key'leri string'e çevir JSON için
-            data = {str(k): v for k, v in self.user_settings.items()}
-            with open(self.user_settings_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            logger.info(f"💾 {len(self.user_settings)} kullanıcı ayarı saxlanıldı")
+            self.storage.save_user_settings(user_id, self.user_settings[user_id])
         except Exception as e:
             logger.error(f"Kullanıcı ayarları saxlama xətası: {e}")
     
@@ -162,7 +178,7 @@ class CryptoNewsBot:
         
         if user_id not in self.user_settings:
             self.user_settings[user_id] = default_settings.copy()
-            self._save_user_settings()
+            self._save_user_settings(user_id)
         
         return self.user_settings[user_id]
 
@@ -172,14 +188,21 @@ class CryptoNewsBot:
         settings[setting_key] = value
         settings['last_activity'] = datetime.now().isoformat()
         self.user_settings[user_id] = settings
-        self._save_user_settings()
+        self._save_user_settings(user_id)
+        if user_id in self.subscribers:
+            self.audience.update(user_id, settings)
 
     def initialize(self):
         """Botu başladır (sync v13)"""
         if not self.token:
             raise ValueError("Telegram Bot Token təyin edilməyib!")
         
-        self.updater = Updater(token=self.token, use_context=True)
+        # Connection pool paralel yayım sorğularına kifayət etməlidir
+        self.updater = Updater(
+            token=self.token,
+            use_context=True,
+            request_kwargs={'con_pool_size': BROADCAST_SETTINGS['max_concurrency'] + 4}
+        )
         dispatcher = self.updater.dispatcher
         
         dispatcher.add_handler(CommandHandler("start", self.start_command))
@@ -195,10 +218,14 @@ class CryptoNewsBot:
         
         job_queue = self.updater.job_queue
         if job_queue:
+            # Əvvəlki prosesdən qalan yarımçıq yayımlar ilk yoxlamadan əvvəl tamamlanır
+            job_queue.run_once(self.resume_outbox_job, when=5)
+            # Üst-üstə düşən tick-lər APScheduler-də səssizcə atılmır - SingleFlight sayır
             job_queue.run_repeating(
                 self.check_news_job,
-                interval=BOT_SETTINGS['check_interval'],
-                first=10
+                interval=SCHEDULER_SETTINGS['tick_interval'],
+                first=10,
+                job_kwargs={'max_instances': 2}
             )
             job_queue.run_daily(
                 self.daily_cleanup_job,
@@ -211,12 +238,30 @@ class CryptoNewsBot:
                 time=datetime.now().time().replace(hour=0, minute=5)
             )
             
+            # Günlük özet hissələri gün ərzində hazırlanır - gecə yalnız yekunlaşdırılır
+            job_queue.run_repeating(
+                self.rolling_summary_job,
+                interval=DAILY_SUMMARY_SETTINGS['rolling_interval'],
+                first=300
+            )
+            
             logger.info("Job queue konfiqurasiya edildi")
         else:
             logger.warning("JobQueue mövcud deyil")
         
         logger.info("Bot uğurla başladıldı")
 
+    @staticmethod
+    def _format_error_counts(errors: Dict[str, int]) -> str:
+        """Səbəb üzrə göndərmə xətaları (çoxdan aza)"""
+        if not errors:
+            return "-"
+        return ", ".join(f"{reason} {count}" for reason, count in sorted(errors.items(), key=lambda item: -item[1]))
+
+    def _format_source_list(self, prefix: str, suffix: str = "") -> str:
+        """Aktiv mənbələrin siyahısını registry-dən qurur"""
+        return "\n".join(f"{prefix}{source.name}{suffix}" for source in self.news_fetcher.sources.enabled())
+
     def start_command(self, update: Update, context: CallbackContext):
         """Start komandası (sync v13)"""
         user_id = update.effective_user.id
@@ -226,10 +271,7 @@ class CryptoNewsBot:
 Salamlar! Mən sizə real-time kripto xəbərlərini AI analizi ilə birlikdə çatdırıram.
 
 📰 **Xəbər Mənbələri:**
-• CoinDesk
-• The Block  
-• Crypto News
-• NewsBTC
+{self._format_source_list('• ')}
 
 🧠 **AI Analizi:**
 • Market təsiri (Bullish/Bearish/Neytral)
@@ -290,8 +332,7 @@ Admin: @your_telegram_username
         if user_id in self.subscribers:
             update.message.reply_text("🔔 Siz artıq xəbər abunəçisisiniz!")
         else:
-            self.subscribers.add(user_id)
-            self._save_subscribers()  # Dosyaya kaydet
+            self._add_subscriber(user_id)
             update.message.reply_text(
                 f"✅ Təbriklər {user_name}! Artıq kripto xəbərləri alacaqsınız.\n\n"
                 f"📊 Abunəçi sayı: {len(self.subscribers)}\n"
@@ -303,8 +344,7 @@ Admin: @your_telegram_username
         """Abunəlikdən çıxış komandası (sync v13)"""
         user_id = update.effective_user.id
         if user_id in self.subscribers:
-            self.subscribers.remove(user_id)
-            self._save_subscribers()  # Dosyaya kaydet
+            self._remove_subscribers([user_id])
             update.message.reply_text("❌ Abunəlikdən çıxdınız. İstədiyiniz vaxt yenidən abunə ola bilərsiniz.")
         else:
             update.message.reply_text("ℹ️ Siz artıq abunə deyilsiniz.")
@@ -316,15 +356,12 @@ Admin: @your_telegram_username
 
 👥 Abunəçi sayı: {len(self.subscribers)}
 🕐 Son yoxlama: {self.last_news_check.strftime('%H:%M:%S')}
-⚙️ Yoxlama intervalı: {BOT_SETTINGS['check_interval']} saniyə
+⚙️ Yoxlama intervalı: adaptiv, {SCHEDULER_SETTINGS['min_interval']}-{SCHEDULER_SETTINGS['max_interval']} saniyə
 🔍 Maksimum xəbər: {BOT_SETTINGS['max_news_per_check']}
 🤖 AI analizi: {'Aktiv' if BOT_SETTINGS['ai_analysis'] else 'Deaktiv'}
 
 **Mənbələr:**
-📰 CoinDesk - RSS
-📰 The Block - RSS
-📰 Crypto News - RSS
-📰 NewsBTC - RSS
+{self._format_source_list('📰 ', ' - RSS')}
 
 Bot normal işləyir ✅
 """
@@ -332,15 +369,19 @@ Bot normal işləyir ✅
 
     def latest_command(self, update: Update, context: CallbackContext):
         """Son xəbərləri göstər (sync v13)"""
-        update.message.reply_text("🔍 Son xəbərlər axtarılır...")
         try:
-            news_list = self.news_fetcher.fetch_all_news()
-            if not news_list:
+            # Yoxlama işinin hazırladığı mesajlar - şəbəkə sorğusu yoxdur
+            latest = self.recent_news.latest(RENDER_SETTINGS['latest_count'])
+            if not latest and self.news_cycle.in_flight:
+                # İlk yoxlama hələ gedir - yenisini başlatmadan onun nəticəsini gözləyirik
+                update.message.reply_text("🔍 Son xəbərlər hazırlanır...")
+                self.news_cycle.wait()
+                latest = self.recent_news.latest(RENDER_SETTINGS['latest_count'])
+            if not latest:
                 update.message.reply_text("📭 Hal-hazırda yeni xəbər yoxdur.")
                 return
-            for news in news_list[:3]:
-                message = self.format_news_message(news)
-                update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
+            for rendered in latest:
+                update.message.reply_text(rendered.text, parse_mode=ParseMode.MARKDOWN)
         except Exception as e:
             logger.error(f"Latest komanda xətası: {e}")
             update.message.reply_text("❌ Xəbərlər yüklənərkən xəta baş verdi.")
@@ -355,9 +396,9 @@ Bot normal işləyir ✅
             return
         stats = self.news_fetcher.get_seen_news_stats()
         
-        # Kullanıcı ayar istatistikleri
-        instant_enabled = sum(1 for settings in self.user_settings.values() if settings.get('instant_notifications', True))
-        daily_enabled = sum(1 for settings in self.user_settings.values() if settings.get('daily_summary', True))
+        # Kullanıcı ayar istatistikleri - auditoriya indeksindən O(1)
+        instant_enabled = self.audience.count('instant')
+        daily_enabled = self.audience.count('daily')
         
         admin_text = f"""
 🔐 **Admin Panel**
@@ -371,7 +412,7 @@ Bot normal işləyir ✅
 💾 Fayl records: {stats.get('file_entries', 0)}
 
 ⚙️ **Konfiqurasiya:**
-⏱️ Yoxlama intervalı: {BOT_SETTINGS['check_interval']}s
+⏱️ Yoxlama intervalı: {SCHEDULER_SETTINGS['min_interval']}-{SCHEDULER_SETTINGS['max_interval']}s (adaptiv)
 📄 Max xəbər: {BOT_SETTINGS['max_news_per_check']}
 🤖 AI: {'ON' if BOT_SETTINGS['ai_analysis'] else 'OFF'}
 
@@ -380,6 +421,67 @@ Bot normal işləyir ✅
         for news in stats.get('recent_news', [])[:3]:
             admin_text += f"\n• {news['title']} ({news['source']})"
         
+        http_metrics = self.news_fetcher.get_http_metrics()
+        admin_text += (
+            f"\n\n🌐 **HTTP:** {http_metrics['requests']} sorğu, "
+            f"bağlantı reuse: {http_metrics['connection_reuse_ratio']:.0%}, "
+            f"DNS keş: {http_metrics['dns_cache_hits']}/{http_metrics['dns_cache_hits'] + http_metrics['dns_cache_misses']}"
+        )
+        
+        cache_stats = self.ai_analyzer.get_cache_stats()
+        admin_text += (
+            f"\n🧠 **AI keş:** hit rate {cache_stats['hit_rate']:.0%} "
+            f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), {cache_stats['entries']} qeyd"
+        )
+        
+        usage = self.ai_analyzer.get_usage_stats()
+        admin_text += (
+            f"\n🚦 **Gemini limiti:** {usage['requests']} sorğu "
+            f"(təcili {usage['requests_high']} / toplu {usage['requests_low']}), ~{usage['estimated_tokens']} token, "
+            f"gözləmə {usage['throttled']}, rədd {usage['rejected']}, kvota xətası {usage['quota_errors']}, "
+            f"fallback {usage['fallbacks']}"
+        )
+        
+        broadcast_stats = self.broadcaster.get_stats()
+        admin_text += (
+            f"\n📣 **Yayım:** {broadcast_stats['sent']} göndərildi, {broadcast_stats['failed']} uğursuz, "
+            f"RetryAfter {broadcast_stats['retry_after']}, son sürət {broadcast_stats['last_rate']:.1f} msg/s"
+            f"\n   Xəta səbəbləri: {self._format_error_counts(broadcast_stats['errors'])}"
+        )
+        cycle_stats = self.news_cycle.get_stats()
+        admin_text += (
+            f"\n🔄 **Yoxlama dövrü:** son {cycle_stats['last_duration']:.1f}s, maks {cycle_stats['max_duration']:.1f}s "
+            f"(interval {cycle_stats['interval']}s), aşım {cycle_stats['overruns']}/{cycle_stats['runs']}, "
+            f"buraxılan tick {cycle_stats['skipped']}"
+        )
+        pipeline_stats = self.pipeline.get_stats()
+        if pipeline_stats.get('time_to_first_delivery') is not None:
+            admin_text += f"\n🚰 **Pipeline:** ilk xəbər {pipeline_stats['time_to_first_delivery']:.1f}s-də, {pipeline_stats['items']} xəbər"
+        render_stats = self.renderer.get_stats()
+        admin_text += f"\n🖼️ **Hazır mesajlar:** {render_stats['cached']}, təkrar istifadə {render_stats['hit_rate']:.0%}"
+        if self.outbox:
+            outbox_stats = self.outbox.get_stats()
+            admin_text += (
+                f"\n📮 **Outbox:** {outbox_stats['open_messages']} açıq mesaj, "
+                f"{outbox_stats['pending_deliveries']} gözləyən çatdırılma"
+            )
+        
+        summary_state = self.ai_analyzer.daily_summary_state
+        if summary_state:
+            admin_text += (
+                f"\n🌓 **Günlük özet hazırlığı:** {summary_state['ready']}/{summary_state['chunks']} parça, "
+                f"{summary_state['items']} xəbər ({summary_state['updated_at'].strftime('%H:%M')})"
+            )
+        
+        feed_stats = self.news_fetcher.get_feed_stats()
+        scheduler_stats = self.news_fetcher.get_scheduler_stats()
+        if feed_stats:
+            admin_text += "\n\n📡 **Feed keşi (dəyişməyib / sorğu, interval):**"
+            for source, counters in feed_stats.items():
+                unchanged = counters['not_modified'] + counters['unchanged_body']
+                interval = scheduler_stats.get(source, {}).get('interval', '-')
+                admin_text += f"\n• {source}: {unchanged}/{counters['polls']} (304: {counters['not_modified']}), {interval}s"
+        
         admin_text += """
 
 **Admin Komandaları:**
@@ -444,8 +546,7 @@ Bot normal işləyir ✅
             if user_id in self.subscribers:
                 query.edit_message_text("🔔 Siz artıq xəbər abunəçisisiniz!")
             else:
-                self.subscribers.add(user_id)
-                self._save_subscribers()  # Dosyaya kaydet
+                self._add_subscriber(user_id)
                 query.edit_message_text(
                     f"✅ Təbriklər {user_name}! Artıq kripto xəbərləri alacaqsınız.\n\n"
                     f"📊 Abunəçi sayı: {len(self.subscribers)}\n"
@@ -453,16 +554,13 @@ Bot normal işləyir ✅
                 )
                 logger.info(f"Yeni abunəçi (button): {user_id} ({user_name})")
         elif query.data == "latest":
-            query.edit_message_text("🔍 Son xəbərlər axtarılır...")
             try:
-                news_list = self.news_fetcher.fetch_all_news()
-                if not news_list:
+                latest = self.recent_news.latest(1)
+                if not latest:
                     query.edit_message_text("📭 Hal-hazırda yeni xəbər yoxdur.")
                     return
-                # İlk xəbəri göstər
-                if news_list:
-                    message = self.format_news_message(news_list[0])
-                    query.edit_message_text(message, parse_mode=ParseMode.MARKDOWN)
+                # Ən son xəbəri göstər
+                query.edit_message_text(latest[0].text, parse_mode=ParseMode.MARKDOWN)
             except Exception as e:
                 logger.error(f"Latest komanda xətası: {e}")
                 query.edit_message_text("❌ Xəbərlər yüklənərkən xəta baş verdi.")
@@ -636,10 +734,7 @@ Admin: @davudov.07
 Salamlar! Mən sizə real-time kripto xəbərlərini AI analizi ilə birlikdə çatdırıram.
 
 📰 **Xəbər Mənbələri:**
-• CoinDesk
-• The Block  
-• Crypto News
-• NewsBTC
+{self._format_source_list('• ')}
 
 🧠 **AI Analizi:**
 • Market təsiri (Bullish/Bearish/Neytral)
@@ -672,25 +767,69 @@ Bot istifadəyə hazırdır! ✨
     def check_news_job(self, context: CallbackContext):
         """Müntəzəm xəbər yoxlama işi (sync v13)"""
         try:
-            logger.info("Xəbərlər yoxlanılır...")
-            self.last_news_check = datetime.now()
-            news_list = self.news_fetcher.fetch_all_news()
-            if news_list and self.subscribers:
-                for news in news_list[:BOT_SETTINGS['max_news_per_check']]:
-                    message = self.format_news_message(news)
-                    self.broadcast_instant_news(message)  # Akıllı broadcast kullan
-                logger.info(f"{len(news_list)} xəbər instant_news kullanıcılarına göndərildi")
+            # Əvvəlki dövr hələ gedirsə bu tick buraxılır
+            self.news_cycle.run(self._run_news_cycle, join=False)
         except Exception as e:
             logger.error(f"Xəbər yoxlama xətası: {e}")
 
+    def _run_news_cycle(self) -> List[RenderedMessage]:
+        """Bir yoxlama dövrü - mərhələli pipeline ilə (sync v13)"""
+        logger.info("Xəbərlər yoxlanılır...")
+        self.last_news_check = datetime.now()
+        # Job thread-lərində işləyən loop yoxdur - dövr üçün qısa ömürlü loop
+        return asyncio.run(self.pipeline.run())
+
+    def _publish_news(self, rendered: RenderedMessage):
+        """Hazır mesaj: /latest buferinə və göndərilməzdən əvvəl outbox-a yazılır"""
+        self.recent_news.add(rendered)
+        if not self.subscribers:
+            return None
+        # Xəbər artıq "görülüb" - outbox-dakı qeyd restart-da itməməsini təmin edir
+        recipients = self._instant_recipients()
+        return recipients, self.broadcaster.enqueue(recipients, rendered.text, 'instant_news')
+
+    async def _deliver_news(self, rendered: RenderedMessage, ticket):
+        """Pipeline-ın son mərhələsi - outbox-a yazılmış xəbəri yayımlayır"""
+        if ticket is None:
+            return
+        recipients, message_id = ticket
+        result = await self._broadcast_async(recipients, rendered.text, 'instant_news', message_id)
+        logger.info(f"📰 Anlık xəbər {result.sent} istəkli kullanıcıya göndərildi")
+
+    def resume_outbox_job(self, context: CallbackContext):
+        """Restart-dan əvvəl yarımçıq qalmış yayımları davam etdirir (sync v13)"""
+        if not self.outbox:
+            return
+        try:
+            for message_id, label, text, chat_ids in self.outbox.pending():
+                # Aradakı müddətdə abunəlikdən çıxanlara göndərilmir
+                recipients = [user_id for user_id in chat_ids if user_id in self.subscribers]
+                logger.info(f"📮 OUTBOX: Resuming {label} message {message_id} for {len(recipients)}/{len(chat_ids)} recipients")
+                self._broadcast(recipients, text, label, message_id)
+        except Exception as e:
+            logger.error(f"Outbox davam etdirmə xətası: {e}")
+
     def daily_cleanup_job(self, context: CallbackContext):
         """Günlük temizlik işi (sync v13)"""
         try:
             self.news_fetcher.cleanup_seen_news(hours=24)
+            if self.outbox:
+                self.outbox.prune()
             logger.info("Günlük temizlik tamamlandı")
         except Exception as e:
             logger.error(f"Temizlik xətası: {e}")
     
+    def rolling_summary_job(self, context: CallbackContext):
+        """Günlük özetin bağlanmış hissələrini əvvəlcədən hazırlayır (sync v13)"""
+        try:
+            if not self.subscribers:
+                return
+            last_24h_news = self.news_fetcher.get_last_24_hours_news()
+            state = self.ai_analyzer.run_sync(self.ai_analyzer.warm_daily_summary(last_24h_news))
+            logger.info(f"🌓 Günlük özet hazırlığı: {state['ready']}/{state['chunks']} parça hazır")
+        except Exception as e:
+            logger.error(f"Günlük özet hazırlığı xətası: {e}")
+
     def daily_summary_job(self, context: CallbackContext):
         """Günlük özet işi - gece 00:05'te son 24 saatın xəbərlərini özetləyir (sync v13)"""
         try:
@@ -711,12 +850,11 @@ Bot istifadəyə hazırdır! ✨
 
 🌙 Sabaha qədər sakit gecə! ✨""".format(date=datetime.now().strftime('%d.%m.%Y'))
             else:
-                # AI ile özet hazırla (sync versiyonda async çalışmaz, fallback kullan)
-                import asyncio
+                # AI ile özet hazırla - async çağırış analyzer-in fon loop-unda işləyir
                 try:
-                    loop = asyncio.get_event_loop()
-                    summary = loop.run_until_complete(self.ai_analyzer.generate_daily_summary(last_24h_news))
-                except:
+                    summary = self.ai_analyzer.run_sync(self.ai_analyzer.generate_daily_summary(last_24h_news))
+                except Exception as e:
+                    logger.error(f"Günlük özet AI xətası: {e}")
                     summary = self.ai_analyzer._fallback_daily_summary(last_24h_news)
                 
                 if summary:
@@ -761,130 +899,83 @@ Admin məlumatlandırıldı."""
             except:
                 pass
 
-    def format_news_message(self, news: NewsItem) -> str:
-        """Xəbər mesajını formatlaşdırır (sync v13)"""
-        try:
-            analysis = ""
-            if BOT_SETTINGS['ai_analysis']:
+    def render_news(self, news: NewsItem, analysis: Optional[str] = None) -> RenderedMessage:
+        """Xəbərin hazır mesajı - yoxdursa analiz edib bir dəfə formatlaşdırır (sync v13)"""
+        rendered = self.renderer.get(news)
+        if rendered:
+            return rendered
+        if BOT_SETTINGS['ai_analysis']:
+            if analysis is None:
                 analysis = self.ai_analyzer.analyze_news(news)
-                if analysis:
-                    analysis = f"\n\n🧠 **AI Analizi:**\n{analysis}"
-            source_emoji = {
-                'CoinDesk': '📰',
-                'The Block': '🔷',
-                'Cointelegraph': '📊',
-                'Crypto News': '🌐',
-                'NewsBTC': '₿'
-            }.get(news.source, '📰')
-            
-            # Azərbaycan saatına çevirmək
-            utc_time = news.published_date.replace(tzinfo=pytz.UTC)
-            azerbaijan_tz = pytz.timezone('Asia/Baku')
-            local_time = utc_time.astimezone(azerbaijan_tz)
-            
-            message = f"""
-{source_emoji} **{news.title}**
-
-📍 Mənbə: {news.source}
-🕐 Tarix: {local_time.strftime('%d.%m.%Y %H:%M')} (AZT)
+        else:
+            analysis = None
+        return self.renderer.render(news, analysis)
+
+    def format_news_message(self, news: NewsItem, analysis: Optional[str] = None) -> str:
+        """Xəbərin hazır mesaj mətni (sync v13)"""
+        return self.render_news(news, analysis).text
+
+    async def _send_markdown(self, chat_id: int, text: str):
+        """Bir çata Markdown mesajı (bloklayan v13 çağırışı executor-da)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self._send_executor,
+            lambda: self.updater.bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=ParseMode.MARKDOWN,
+                disable_web_page_preview=True
+            )
+        )
 
-🔗 [Ətraflı oxu]({news.url}){analysis}
+    def _broadcast(self, recipients: List[int], message: str, label: str,
+                   message_id: Optional[int] = None) -> BroadcastResult:
+        """_broadcast_async-in sync variantı (sync v13)"""
+        # Job thread-lərində işləyən loop yoxdur - yayım üçün qısa ömürlü loop
+        return asyncio.run(self._broadcast_async(recipients, message, label, message_id))
 
----
-"""
-            return message.strip()
-        except Exception as e:
-            logger.error(f"Mesaj formatlaşdırma xətası: {e}")
-            return f"📰 **{news.title}**\n🔗 [Link]({news.url})"
+    async def _broadcast_async(self, recipients: List[int], message: str, label: str,
+                               message_id: Optional[int] = None) -> BroadcastResult:
+        """Mesajı alıcılara BroadcastEngine ilə göndərir, uğursuzları çıxarır"""
+        result = await self.broadcaster.broadcast(recipients, message, label, message_id)
+        
+        # Yalnız həmişəlik əlçatmaz çatlar (bloklanıb, silinib) abunəlikdən çıxarılır;
+        # timeout/flood kimi müvəqqəti xətalar engine-in retry növbəsində qalır
+        removed = result.permanent_ids
+        if removed:
+            for user_id, kind, reason in result.failed:
+                if kind == PERMANENT:
+                    logger.info(f"User {user_id} abunəlikdən çıxarıldı ({reason})")
+            self._remove_subscribers(removed)
+        kept = len(result.failed) - len(removed)
+        if kept:
+            logger.warning(f"⚠️ {label}: {kept} abunəçiyə çatdırılmadı (müvəqqəti xəta), abunəlik saxlanıldı")
+        return result
 
     def broadcast_message(self, message: str):
         """Bütün abunəçilərə mesaj göndərir (sync v13)"""
-        failed_sends = []
-        for user_id in self.subscribers.copy():
-            try:
-                self.updater.bot.send_message(
-                    chat_id=user_id,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True
-                )
-            except Exception as e:
-                logger.warning(f"User {user_id} göndərim xətası: {e}")
-                failed_sends.append(user_id)
-        
-        # Uğursuz göndərimləri temizlə ve dosyaya kaydet
-        if failed_sends:
-            for user_id in failed_sends:
-                if user_id in self.subscribers:
-                    self.subscribers.remove(user_id)
-                    logger.info(f"User {user_id} abunəlikdən çıxarıldı (göndərim xətası)")
-            self._save_subscribers()  # Güncel listeyi dosyaya kaydet
-
-    def broadcast_instant_news(self, message: str):
+        self._broadcast(list(self.subscribers), message, 'message')
+
+    def _instant_recipients(self) -> List[int]:
+        """Anlık xəbər istəyən abunəçilər"""
+        return self.audience.recipients('instant')
+
+    def _daily_recipients(self) -> List[int]:
+        """Günlük özet istəyən abunəçilər"""
+        return self.audience.recipients('daily')
+
+    def broadcast_instant_news(self, message: str, message_id: Optional[int] = None,
+                               recipients: Optional[List[int]] = None):
         """Sadəcə anlık xəbər istəyən abunəçilərə göndərir (sync v13)"""
-        failed_sends = []
-        sent_count = 0
-        
-        for user_id in self.subscribers.copy():
-            # Kullanıcının instant notification ayarını kontrol et
-            user_settings = self._get_user_settings(user_id)
-            if not user_settings.get('instant_notifications', True):
-                continue  # Bu kullanıcı anlık haber istemiyor, atla
-                
-            try:
-                self.updater.bot.send_message(
-                    chat_id=user_id,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True
-                )
-                sent_count += 1
-            except Exception as e:
-                logger.warning(f"User {user_id} anlık xəbər göndərim xətası: {e}")
-                failed_sends.append(user_id)
-        
-        # Uğursuz göndərimləri temizlə
-        if failed_sends:
-            for user_id in failed_sends:
-                if user_id in self.subscribers:
-                    self.subscribers.remove(user_id)
-                    logger.info(f"User {user_id} abunəlikdən çıxarıldı (göndərim xətası)")
-            self._save_subscribers()
-        
-        logger.info(f"📰 Anlık xəbər {sent_count} istəkli kullanıcıya göndərildi")
+        if recipients is None:
+            recipients = self._instant_recipients()
+        result = self._broadcast(recipients, message, 'instant_news', message_id)
+        logger.info(f"📰 Anlık xəbər {result.sent} istəkli kullanıcıya göndərildi")
 
     def broadcast_daily_summary(self, message: str):
         """Sadəcə günlük özet istəyən abunəçilərə göndərir (sync v13)"""
-        failed_sends = []
-        sent_count = 0
-        
-        for user_id in self.subscribers.copy():
-            # Kullanıcının daily summary ayarını kontrol et
-            user_settings = self._get_user_settings(user_id)
-            if not user_settings.get('daily_summary', True):
-                continue  # Bu kullanıcı günlük özet istemiyor, atla
-                
-            try:
-                self.updater.bot.send_message(
-                    chat_id=user_id,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True
-                )
-                sent_count += 1
-            except Exception as e:
-                logger.warning(f"User {user_id} günlük özet göndərim xətası: {e}")
-                failed_sends.append(user_id)
-        
-        # Uğursuz göndərimləri temizlə
-        if failed_sends:
-            for user_id in failed_sends:
-                if user_id in self.subscribers:
-                    self.subscribers.remove(user_id)
-                    logger.info(f"User {user_id} abunəlikdən çıxarıldı (göndərim xətası)")
-            self._save_subscribers()
-        
-        logger.info(f"📅 Günlük özet {sent_count} istəkli kullanıcıya göndərildi")
+        result = self._broadcast(self._daily_recipients(), message, 'daily_summary')
+        logger.info(f"📅 Günlük özet {result.sent} istəkli kullanıcıya göndərildi")
 
     def manual_daily_summary_command(self, update: Update, context: CallbackContext):
         """Manuel günlük özet komandası (admin - sync v13)"""
@@ -914,12 +1005,11 @@ Admin məlumatlandırıldı."""
 
 🔧 Admin tərəfindən manuel göndərildi."""
             else:
-                # AI ile özet hazırla (sync versiyonda async çalışmaz, fallback kullan)
-                import asyncio
+                # AI ile özet hazırla - async çağırış analyzer-in fon loop-unda işləyir
                 try:
-                    loop = asyncio.get_event_loop()
-                    summary = loop.run_until_complete(self.ai_analyzer.generate_daily_summary(last_24h_news))
-                except:
+                    summary = self.ai_analyzer.run_sync(self.ai_analyzer.generate_daily_summary(last_24h_news))
+                except Exception as e:
+                    logger.error(f"Günlük özet AI xətası: {e}")
                     summary = self.ai_analyzer._fallback_daily_summary(last_24h_news)
                 
                 if summary:
@@ -959,4 +1049,12 @@ Admin məlumatlandırıldı."""
         self.initialize()
         logger.info("Bot başladılır...")
         self.updater.start_polling()
-        self.updater.idle()
\ No newline at end of file
+        try:
+            self.updater.idle()
+        finally:
+            self.news_fetcher.close()
+            self.ai_analyzer.close()
+            self._send_executor.shutdown(wait=False)
+            if self.outbox:
+                self.outbox.close()
+            self.storage.close()
\ No newline at end of file
@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import BROADCAST_SETTINGS
+from outbox import Outbox
+from rate_limit import TokenBucket
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+performance_logger = logging.getLogger('performance')
+
+SendFunc = Callable[[int, str], Awaitable[None]]
+
+# Göndərmə xətalarının növləri
+PERMANENT = 'permanent'   # Çat həmişəlik əlçatmazdır - abunəçi silinir
+TRANSIENT = 'transient'   # Müvəqqəti (timeout, şəbəkə, flood) - gecikmə ilə yenidən cəhd
+REJECTED = 'rejected'     # Mesajın özü rədd edildi (məs. Markdown) - abunəçi qalır, cəhd yoxdur
+
+# Telegram-ın mətn ilə bildirdiyi həmişəlik hallar (PTB versiyasından asılı deyil)
+_PERMANENT_MESSAGES = (
+    ('blocked', 'bot was blocked by the user'),
+    ('deactivated', 'user is deactivated'),
+    ('kicked', 'bot was kicked'),
+    ('kicked', 'bot is not a member'),
+    ('chat_not_found', 'chat not found'),
+    ('chat_not_found', 'user not found'),
+    ('cant_initiate', "bot can't initiate conversation")
+)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Telegram RetryAfter xətasından gözləmə müddəti (digər xətalar üçün None)
+
+    PTB v13 və v20 RetryAfter-i eyni atributla verir; yeni versiyalarda
+    dəyər timedelta ola bilər.
+    """
+    value = getattr(error, 'retry_after', None)
+    if value is None:
+        return None
+    if hasattr(value, 'total_seconds'):
+        value = value.total_seconds()
+    return float(value)
+
+
+def classify_send_error(error: Exception) -> Tuple[str, str]:
+    """Göndərmə xətasını (növ, səbəb) cütünə çevirir
+
+    Sinif adları ilə yoxlanılır ki, həm v13 (Unauthorized), həm v20
+    (Forbidden) xətaları telegram import etmədən tanınsın.
+    """
+    if retry_after_seconds(error) is not None:
+        return TRANSIENT, 'retry_after'
+    message = str(error).lower()
+    for reason, pattern in _PERMANENT_MESSAGES:
+        if pattern in message:
+            return PERMANENT, reason
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if 'ChatMigrated' in names:
+        return PERMANENT, 'migrated'
+    if names & {'Unauthorized', 'Forbidden'}:
+        return PERMANENT, 'forbidden'
+    # PTB-də BadRequest və TimedOut NetworkError-dan törəyir - sıra vacibdir
+    if 'BadRequest' in names:
+        return REJECTED, 'bad_request'
+    if names & {'TimedOut', 'TimeoutError'}:
+        return TRANSIENT, 'timeout'
+    if names & {'NetworkError', 'ConnectionError', 'OSError'}:
+        return TRANSIENT, 'network'
+    return TRANSIENT, 'unknown'
+
+
+class BroadcastResult:
+    """Bir yayımın nəticəsi"""
+
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.sent = 0
+        self.failed: List[Tuple[int, str, str]] = []   # (chat_id, növ, səbəb) - çatdırılmayanlar
+        self.errors: Counter = Counter()                # Səbəb üzrə bütün xəta hadisələri
+        self.retry_after = 0
+        self.retried = 0
+        self.duration = 0.0
+
+    @property
+    def permanent_ids(self) -> List[int]:
+        """Həmişəlik əlçatmaz çatlar - abunəlikdən çıxarılmalıdır"""
+        return [chat_id for chat_id, kind, _ in self.failed if kind == PERMANENT]
+
+    @property
+    def rate(self) -> float:
+        return self.sent / self.duration if self.duration else 0.0
+
+
+class BroadcastEngine:
+    """Telegram limitlərinə uyğun paralel yayım mühərriki
+
+    Ümumi (~30 msg/s) və çat üzrə token bucket-lər göndərmə sürətini
+    məhdudlaşdırır, max_concurrency qədər sorğu eyni anda gözlənilir.
+    RetryAfter alındıqda bütün yayım həmin müddət qədər dayanır və mesaj
+    yenidən cəhd edilir. Müvəqqəti xətalar retry növbəsinə düşür və artan
+    gecikmə ilə yenidən göndərilir; yalnız həmişəlik xətalar çağırana
+    silinmək üçün qaytarılır. Bot-dan asılı deyil - göndərmə funksiyası verilir.
+    Outbox verilərsə hər çatdırılma orada qeyd olunur və yarımçıq yayım
+    restart-dan sonra davam etdirilə bilər.
+    """
+
+    def __init__(self, send: SendFunc, settings: Optional[Dict] = None, outbox: Optional[Outbox] = None):
+        self.send = send
+        self.settings = settings or BROADCAST_SETTINGS
+        self.outbox = outbox
+        # Ümumi limit üçün partlayış yoxdur - göndərmələr bərabər paylanır
+        self._global = TokenBucket(self.settings['global_rate'] * 60, capacity=1)
+        self._chats: Dict[int, TokenBucket] = {}
+        self._paused_until = 0.0
+        # PTB v13-də yayımlar müxtəlif job thread-lərindən gələ bilər
+        self._lock = threading.Lock()
+        self.stats = {
+            'broadcasts': 0,
+            'sent': 0,
+            'failed': 0,
+            'retry_after': 0,
+            'retried': 0,
+            'last_rate': 0.0,
+            'last_duration': 0.0
+        }
+        self.error_counts: Counter = Counter()
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.settings['per_chat_rate'] * 60, capacity=self.settings['per_chat_burst'])
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _reserve(self, chat_id: int) -> float:
+        """Göndərmə yeri varsa tutur və 0 qaytarır, yoxdursa gözləmə müddətini"""
+        now = time.monotonic()
+        with self._lock:
+            if self._paused_until > now:
+                return self._paused_until - now
+            chat = self._chat_bucket(chat_id)
+            wait = max(self._global.wait_time(1, now), chat.wait_time(1, now))
+            if wait > 0:
+                return wait
+            self._global.consume(1)
+            chat.consume(1)
+            return 0.0
+
+    def _pause(self, seconds: float):
+        seconds = min(seconds, self.settings['max_retry_after'])
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Fasilədən sonra partlayış olmasın
+            self._global.drain()
+        logger.warning(f"⏸️ BROADCAST: Telegram RetryAfter - pausing all sends for {seconds:.1f}s")
+
+    def _prune_chats(self):
+        """Tam dolmuş çat bucket-ləri default vəziyyətdədir - silinə bilər"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                chat_id for chat_id, bucket in self._chats.items()
+                if bucket.wait_time(bucket.capacity, now) == 0
+            ]
+            for chat_id in idle:
+                del self._chats[chat_id]
+
+    async def _deliver(self, chat_id: int, text: str, result: BroadcastResult,
+                       message_id: Optional[int] = None) -> Optional[Tuple[str, str]]:
+        """Bir çata göndərir; uğurda None, əks halda (növ, səbəb)"""
+        for attempt in range(1, self.settings['max_attempts'] + 1):
+            while True:
+                wait = self._reserve(chat_id)
+                if wait == 0:
+                    break
+                await asyncio.sleep(wait)
+            try:
+                await self.send(chat_id, text)
+                result.sent += 1
+                if message_id is not None:
+                    self.outbox.mark_sent(message_id, chat_id)
+                return None
+            except Exception as e:
+                kind, reason = classify_send_error(e)
+                result.errors[reason] += 1
+                if reason != 'retry_after' or attempt == self.settings['max_attempts']:
+                    logger.warning(f"User {chat_id} göndərim xətası ({kind}/{reason}): {e}")
+                    return kind, reason
+                result.retry_after += 1
+                self._pause(retry_after_seconds(e))
+        return None
+
+    async def _send_round(self, chat_ids: List[int], text: str, result: BroadcastResult,
+                          message_id: Optional[int] = None) -> List[Tuple[int, str, str]]:
+        """Bir dövr: çatlara paralel göndərir, uğursuzları qaytarır"""
+        failures: List[Tuple[int, str, str]] = []
+        queue = iter(chat_ids)
+
+        async def worker():
+            # Bütün worker-lər eyni iterator-dan götürür - sıra qorunur, yaddaş O(worker)
+            for chat_id in queue:
+                failure = await self._deliver(chat_id, text, result, message_id)
+                if failure:
+                    failures.append((chat_id,) + failure)
+
+        workers = min(self.settings['max_concurrency'], len(chat_ids))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        return failures
+
+    def enqueue(self, chat_ids: Iterable[int], text: str, label: str = "broadcast") -> Optional[int]:
+        """Mesajı göndərməzdən əvvəl outbox-a yazır (outbox yoxdursa None)"""
+        if self.outbox is None:
+            return None
+        return self.outbox.enqueue(label, text, chat_ids)
+
+    async def broadcast(self, chat_ids: Iterable[int], text: str, label: str = "broadcast",
+                        message_id: Optional[int] = None) -> BroadcastResult:
+        """Mesajı bütün çatlara limitlər daxilində paralel göndərir
+
+        message_id verilməyibsə mesaj outbox-a burada yazılır; verilibsə
+        (əvvəlcədən enqueue və ya restart-dan sonra davam) həmin qeyd istifadə olunur.
+        """
+        chat_ids = list(chat_ids)
+        if message_id is None:
+            message_id = self.enqueue(chat_ids, text, label)
+        result = BroadcastResult(label, len(chat_ids))
+        if not chat_ids:
+            if message_id is not None:
+                self.outbox.complete(message_id)
+            return result
+
+        start = time.monotonic()
+        failures = await self._send_round(chat_ids, text, result, message_id)
+
+        # Retry növbəsi: müvəqqəti xətalar artan gecikmə ilə yenidən göndərilir
+        delay = self.settings['retry_backoff']
+        for _ in range(self.settings['retry_rounds']):
+            retry_ids = [chat_id for chat_id, kind, _ in failures if kind == TRANSIENT]
+            if not retry_ids:
+                break
+            logger.info(f"🔁 BROADCAST: {label} retrying {len(retry_ids)} transient failures in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay *= 2
+            result.retried += len(retry_ids)
+            failures = [failure for failure in failures if failure[1] != TRANSIENT]
+            failures += await self._send_round(retry_ids, text, result, message_id)
+
+        result.failed = failures
+        if message_id is not None:
+            self.outbox.complete(message_id, [(chat_id, reason) for chat_id, _, reason in failures])
+        result.duration = time.monotonic() - start
+        self._prune_chats()
+
+        with self._lock:
+            self.stats['broadcasts'] += 1
+            self.stats['sent'] += result.sent
+            self.stats['failed'] += len(result.failed)
+            self.stats['retry_after'] += result.retry_after
+            self.stats['retried'] += result.retried
+            self.stats['last_rate'] = result.rate
+            self.stats['last_duration'] = result.duration
+            self.error_counts.update(result.errors)
+        performance_logger.info(
+            f"📣 BROADCAST: {label} {result.sent}/{result.total} sent in {result.duration:.1f}s "
+            f"({result.rate:.1f} msg/s, {len(result.failed)} failed, {result.retry_after} retry-after, "
+            f"{result.retried} retried)"
+        )
+        if result.errors:
+            logger.info(f"📣 BROADCAST: {label} errors by reason: {dict(result.errors)}")
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['errors'] = dict(self.error_counts)
+        return stats
+
+
+if __name__ == '__main__':
+    # Fan-out benchmark: saxta Bot API ilə köhnə ardıcıl döngü və yeni mühərrik
+    import sys
+
+    class FakeRetryAfter(Exception):
+        def __init__(self, retry_after):
+            super().__init__(f"Flood control exceeded. Retry in {retry_after} seconds")
+            self.retry_after = retry_after
+
+    class Forbidden(Exception):
+        pass
+
+    class TimedOut(Exception):
+        pass
+
+    class FakeBotAPI:
+        """send_message gecikməsini və server tərəfi limiti təqlid edir"""
+
+        def __init__(self, latency: float, flood_at: Optional[int] = None, faults: bool = False):
+            self.latency = latency
+            self.flood_at = flood_at
+            self.faults = faults
+            self.sent_at: List[float] = []
+            self.calls = 0
+            self.timed_out = set()
+
+        async def send_message(self, chat_id: int, text: str):
+            self.calls += 1
+            if self.calls == self.flood_at:
+                raise FakeRetryAfter(1)
+            if self.faults and chat_id % 97 == 0:
+                raise Forbidden("Forbidden: bot was blocked by the user")
+            if self.faults and chat_id % 53 == 0 and chat_id not in self.timed_out:
+                # Bir dəfəlik timeout - retry növbəsində çatdırılmalıdır
+                self.timed_out.add(chat_id)
+                raise TimedOut("Timed out")
+            await asyncio.sleep(self.latency)
+            self.sent_at.append(time.monotonic())
+
+        def peak_per_second(self) -> int:
+            peak, left = 0, 0
+            for right, stamp in enumerate(self.sent_at):
+                while stamp - self.sent_at[left] >= 1.0:
+                    left += 1
+                peak = max(peak, right - left + 1)
+            return peak
+
+    async def sequential(api: FakeBotAPI, chat_ids: List[int]):
+        # Köhnə davranış: hər mesajdan sonra 0.1s yuxu
+        for chat_id in chat_ids:
+            await api.send_message(chat_id, "news")
+            await asyncio.sleep(0.1)
+
+    async def main(subscribers: int, latency: float):
+        chat_ids = list(range(subscribers))
+
+        sample = chat_ids[:30]
+        api = FakeBotAPI(latency)
+        start = time.monotonic()
+        await sequential(api, sample)
+        per_message = (time.monotonic() - start) / len(sample)
+        print(f"Sequential + sleep(0.1): {1 / per_message:.1f} msg/s "
+              f"(measured on {len(sample)}, {subscribers} would take {subscribers * per_message:.0f}s)")
+
+        api = FakeBotAPI(latency, flood_at=subscribers // 2, faults=True)
+        engine = BroadcastEngine(api.send_message)
+        result = await engine.broadcast(chat_ids, "news", "benchmark")
+        print(f"BroadcastEngine: {result.sent}/{result.total} sent in {result.duration:.1f}s "
+              f"({result.rate:.1f} msg/s, peak {api.peak_per_second()} msg in any 1s window, "
+              f"limit {BROADCAST_SETTINGS['global_rate']}, {result.retry_after} RetryAfter honored)")
+        print(f"  errors by reason: {dict(result.errors)}, retried {result.retried}, "
+              f"to unsubscribe {len(result.permanent_ids)}, undelivered kept {len(result.failed) - len(result.permanent_ids)}")
+        print(f"Projected 10k-subscriber fan-out: {10000 * per_message / 60:.1f} min → "
+              f"{10000 / BROADCAST_SETTINGS['global_rate'] / 60:.1f} min")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    asyncio.run(main(count, latency=0.08))
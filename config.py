@@ -11,40 +11,105 @@ TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
 # News Sources Configuration
+# Hər mənbə öz parametrlərini daşıyır - yeni feed əlavə etmək üçün kod lazım deyil:
+#   max_entries      - feed-dən baxılan maksimum entry (default: FETCH_SETTINGS)
+#   content_selector - məqalə mətni üçün CSS selektoru (None = ümumi heuristika)
+#   priority         - yüksək prioritet əvvəl çəkilir və göndərilir
+#   poll_interval    - başlanğıc sorğu intervalı (saniyə); sonra planlayıcı uyğunlaşdırır
+#   enabled          - False olduqda mənbə sorğulanmır
 NEWS_SOURCES = {
     'coindesk': {
         'rss_url': 'https://www.coindesk.com/arc/outboundfeeds/rss/',
         'api_url': 'https://www.coindesk.com/api/v1/news',
-        'name': 'CoinDesk'
+        'name': 'CoinDesk',
+        'max_entries': 10,
+        'content_selector': 'div.document-body p',
+        'priority': 10,
+        'poll_interval': 90,
+        'enabled': True
     },
     'theblock': {
         'rss_url': 'https://www.theblock.co/rss.xml',
-        'name': 'The Block'
+        'name': 'The Block',
+        'max_entries': 10,
+        'content_selector': 'div.articleBody p',
+        'priority': 10,
+        'poll_interval': 90,
+        'enabled': True
     },
 
     'cryptonews': {
         'rss_url': 'https://crypto.news/feed/',
-        'name': 'Crypto News'
+        'name': 'Crypto News',
+        'max_entries': 10,
+        'content_selector': 'div.post-detail__content p',
+        'priority': 5,
+        'poll_interval': 180,
+        'enabled': True
     },
     'newsbtc': {
         'rss_url': 'https://www.newsbtc.com/feed/',
-        'name': 'NewsBTC'
+        'name': 'NewsBTC',
+        'max_entries': 10,
+        'content_selector': 'div.entry-content p',
+        'priority': 5,
+        'poll_interval': 180,
+        'enabled': True
     }
 }
 
 # Bot Settings
 BOT_SETTINGS = {
-    'check_interval': 90,  # 1.5 minutes
+    'check_interval': 90,  # 1.5 minutes - mənbələr üçün default başlanğıc sorğu intervalı
     'max_news_per_check': 5,
     'ai_analysis': True,
     'send_to_channels': True
 }
 
+# News Fetch Settings
+FETCH_SETTINGS = {
+    'max_concurrent_requests': 16,  # Bütün hostlar üzrə eyni anda açıq sorğu limiti
+    'max_concurrent_feeds': 32,     # Eyni anda emal olunan feed sayı (thread pool)
+    'per_host_limit': 4,            # Bir host-a eyni anda maksimum sorğu
+    'request_timeout': 10,          # seconds
+    'max_entries_per_feed': 10,
+    'max_retries': 2,
+    'pool_connections': 64,         # Keep-alive saxlanılan host pool sayı
+    'dns_cache_ttl': 300,           # seconds
+    'user_agent': 'CryptoNewsBot/1.0'
+}
+
+# Adaptive Polling Scheduler
+SCHEDULER_SETTINGS = {
+    'tick_interval': 30,          # Check job-un işləmə tezliyi (seconds)
+    'min_interval': 30,           # Ən sürətli mənbə üçün sorğu intervalı
+    'max_interval': 1800,         # Sakit mənbə ən azı 30 dəqiqədə bir sorğulanır
+    'ewma_alpha': 0.3,            # Yayım sürəti ortalamasında son sorğunun çəkisi
+    'target_items_per_poll': 1,   # Hər sorğuda gözlənilən yeni xəbər sayı
+    'backoff_factor': 1.5         # Ardıcıl boş sorğularda maksimum genişlənmə əmsalı
+}
+
+# Storage Settings
+STORAGE_SETTINGS = {
+    'backend': os.getenv('STORAGE_BACKEND', 'sqlite'),  # 'sqlite' və ya 'json'
+    'sqlite_path': os.getenv('SQLITE_PATH', 'cryptonews.db'),
+    # JSON backend faylları (sqlite ilk başlanğıcda bunları import edir)
+    'seen_news_file': 'seen_news.jsonl',
+    'subscribers_file': 'subscribers.json',
+    'user_settings_file': 'user_settings.json',
+    'feed_state_file': 'feed_state.json',
+    # Abunəçi/ayar yazıları yaddaşda yığılır və fon thread-də debounce ilə yazılır
+    'write_behind': True,
+    'write_behind_delay': 2.0   # seconds
+}
+
 # AI Analysis Settings
 AI_SETTINGS = {
     'model': 'gemini-2.0-flash',
     'max_tokens': 200,
     'temperature': 0.7,
+    'max_concurrent_requests': 4,      # Eyni anda icra olunan Gemini çağırışları
+    'request_timeout': 30,             # Hər Gemini çağırışı üçün timeout (seconds)
     'analysis_prompt': """
 Aşağıdakı kripto xəbəri analiz edin və qısa bir yorum yazın:
 
@@ -59,9 +124,89 @@ Format:
 🔥 Market Təsiri: [Bullish/Bearish/Neytral]
 📊 Analiz: [Qısa analiz]
 ⚠️ Risk: [Aşağı/Orta/Yüksək]
+""",
+    'batch_size': 5,                   # Tək Gemini sorğusunda analiz olunan maksimum xəbər
+    'batch_analysis_prompt': """
+Aşağıdakı {count} kripto xəbərini ayrı-ayrılıqda analiz edin. Hər xəbər [nömrə] ilə işarələnib.
+
+{news_blocks}
+
+Hər xəbər üçün:
+- market_impact: Bullish, Bearish və ya Neytral
+- analysis: qısa analiz (1-2 cümlə)
+- risk: Aşağı, Orta və ya Yüksək
+
+Cavabı YALNIZ JSON massivi kimi qaytarın, başqa mətn əlavə etməyin:
+[{{"id": 1, "market_impact": "...", "analysis": "...", "risk": "..."}}]
 """
 }
 
+# Daily Summary Settings (map-reduce)
+DAILY_SUMMARY_SETTINGS = {
+    'chunk_size': 25,          # Bundan çox xəbər olduqda map-reduce rejimi
+    'window_hours': 3,         # Map parçalarının saata bağlı zaman pəncərəsi
+    'chunk_max_tokens': 300,   # Hər parça xülasəsi üçün cavab limiti
+    'report_max_tokens': 1500, # Yekun hesabat (~800 söz) üçün cavab limiti
+    'rolling_interval': 3600   # Gün ərzində parça xülasələrinin əvvəlcədən hazırlanması (seconds)
+}
+
+# Gemini client-side rate limits (free tier: 15 RPM, 1M TPM)
+GEMINI_RATE_LIMITS = {
+    'requests_per_minute': int(os.getenv('GEMINI_RPM', '15')),
+    'tokens_per_minute': int(os.getenv('GEMINI_TPM', '1000000')),  # Təxmini (~4 simvol/token)
+    'max_wait': 30   # Limit üçün maksimum gözləmə, sonra fallback (seconds)
+}
+
+# AI Analysis Cache (SQLite - storage backend-dən asılı olmayaraq)
+ANALYSIS_CACHE_SETTINGS = {
+    'enabled': True,
+    'path': os.getenv('ANALYSIS_CACHE_PATH', STORAGE_SETTINGS['sqlite_path']),
+    'ttl': 7 * 24 * 3600,   # seconds
+    'max_entries': 5000,
+    'memory_size': 256,     # Yaddaşdakı LRU ölçüsü
+    'prune_every': 100      # Hər N yazıdan sonra TTL/ölçü təmizliyi
+}
+
+# Telegram Broadcast Settings (Bot API: ~30 msg/s ümumi, ~1 msg/s bir çata)
+BROADCAST_SETTINGS = {
+    'global_rate': 30,        # Bütün çatlar üzrə mesaj/saniyə
+    'per_chat_rate': 1,       # Bir çata mesaj/saniyə
+    'per_chat_burst': 3,      # Bir çata qısa partlayış (ardıcıl xəbərlər)
+    'max_concurrency': 30,    # Eyni anda gözlənilən send_message sorğuları
+    'max_retry_after': 60,    # RetryAfter üçün maksimum fasilə (seconds)
+    'max_attempts': 3,        # RetryAfter-dən sonra eyni mesaj üçün cəhd sayı
+    'retry_rounds': 3,        # Müvəqqəti xətalar (timeout, şəbəkə) üçün retry dövrləri
+    'retry_backoff': 2        # İlk retry gecikməsi, hər dövr iki dəfə artır (seconds)
+}
+
+# Message Rendering (hər xəbər bir dəfə formatlaşdırılır)
+RENDER_SETTINGS = {
+    'locale': 'az',
+    'cache_size': 512,  # Yaddaşda saxlanılan hazır mesaj sayı (LRU)
+    'recent_size': 10,  # /latest üçün son xəbərlərin halqa buferi
+    'latest_count': 3   # /latest-in göstərdiyi xəbər sayı
+}
+
+# Staged News Pipeline (fetch → dedup → enrich → analyze → render → deliver)
+PIPELINE_SETTINGS = {
+    'queue_size': 16,           # Mərhələlər arası növbə limiti (backpressure)
+    'fetch_concurrency': 8,     # Eyni anda çəkilən feed sayı
+    'enrich_concurrency': 8,    # Eyni anda çəkilən məqalə sayı
+    'analyze_concurrency': 2,   # Eyni anda gedən Gemini sorğusu
+    'analyze_batch': 5,         # Növbədə hazır olan xəbərlər bir sorğuda analiz edilir
+    'deliver_concurrency': 1    # Yayımlar ardıcıl - hər biri öz daxilində paraleldir
+}
+
+# Persistent Outbox (SQLite - yarımçıq yayımlar restart-dan sonra davam edir)
+OUTBOX_SETTINGS = {
+    'enabled': True,
+    'path': os.getenv('OUTBOX_PATH', STORAGE_SETTINGS['sqlite_path']),
+    'flush_every': 50,         # Bu qədər uğurlu göndərmədən sonra vəziyyət diskə yazılır
+    'flush_interval': 1.0,     # ...və ya bu qədər saniyədən sonra
+    'max_age': 6 * 3600,       # Daha köhnə yarımçıq mesajlar restart-da göndərilmir (seconds)
+    'retention': 6 * 3600      # Tamamlanmış mesajların saxlanma müddəti (seconds)
+}
+
 # Admin Configuration
 ADMIN_USER_IDS_STR = os.getenv('ADMIN_USER_IDS', '5387921878')  # Default admin ID
 ADMIN_USER_IDS = [int(id.strip()) for id in ADMIN_USER_IDS_STR.split(',') if id.strip()]
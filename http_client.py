@@ -0,0 +1,176 @@
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import FETCH_SETTINGS
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli  # noqa: F401 - urllib3 'br' kodlaşdırmasını bununla açır
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+
+class DNSCache:
+    """socket.getaddrinfo üçün TTL-li proses daxili keş"""
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._cache: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        self._original_getaddrinfo = None
+        self.hits = 0
+        self.misses = 0
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+        result = self._original_getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (now + self.ttl, result)
+        return result
+
+    def install(self):
+        if self._original_getaddrinfo is None:
+            self._original_getaddrinfo = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        if self._original_getaddrinfo is not None:
+            socket.getaddrinfo = self._original_getaddrinfo
+            self._original_getaddrinfo = None
+
+
+class HttpClient:
+    """Bütün xarici HTTP sorğuları üçün paylaşılan, pool-lu session
+
+    Host üzrə keep-alive bağlantıları təkrar istifadə olunur, gzip/brotli
+    cavabları açılır, DNS nəticələri keşlənir. Qlobal və host səviyyəli
+    paralel sorğu limitləri də burada tətbiq olunur.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or FETCH_SETTINGS
+        self.timeout = self.settings['request_timeout']
+
+        self.session = requests.Session()
+        retries = Retry(
+            total=self.settings.get('max_retries', 2),
+            backoff_factor=0.3,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=['GET', 'HEAD']
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.settings.get('pool_connections', 64),
+            pool_maxsize=self.settings['per_host_limit'],
+            max_retries=retries
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._adapters = [adapter]
+        self.session.headers.update({
+            'User-Agent': self.settings.get('user_agent', 'CryptoNewsBot/1.0'),
+            'Accept-Encoding': 'gzip, deflate, br' if BROTLI_AVAILABLE else 'gzip, deflate'
+        })
+
+        self.dns_cache = DNSCache(ttl=self.settings.get('dns_cache_ttl', 300))
+        self.dns_cache.install()
+
+        self._request_slots = threading.BoundedSemaphore(self.settings['max_concurrent_requests'])
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'requests': 0,
+            'errors': 0,
+            'bytes_received': 0
+        }
+        self._closed = False
+        logger.info(f"🌐 HTTP_CLIENT: Pooled session ready (brotli: {'on' if BROTLI_AVAILABLE else 'off'})")
+
+    @contextmanager
+    def _request_slot(self, url: str):
+        """Sorğu üçün host və qlobal limit slotlarını tutur"""
+        host = urlparse(url).netloc.lower()
+        with self._host_slots_lock:
+            host_slot = self._host_slots.get(host)
+            if host_slot is None:
+                host_slot = threading.BoundedSemaphore(self.settings['per_host_limit'])
+                self._host_slots[host] = host_slot
+        # Əvvəl host slotu: gözləyən host qlobal slotları boş yerə tutmasın
+        with host_slot:
+            with self._request_slots:
+                yield
+
+    def get(self, url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None) -> requests.Response:
+        """Limitlər daxilində GET sorğusu göndərir"""
+        try:
+            with self._request_slot(url):
+                response = self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+        except Exception:
+            with self._metrics_lock:
+                self.metrics['requests'] += 1
+                self.metrics['errors'] += 1
+            raise
+        with self._metrics_lock:
+            self.metrics['requests'] += 1
+            self.metrics['bytes_received'] += len(response.content)
+        return response
+
+    def get_metrics(self) -> Dict:
+        """Bağlantı təkrar istifadəsi və DNS keşi metrikləri"""
+        connections_opened = 0
+        pool_requests = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections_opened += pool.num_connections
+                pool_requests += pool.num_requests
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['connections_opened'] = connections_opened
+        metrics['pool_requests'] = pool_requests
+        metrics['connection_reuse_ratio'] = (
+            1 - connections_opened / pool_requests if pool_requests else 0.0
+        )
+        metrics['dns_cache_hits'] = self.dns_cache.hits
+        metrics['dns_cache_misses'] = self.dns_cache.misses
+        return metrics
+
+    def close(self):
+        """Session-u və DNS keşini bağlayır"""
+        if self._closed:
+            return
+        self._closed = True
+        metrics = self.get_metrics()
+        logger.info(
+            f"🌐 HTTP_CLIENT: Closing session - {metrics['requests']} requests, "
+            f"reuse ratio {metrics['connection_reuse_ratio']:.0%}"
+        )
+        self.session.close()
+        self.dns_cache.uninstall()
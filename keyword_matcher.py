@@ -0,0 +1,146 @@
+import re
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Açar sözdən sonra icazə verilən şəkilçilər ('surge' -> 'surges', 'artım' -> 'artımı').
+# Sözün ortasındakı uyğunluqlar ('up' -> 'update') söz sərhədi ilə kənarlaşdırılır.
+DEFAULT_SUFFIXES = (
+    's', 'es', 'ed', 'd', 'ing', 'ish',
+    'ı', 'i', 'u', 'ü', 'lar', 'lər', 'da', 'də', 'dan', 'dən'
+)
+
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+
+class KeywordMatcher:
+    """Bir neçə açar söz qrupu üçün əvvəlcədən qurulmuş matcher
+
+    Bütün açar sözlər şəkilçili formaları ilə birlikdə tək lüğətə yığılır.
+    Mətn bir dəfə sözlərə bölünür və hər söz lüğətdə O(1) yoxlanılır -
+    substring axtarışından fərqli olaraq 'up' 'update'-ə uyğun gəlmir.
+    Nəticə qrup üzrə tapılan fərqli açar sözlərin sayıdır.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]], suffixes: Optional[Iterable[str]] = DEFAULT_SUFFIXES):
+        self.groups = list(groups)
+        self._forms: Dict[str, Tuple[str, str]] = {}  # forma -> (qrup, əsas açar söz)
+        keywords_by_group = {
+            group: [keyword.lower() for keyword in keywords] for group, keywords in groups.items()
+        }
+        for group, keywords in keywords_by_group.items():
+            for keyword in keywords:
+                if not _WORD_PATTERN.fullmatch(keyword):
+                    raise ValueError(f"Açar söz tək söz olmalıdır: {keyword!r}")
+                # Eyni söz iki qrupda olarsa birinci qrup qalır
+                self._forms.setdefault(keyword, (group, keyword))
+        # Şəkilçili formalar heç vaxt başqa dəqiq açar sözün yerini tutmur
+        for group, keywords in keywords_by_group.items():
+            for keyword in keywords:
+                for suffix in suffixes or ():
+                    self._forms.setdefault(keyword + suffix, (group, keyword))
+        self._form_keys = frozenset(self._forms)
+
+    def matches(self, text: str) -> Dict[str, Set[str]]:
+        """Qrup üzrə tapılan fərqli açar sözlər"""
+        found: Dict[str, Set[str]] = {group: set() for group in self.groups}
+        forms = self._forms
+        for word in _WORD_PATTERN.findall(text.lower()):
+            hit = forms.get(word)
+            if hit:
+                found[hit[0]].add(hit[1])
+        return found
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Qrup üzrə fərqli açar söz sayı (tək keçid)"""
+        forms = self._forms
+        # Set kəsişməsi C səviyyəsində işləyir - yalnız tapılan formalar Python-da emal olunur
+        hits = {forms[word] for word in self._form_keys.intersection(_WORD_PATTERN.findall(text.lower()))}
+        counts = dict.fromkeys(self.groups, 0)
+        for group, _ in hits:
+            counts[group] += 1
+        return counts
+
+
+if __name__ == '__main__':
+    # Micro-benchmark: köhnə substring döngüsü ilə kompilyasiya olunmuş matcher
+    import random
+    import time
+
+    bullish = ['rise', 'surge', 'pump', 'bull', 'green', 'gain', 'profit', 'moon', 'rocket',
+               'adoption', 'partnership', 'investment', 'yüksəliş', 'artım', 'qazanc', 'tərəqqi', 'inkişaf']
+    bearish = ['fall', 'drop', 'crash', 'bear', 'red', 'loss', 'dump', 'decline', 'down', 'fear',
+               'sell', 'panic', 'düşüş', 'azalma', 'itki', 'tənəzzül', 'böhran']
+    neutral = ['stable', 'sideways', 'consolidation', 'analysis', 'report', 'update', 'news',
+               'announcement', 'study', 'sabit', 'hesabat', 'yenilənmə', 'elan']
+
+    vocabulary = bullish + bearish + neutral + [
+        'Bitcoin', 'Ethereum', 'ETF', 'SEC', 'Solana', 'whale', 'market', 'price', 'traders',
+        'after', 'amid', 'as', 'to', 'new', 'record', 'weekly', 'update', 'credit', 'bearer', 'upgrade'
+    ]
+    random.seed(42)
+    headlines = [' '.join(random.choice(vocabulary) for _ in range(random.randint(6, 14))) for _ in range(5000)]
+    rounds = 5
+
+    def naive(text):
+        lower = text.lower()
+        return (
+            sum(1 for word in bullish if word in lower),
+            sum(1 for word in bearish if word in lower),
+            sum(1 for word in neutral if word in lower)
+        )
+
+    def bench(label, texts):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                naive(text)
+        naive_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                matcher.count(text)
+        compiled_seconds = time.perf_counter() - start
+
+        total = len(texts) * rounds
+        print(f"{label}: {total} ({len(texts)} x {rounds})")
+        print(f"  substring loops : {total / naive_seconds:>10,.0f} items/s")
+        print(f"  compiled matcher: {total / compiled_seconds:>10,.0f} items/s ({naive_seconds / compiled_seconds:.1f}x)")
+
+    start = time.perf_counter()
+    matcher = KeywordMatcher({'bullish': bullish, 'bearish': bearish, 'neutral': neutral})
+    print(f"Matcher build: {(time.perf_counter() - start) * 1000:.2f} ms, {len(matcher._forms)} forms")
+
+    bench("Headlines", headlines)
+    # _fallback_analysis başlıq və məzmuna ayrı-ayrı baxırdı: hər söz üçün iki substring axtarışı
+    articles = [
+        (headline, ' '.join(random.choice(vocabulary) for _ in range(150))[:1000])
+        for headline in headlines[:2000]
+    ]
+
+    def naive_article(article):
+        title_lower, content_lower = article[0].lower(), article[1].lower()
+        return tuple(
+            sum(1 for word in words if word in title_lower or word in content_lower)
+            for words in (bullish, bearish, neutral)
+        )
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for article in articles:
+            naive_article(article)
+    naive_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for title, content in articles:
+            matcher.count(f"{title} {content}")
+    compiled_seconds = time.perf_counter() - start
+    total = len(articles) * rounds
+    print(f"Title + 1000-char content: {total} ({len(articles)} x {rounds})")
+    print(f"  substring loops : {total / naive_seconds:>10,.0f} items/s")
+    print(f"  compiled matcher: {total / compiled_seconds:>10,.0f} items/s ({naive_seconds / compiled_seconds:.1f}x)")
+
+    sample = "Bitcoin update: credit markets upgrade as bearer bonds surge"
+    print(f"\n'{sample}'")
+    print(f"substring: bullish/bearish/neutral = {naive(sample)}")
+    print(f"compiled : {matcher.count(sample)}")
@@ -127,7 +127,7 @@ def main():
         
         # Import and check config
         try:
-            from config import TELEGRAM_BOT_TOKEN, GEMINI_API_KEY, BOT_SETTINGS
+            from config import TELEGRAM_BOT_TOKEN, GEMINI_API_KEY, BOT_SETTINGS, SCHEDULER_SETTINGS
             
             if not TELEGRAM_BOT_TOKEN:
                 logger.error("💥 CONFIG: TELEGRAM_BOT_TOKEN not found in environment")
@@ -140,7 +140,10 @@ def main():
             else:
                 logger.warning("⚠️  CONFIG: Gemini API Key not found - AI features disabled")
             
-            logger.info(f"⚙️  CONFIG: Check interval: {BOT_SETTINGS['check_interval']}s")
+            logger.info(
+                f"⚙️  CONFIG: Poll interval: adaptive {SCHEDULER_SETTINGS['min_interval']}-"
+                f"{SCHEDULER_SETTINGS['max_interval']}s (tick {SCHEDULER_SETTINGS['tick_interval']}s)"
+            )
             logger.info(f"⚙️  CONFIG: Max news per check: {BOT_SETTINGS['max_news_per_check']}")
             logger.info(f"⚙️  CONFIG: AI analysis: {'enabled' if BOT_SETTINGS['ai_analysis'] else 'disabled'}")
             
@@ -1,19 +1,26 @@
-import requests
 import feedparser
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import logging
-import json
-import os
+import hashlib
 import time
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Optional
-from config import NEWS_SOURCES
+from config import FETCH_SETTINGS
+from http_client import HttpClient
+from sources import NewsSource, SourceRegistry
+from poll_scheduler import PollScheduler
+from storage import BaseStorage, create_storage
 
 # Enhanced logging setup
 logger = logging.getLogger(__name__)
 performance_logger = logging.getLogger('performance')
 
+# seen_news.json-dakı hash formatının versiyası (2 = blake2b 64-bit)
+HASH_VERSION = 2
+
 class NewsItem:
     def __init__(self, title: str, content: str, url: str, source: str, 
                  published_date: datetime, summary: str = ""):
@@ -24,14 +31,21 @@ class NewsItem:
         self.published_date = published_date
         self.summary = summary
         
-        # Daha güvənli hash mexanizmi
+        self.hash = self.compute_hash(title, url, source)
+
+    @staticmethod
+    def compute_hash(title: str, url: str, source: str) -> int:
+        """Prosesdən asılı olmayan sabit 64-bit açar (blake2b digest)"""
         # URL və başlığı normalize et
         normalized_url = url.split('?')[0].strip().lower()  # Query parametrləri sil
         normalized_title = ''.join(title.strip().lower().split())  # Boşluqları sil
         
-        # Hash yaratmaq üçün normalize edilmiş məlumatları istifadə et
+        # Python-un hash() funksiyası hər prosesdə fərqli salt istifadə edir,
+        # ona görə restart-dan sonra da eyni qalan digest istifadə olunur
         hash_string = f"{normalized_title}{normalized_url}{source.lower()}"
-        self.hash = abs(hash(hash_string))
+        digest = hashlib.blake2b(hash_string.encode('utf-8'), digest_size=8).digest()
+        # Signed 64-bit - SQLite INTEGER sütununa da sığır
+        return int.from_bytes(digest, 'big', signed=True)
 
     def __eq__(self, other):
         return isinstance(other, NewsItem) and self.hash == other.hash
@@ -50,117 +64,122 @@ class NewsItem:
         }
 
 class NewsFetcher:
-    def __init__(self):
-        self.seen_news_file = 'seen_news.json'
+    def __init__(self, storage: Optional[BaseStorage] = None, http_client: Optional[HttpClient] = None):
+        self.storage = storage or create_storage()
         self.seen_news = set()
+        self._seen_lock = threading.Lock()
+        
+        # Paralel fetch mühərriki - qlobal və host limitləri paylaşılan HTTP client-dədir
+        self.http = http_client or HttpClient()
+        self.sources = SourceRegistry()
+        self._source_executor = ThreadPoolExecutor(
+            max_workers=max(1, min(len(self.sources), FETCH_SETTINGS['max_concurrent_feeds'])),
+            thread_name_prefix='feed'
+        )
+        self.scheduler = PollScheduler()
+        self._article_executor = ThreadPoolExecutor(
+            max_workers=FETCH_SETTINGS['max_concurrent_requests'], thread_name_prefix='article'
+        )
+        
+        # Şərti GET üçün feed vəziyyəti (ETag / Last-Modified) və sayğaclar
+        self.feed_states: Dict[str, Dict] = {}
+        self.feed_stats: Dict[str, Dict] = {}
+        try:
+            self.feed_states = self.storage.load_feed_states()
+        except Exception as e:
+            logger.error(f"Feed vəziyyəti yükləmə xətası: {e}")
+        
         self._load_seen_news()
 
     def _load_seen_news(self):
-        """Əvvəlcədən görülən xəbərləri fayldan yükləyir"""
+        """Əvvəlcədən görülən xəbərləri storage-dan yükləyir"""
         try:
-            if os.path.exists(self.seen_news_file):
-                with open(self.seen_news_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                # Daha sərt tarix filteri - yalnız son 6 saat ərzindəki xəbərlər
-                current_time = datetime.now()
-                cutoff_time = current_time - timedelta(hours=6)  # 24-dən 6 saata endirildi
-                
-                valid_items = []
-                for item in data:
-                    try:
-                        # Tarix yoxlaması daha dəqiq
-                        saved_at_str = item.get('saved_at')
-                        if not saved_at_str:
-                            # Köhnə formatda tarix yoxdursa, published_date istifadə et
-                            saved_at_str = item.get('published_date')
-                        
-                        if saved_at_str:
-                            saved_at = datetime.fromisoformat(saved_at_str)
-                            # Yalnız son 6 saat ərzindəki xəbərləri saxla
-                            if saved_at > cutoff_time:
-                                self.seen_news.add(item['hash'])
-                                valid_items.append(item)
-                        else:
-                            # Tarix məlumatı olmayan köhnə xəbərləri atla
-                            logger.debug(f"Tarix məlumatı olmayan xəbər atlanıldı: {item.get('title', 'N/A')[:50]}")
-                            
-                    except Exception as e:
-                        logger.warning(f"Xəbər item yüklənmə xətası: {e}")
-                        continue
-                
-                # Fayl yenilənmiş məlumatlarla saxla (köhnələri sil)
-                if len(valid_items) < len(data):
-                    try:
-                        with open(self.seen_news_file, 'w', encoding='utf-8') as f:
-                            json.dump(valid_items, f, ensure_ascii=False, indent=2)
-                        logger.info(f"Köhnə {len(data) - len(valid_items)} xəbər fayldan silindi")
-                    except Exception as e:
-                        logger.error(f"Fayl yenilənmə xətası: {e}")
-                
-                logger.info(f"{len(self.seen_news)} yeni xəbər hash-i yükləndi (son 6 saat)")
-            else:
-                logger.info("seen_news.json faylı tapılmadı, yeni yaradılacaq")
+            data = self.storage.load_seen_news()
+            if not data:
+                logger.info("Görülən xəbər qeydi tapılmadı, yeni qeydlər əlavə olunacaq")
                 self.seen_news = set()
+                return
                 
-        except Exception as e:
-            logger.error(f"Görülən xəbərlər yüklənmə xətası: {e}")
-            # Problem olduqda, təmiz başla
-            self.seen_news = set()
-            if os.path.exists(self.seen_news_file):
-                try:
-                    # Korrupted faylı backup kimi saxla
-                    backup_file = f"{self.seen_news_file}.backup"
-                    os.rename(self.seen_news_file, backup_file)
-                    logger.info(f"Korrupted fayl {backup_file} olaraq backup edildi")
-                except Exception:
-                    pass
-
-    def _save_seen_news(self, news_item: NewsItem = None):
-        """Görülən xəbərləri fayla saxlayır"""
-        try:
-            # Mövcud məlumatları yükləyir
-            existing_data = []
-            if os.path.exists(self.seen_news_file):
-                try:
-                    with open(self.seen_news_file, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                except:
-                    existing_data = []
-            
-            # Yeni xəbər əlavə edir
-            if news_item:
-                new_entry = {
-                    'hash': news_item.hash,
-                    'title': news_item.title[:100],  # İlk 100 simvol
-                    'source': news_item.source,
-                    'url': news_item.url,
-                    'published_date': news_item.published_date.isoformat(),
-                    'saved_at': datetime.now().isoformat()
-                }
-                
-                # Dublikatları yoxlayır
-                if not any(item['hash'] == news_item.hash for item in existing_data):
-                    existing_data.append(new_entry)
-            
-            # Son 24 saat ərzindəki xəbərləri filtr edir
+            # Daha sərt tarix filteri - yalnız son 6 saat ərzindəki xəbərlər
             current_time = datetime.now()
-            cutoff_time = current_time - timedelta(hours=24)
+            cutoff_time = current_time - timedelta(hours=6)  # 24-dən 6 saata endirildi
+            # Storage-ın özü son 24 saatı saxlayır
+            retention_cutoff = current_time - timedelta(hours=24)
             
-            filtered_data = []
-            for item in existing_data:
+            valid_items = []
+            migrated_count = 0
+            for item in data:
                 try:
-                    saved_at = datetime.fromisoformat(item['saved_at'])
-                    if saved_at > cutoff_time:
-                        filtered_data.append(item)
-                except:
+                    # Köhnə (proses-salted) hash-ləri bir dəfəlik yeni formata keçir
+                    if item.get('hash_version') != HASH_VERSION:
+                        if not self._migrate_seen_item(item):
+                            continue
+                        migrated_count += 1
+                    
+                    # Tarix yoxlaması daha dəqiq
+                    saved_at_str = item.get('saved_at')
+                    if not saved_at_str:
+                        # Köhnə formatda tarix yoxdursa, published_date istifadə et
+                        saved_at_str = item.get('published_date')
+                        item['saved_at'] = saved_at_str
+                    
+                    if saved_at_str:
+                        saved_at = datetime.fromisoformat(saved_at_str)
+                        if saved_at > retention_cutoff:
+                            valid_items.append(item)
+                        # Yalnız son 6 saat ərzindəki xəbərləri yaddaşa al
+                        if saved_at > cutoff_time:
+                            self.seen_news.add(item['hash'])
+                    else:
+                        # Tarix məlumatı olmayan köhnə xəbərləri atla
+                        logger.debug(f"Tarix məlumatı olmayan xəbər atlanıldı: {item.get('title', 'N/A')[:50]}")
+                        
+                except Exception as e:
+                    logger.warning(f"Xəbər item yüklənmə xətası: {e}")
                     continue
             
-            # Faylı yazar
-            with open(self.seen_news_file, 'w', encoding='utf-8') as f:
-                json.dump(filtered_data, f, ensure_ascii=False, indent=2)
+            # Storage-ı yenilənmiş məlumatlarla yenidən yaz (köhnələri sil, miqrasiyanı yaz)
+            if len(valid_items) < len(data) or migrated_count:
+                try:
+                    self.storage.rewrite_seen_news(valid_items)
+                    logger.info(f"Köhnə {len(data) - len(valid_items)} xəbər storage-dan silindi")
+                    if migrated_count:
+                        logger.info(f"🔑 SEEN_NEWS: {migrated_count} hash yeni formata keçirildi")
+                except Exception as e:
+                    logger.error(f"Storage yenilənmə xətası: {e}")
             
-            logger.info(f"{len(filtered_data)} xəbər hash-i saxlanıldı")
+            logger.info(f"{len(self.seen_news)} yeni xəbər hash-i yükləndi (son 6 saat)")
+                
+        except Exception as e:
+            logger.error(f"Görülən xəbərlər yüklənmə xətası: {e}")
+            # Problem olduqda, təmiz başla
+            self.seen_news = set()
+
+    def _migrate_seen_item(self, item: Dict) -> bool:
+        """Köhnə formatlı qeydin hash-ini yenidən hesablayır"""
+        title = item.get('title')
+        url = item.get('url')
+        source = item.get('source')
+        # Köhnə fayllarda başlıq 100 simvola kəsilirdi - belə qeydləri dəqiq bərpa etmək olmur
+        if not title or not url or not source or len(title) >= 100:
+            logger.debug(f"Miqrasiya edilə bilməyən xəbər atlanıldı: {str(title)[:50]}")
+            return False
+        item['hash'] = NewsItem.compute_hash(title, url, source)
+        item['hash_version'] = HASH_VERSION
+        return True
+
+    def _save_seen_news(self, news_item: NewsItem):
+        """Görülən xəbəri storage-a əlavə edir (JSON jurnalı dövrün sonunda flush olunur)"""
+        try:
+            self.storage.add_seen_news({
+                'hash': news_item.hash,
+                'hash_version': HASH_VERSION,
+                'title': news_item.title,  # Tam başlıq - hash yenidən hesablana bilsin
+                'source': news_item.source,
+                'url': news_item.url,
+                'published_date': news_item.published_date.isoformat(),
+                'saved_at': datetime.now().isoformat()
+            })
         except Exception as e:
             logger.error(f"Görülən xəbərlər saxlama xətası: {e}")
 
@@ -173,77 +192,161 @@ class NewsFetcher:
         self.seen_news.add(news_item.hash)
         self._save_seen_news(news_item)
 
-    def fetch_coindesk_news(self) -> List[NewsItem]:
-        try:
-            news_items = []
-            source_config = NEWS_SOURCES['coindesk']
-            feed = feedparser.parse(source_config['rss_url'])
-            for entry in feed.entries[:10]:
-                try:
-                    title = entry.title
-                    url = entry.link
-                    summary = entry.summary if hasattr(entry, 'summary') else ""
-                    published = datetime(*entry.published_parsed[:6])
-                    if published > datetime.now() - timedelta(days=1):
-                        content = self._fetch_article_content(url)
-                        news_item = NewsItem(
-                            title=title,
-                            content=content,
-                            url=url,
-                            source=source_config['name'],
-                            published_date=published,
-                            summary=summary
-                        )
-                        if not self._is_news_seen(news_item):
-                            news_items.append(news_item)
-                            self._mark_news_as_seen(news_item)
-                except Exception as e:
-                    logger.error(f"CoinDesk xəbər emal xətası: {e}")
+    def fetch_source(self, source: NewsSource) -> List[NewsItem]:
+        """Registry-dəki istənilən mənbə üçün ümumi RSS fetch (yalnız yeni xəbərlər)"""
+        return self.claim_new(self.poll_source(source))
+
+    def claim_new(self, news_items: List[NewsItem]) -> List[NewsItem]:
+        """Görülməmiş xəbərləri seçir və görülmüş kimi işarələyir"""
+        new_items = []
+        with self._seen_lock:
+            for news_item in news_items:
+                if not self._is_news_seen(news_item):
+                    new_items.append(news_item)
+                    self._mark_news_as_seen(news_item)
+        return new_items
+
+    def poll_source(self, source: NewsSource) -> List[NewsItem]:
+        """Feed-in təzə entry-ləri (görülüb-görülmədiyi yoxlanmır)"""
+        news_items = []
+        feed = self._parse_feed(source.rss_url, source.name)
+        if feed is None:
+            # Feed dəyişməyib (304 və ya eyni məzmun) - parse lazım deyil
             return news_items
-        except Exception as e:
-            logger.error(f"CoinDesk RSS xətası: {e}")
-            return []
+        fresh_entries = self._collect_fresh_entries(feed, source.name, source.max_entries)
+        # Yalnız feed metadata-sı - məqalə məzmunu enrich_news() ilə sonradan çəkilir
+        for entry in fresh_entries:
+            try:
+                news_items.append(NewsItem(
+                    title=entry['title'],
+                    content="",
+                    url=entry['url'],
+                    source=source.name,
+                    published_date=entry['published'],
+                    summary=entry['summary']
+                ))
+            except Exception as e:
+                logger.error(f"{source.name} xəbər emal xətası: {e}")
+        return news_items
 
-    def fetch_theblock_news(self) -> List[NewsItem]:
-        try:
-            news_items = []
-            source_config = NEWS_SOURCES['theblock']
-            feed = feedparser.parse(source_config['rss_url'])
-            for entry in feed.entries[:10]:
-                try:
-                    title = entry.title
-                    url = entry.link
-                    summary = entry.summary if hasattr(entry, 'summary') else ""
-                    published = datetime(*entry.published_parsed[:6])
-                    if published > datetime.now() - timedelta(days=1):
-                        content = self._fetch_article_content(url)
-                        news_item = NewsItem(
-                            title=title,
-                            content=content,
-                            url=url,
-                            source=source_config['name'],
-                            published_date=published,
-                            summary=summary
-                        )
-                        if not self._is_news_seen(news_item):
-                            news_items.append(news_item)
-                            self._mark_news_as_seen(news_item)
-                except Exception as e:
-                    logger.error(f"The Block xəbər emal xətası: {e}")
+    def _parse_feed(self, rss_url: str, source_label: str):
+        """RSS feed-i şərti GET ilə endirir, dəyişməyibsə None qaytarır"""
+        stats = self.feed_stats.setdefault(source_label, {'polls': 0, 'not_modified': 0, 'unchanged_body': 0, 'parsed': 0})
+        stats['polls'] += 1
+        state = self.feed_states.get(rss_url, {})
+        
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        
+        response = self.http.get(rss_url, headers=headers)
+        
+        if response.status_code == 304:
+            stats['not_modified'] += 1
+            logger.info(f"♻️ NEWS_FETCH: {source_label} feed dəyişməyib (304)")
+            return None
+        response.raise_for_status()
+        
+        # ETag dəstəkləməyən serverlər üçün məzmun hash-i ilə yoxlama
+        content_hash = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        new_state = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash
+        }
+        if new_state != state:
+            self.feed_states[rss_url] = new_state
+            try:
+                self.storage.save_feed_state(rss_url, new_state)
+            except Exception as e:
+                logger.error(f"Feed vəziyyəti saxlama xətası: {e}")
+        
+        if content_hash == state.get('content_hash'):
+            stats['unchanged_body'] += 1
+            logger.info(f"♻️ NEWS_FETCH: {source_label} feed məzmunu eynidir, parse edilmədi")
+            return None
+        
+        stats['parsed'] += 1
+        return feedparser.parse(
+            response.content,
+            response_headers={
+                'content-location': response.url,
+                'content-type': response.headers.get('content-type', '')
+            }
+        )
+
+    def get_feed_stats(self) -> Dict[str, Dict]:
+        """Mənbə üzrə feed sorğu sayğaclarını qaytarır"""
+        return {source: dict(stats) for source, stats in self.feed_stats.items()}
+
+    def get_scheduler_stats(self) -> Dict[str, Dict]:
+        """Mənbə üzrə adaptiv sorğu intervalları və yayım sürəti"""
+        return self.scheduler.get_stats()
+
+    def _collect_fresh_entries(self, feed, source_label: str, max_entries: int) -> List[Dict]:
+        """Feed-dən son 1 günün entry-lərini seçir"""
+        fresh_entries = []
+        cutoff = datetime.now() - timedelta(days=1)
+        for entry in feed.entries[:max_entries]:
+            try:
+                published = datetime(*entry.published_parsed[:6])
+                if published > cutoff:
+                    fresh_entries.append({
+                        'title': entry.title,
+                        'url': entry.link,
+                        'summary': entry.summary if hasattr(entry, 'summary') else "",
+                        'published': published
+                    })
+            except Exception as e:
+                logger.error(f"{source_label} xəbər emal xətası: {e}")
+        return fresh_entries
+
+    def enrich_news(self, news_items: List[NewsItem]) -> List[NewsItem]:
+        """Seçilmiş xəbərlər üçün məqalə məzmununu paralel çəkir (2-ci faza)"""
+        pending = [news for news in news_items if not news.content]
+        if not pending:
             return news_items
-        except Exception as e:
-            logger.error(f"The Block RSS xətası: {e}")
+        start_time = time.time()
+        selectors = []
+        for news in pending:
+            source = self.sources.by_name(news.source)
+            selectors.append(source.content_selector if source else None)
+        contents = self._fetch_article_contents([news.url for news in pending], selectors)
+        for news, content in zip(pending, contents):
+            # Səhifə çəkilməsə feed-in öz xülasəsi istifadə olunur
+            news.content = content or self._summary_text(news.summary)
+        performance_logger.info(f"NEWS_ENRICH {len(pending)} articles completed in {time.time() - start_time:.2f}s")
+        return news_items
+
+    def _summary_text(self, summary: str) -> str:
+        """Feed xülasəsindən HTML teqlərini təmizləyir"""
+        if not summary:
+            return ""
+        return BeautifulSoup(summary, 'html.parser').get_text(' ', strip=True)[:1000]
+
+    def _fetch_article_contents(self, urls: List[str], selectors: Optional[List[Optional[str]]] = None) -> List[str]:
+        """Məqalə məzmunlarını paralel çəkir (sıra qorunur)"""
+        if not urls:
             return []
+        selectors = selectors or [None] * len(urls)
+        return list(self._article_executor.map(self._fetch_article_content, urls, selectors))
 
-    def _fetch_article_content(self, url: str) -> str:
+    def _fetch_article_content(self, url: str, content_selector: Optional[str] = None) -> str:
         try:
-            response = requests.get(url, timeout=10)
+            response = self.http.get(url)
             if response.status_code == 200:
                 html = response.text
                 soup = BeautifulSoup(html, 'html.parser')
-                paragraphs = soup.find_all(['p', 'div'], class_=lambda x: x and any(
-                    keyword in x.lower() for keyword in ['content', 'article', 'body', 'text']
-                ))
+                paragraphs = []
+                if content_selector:
+                    # Mənbəyə xas selektor - tapılmasa ümumi heuristikaya keçilir
+                    paragraphs = soup.select(content_selector)
+                if not paragraphs:
+                    paragraphs = soup.find_all(['p', 'div'], class_=lambda x: x and any(
+                        keyword in x.lower() for keyword in ['content', 'article', 'body', 'text']
+                    ))
                 if not paragraphs:
                     paragraphs = soup.find_all('p')
                 content = ' '.join([p.get_text().strip() for p in paragraphs[:5]])
@@ -252,103 +355,73 @@ class NewsFetcher:
             logger.error(f"Məqalə məzmunu çəkmə xətası: {e}")
         return ""
 
-    def fetch_cryptonews_news(self) -> List[NewsItem]:
-        try:
-            news_items = []
-            source_config = NEWS_SOURCES['cryptonews']
-            feed = feedparser.parse(source_config['rss_url'])
-            for entry in feed.entries[:10]:
-                try:
-                    title = entry.title
-                    url = entry.link
-                    summary = entry.summary if hasattr(entry, 'summary') else ""
-                    published = datetime(*entry.published_parsed[:6])
-                    if published > datetime.now() - timedelta(days=1):
-                        content = self._fetch_article_content(url)
-                        news_item = NewsItem(
-                            title=title,
-                            content=content,
-                            url=url,
-                            source=source_config['name'],
-                            published_date=published,
-                            summary=summary
-                        )
-                        if not self._is_news_seen(news_item):
-                            news_items.append(news_item)
-                            self._mark_news_as_seen(news_item)
-                except Exception as e:
-                    logger.error(f"Crypto News xəbər emal xətası: {e}")
-            return news_items
-        except Exception as e:
-            logger.error(f"Crypto News RSS xətası: {e}")
-            return []
+    def poll(self, source: NewsSource) -> Optional[List[NewsItem]]:
+        """Mənbəni çəkir, təkrarları süzmür - pipeline-da ayrıca dedup mərhələsi var
+
+        None - sorğu uğursuz oldu (mənbə artıq təxirə salınıb).
+        """
+        return self._run_source_fetch(source, claim=False)
 
-    def fetch_newsbtc_news(self) -> List[NewsItem]:
+    def _run_source_fetch(self, source: NewsSource, claim: bool = True) -> Optional[List[NewsItem]]:
+        """Bir mənbəni çəkir və müddətini loglayır
+
+        claim=False olduqda xəbərlər görülmüş kimi işarələnmir və adaptiv
+        interval yenilənmir - bunu çağıran claim_new()-dən sonra edir;
+        uğursuz sorğu üçün [] əvəzinə None qaytarılır.
+        """
+        source_name = source.name
+        source_start = time.time()
         try:
-            news_items = []
-            source_config = NEWS_SOURCES['newsbtc']
-            feed = feedparser.parse(source_config['rss_url'])
-            for entry in feed.entries[:10]:
-                try:
-                    title = entry.title
-                    url = entry.link
-                    summary = entry.summary if hasattr(entry, 'summary') else ""
-                    published = datetime(*entry.published_parsed[:6])
-                    if published > datetime.now() - timedelta(days=1):
-                        content = self._fetch_article_content(url)
-                        news_item = NewsItem(
-                            title=title,
-                            content=content,
-                            url=url,
-                            source=source_config['name'],
-                            published_date=published,
-                            summary=summary
-                        )
-                        if not self._is_news_seen(news_item):
-                            news_items.append(news_item)
-                            self._mark_news_as_seen(news_item)
-                except Exception as e:
-                    logger.error(f"NewsBTC xəbər emal xətası: {e}")
-            return news_items
+            logger.info(f"📰 NEWS_FETCH: Fetching from {source_name}")
+            result = self.fetch_source(source) if claim else self.poll_source(source)
+            
+            source_duration = time.time() - source_start
+            performance_logger.info(f"NEWS_FETCH_{source_name.replace(' ', '_')} completed in {source_duration:.2f}s")
+            
+            if isinstance(result, list):
+                if claim:
+                    logger.info(f"✅ NEWS_FETCH: {source_name} returned {len(result)} new articles")
+                    self.scheduler.record_poll(source, len(result))
+                else:
+                    logger.info(f"✅ NEWS_FETCH: {source_name} returned {len(result)} fresh entries")
+                return result
+            logger.warning(f"⚠️  NEWS_FETCH: {source_name} returned unexpected result type")
+            self.scheduler.record_failure(source)
+                
         except Exception as e:
-            logger.error(f"NewsBTC RSS xətası: {e}")
-            return []
+            source_duration = time.time() - source_start
+            self.scheduler.record_failure(source)
+            logger.error(f"💥 NEWS_FETCH: {source_name} failed after {source_duration:.2f}s: {e}")
+            logger.error(f"📍 NEWS_FETCH: {source_name} traceback: {traceback.format_exc()}")
+        return [] if claim else None
+
+    def _source_priority(self, source_name: str) -> int:
+        source = self.sources.by_name(source_name)
+        return source.priority if source else 0
 
     def fetch_all_news(self) -> List[NewsItem]:
         start_time = time.time()
         logger.info("🔍 NEWS_FETCH: Starting comprehensive news fetch from all sources")
         all_news = []
         
-        sources = [
-            ("CoinDesk", self.fetch_coindesk_news),
-            ("The Block", self.fetch_theblock_news),
-            ("Crypto News", self.fetch_cryptonews_news),
-            ("NewsBTC", self.fetch_newsbtc_news)
-        ]
-        
         try:
-            for source_name, fetch_func in sources:
-                source_start = time.time()
-                try:
-                    logger.info(f"📰 NEWS_FETCH: Fetching from {source_name}")
-                    result = fetch_func()
-                    
-                    source_duration = time.time() - source_start
-                    performance_logger.info(f"NEWS_FETCH_{source_name.replace(' ', '_')} completed in {source_duration:.2f}s")
-                    
-                    if isinstance(result, list):
-                        all_news.extend(result)
-                        logger.info(f"✅ NEWS_FETCH: {source_name} returned {len(result)} new articles")
-                    else:
-                        logger.warning(f"⚠️  NEWS_FETCH: {source_name} returned unexpected result type")
-                        
-                except Exception as e:
-                    source_duration = time.time() - source_start
-                    logger.error(f"💥 NEWS_FETCH: {source_name} failed after {source_duration:.2f}s: {e}")
-                    logger.error(f"📍 NEWS_FETCH: {source_name} traceback: {traceback.format_exc()}")
+            sources = self.scheduler.due_sources(self.sources.enabled())
+            logger.info(f"📡 NEWS_FETCH: {len(sources)}/{len(self.sources.enabled())} sources due for polling")
+            
+            # Bütün mənbələr paralel çəkilir - ümumi müddət ən yavaş mənbə qədərdir.
+            # Prioritetli mənbələr növbəyə əvvəl düşür.
+            futures = [
+                self._source_executor.submit(self._run_source_fetch, source)
+                for source in sources
+            ]
+            for future in as_completed(futures):
+                all_news.extend(future.result())
             
-            # Sort by publication date
-            all_news.sort(key=lambda x: x.published_date, reverse=True)
+            # Dövr ərzində görülən xəbərlər bir dəfəyə yazılır
+            self.storage.flush_seen_news()
+            
+            # Əvvəl mənbə prioriteti, sonra yayım tarixi
+            all_news.sort(key=lambda x: (self._source_priority(x.source), x.published_date), reverse=True)
             
             total_duration = time.time() - start_time
             performance_logger.info(f"NEWS_FETCH_ALL completed in {total_duration:.2f}s")
@@ -372,28 +445,18 @@ class NewsFetcher:
             return []
 
     def cleanup_seen_news(self, hours: int = 24):
-        """Köhnə xəbərləri təmizləyir"""
+        """Köhnə xəbərləri təmizləyir (jurnal kompaksiyası fonda işləyir)"""
         cutoff_time = datetime.now() - timedelta(hours=hours)
+
+        def on_compacted(expired_hashes):
+            # Memory-dəki setdən yalnız vaxtı keçmiş hash-ləri sil -
+            # kompaksiya zamanı əlavə olunan yeni hash-lər qalır
+            with self._seen_lock:
+                self.seen_news -= expired_hashes
+            logger.info(f"Temizlik: {len(expired_hashes)} köhnə xəbər silindi, yaddaşda {len(self.seen_news)} qaldı")
+
         try:
-            # Fayl məlumatlarını yenidən yükləyir və köhnələri silir
-            if os.path.exists(self.seen_news_file):
-                with open(self.seen_news_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Yalnız son saatlar ərzindəki xəbərləri saxlayır
-                filtered_data = []
-                for item in data:
-                    saved_at = datetime.fromisoformat(item['saved_at'])
-                    if saved_at > cutoff_time:
-                        filtered_data.append(item)
-                
-                # Yenilənmiş məlumatları saxlayır
-                with open(self.seen_news_file, 'w', encoding='utf-8') as f:
-                    json.dump(filtered_data, f, ensure_ascii=False, indent=2)
-                
-                # Memory-dəki seti də yeniləyir
-                self.seen_news = {item['hash'] for item in filtered_data}
-                logger.info(f"Temizlik: {len(filtered_data)} xəbər saxlandı, köhnələr silindi")
+            return self.storage.compact_seen_news_in_background(cutoff_time, on_done=on_compacted)
         except Exception as e:
             logger.error(f"Temizlik xətası: {e}")
     
@@ -401,18 +464,14 @@ class NewsFetcher:
         """Təcili vəziyyətdə bütün görülən xəbərləri təmizləyir"""
         try:
             # Memory cache-i təmizlə
-            self.seen_news.clear()
+            with self._seen_lock:
+                self.seen_news.clear()
             
-            # Faylı backup et və sil
-            if os.path.exists(self.seen_news_file):
-                backup_name = f"{self.seen_news_file}.emergency_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                os.rename(self.seen_news_file, backup_name)
+            # Storage-ı təmizlə (JSON jurnalı backup edilir)
+            backup_name = self.storage.reset_seen_news()
+            if backup_name:
                 logger.warning(f"🚨 EMERGENCY RESET: seen_news fayl backup edildi: {backup_name}")
             
-            # Yeni boş fayl yarat
-            with open(self.seen_news_file, 'w', encoding='utf-8') as f:
-                json.dump([], f)
-            
             logger.warning("🚨 EMERGENCY RESET: Bütün görülən xəbər məlumatları təmizləndi!")
             return True
             
@@ -428,19 +487,15 @@ class NewsFetcher:
                 'recent_news': []
             }
             
-            if os.path.exists(self.seen_news_file):
-                with open(self.seen_news_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    stats['file_entries'] = len(data)
-                    
-                    # Son 5 xəbəri göstər
-                    recent = sorted(data, key=lambda x: x.get('saved_at', ''), reverse=True)[:5]
-                    for item in recent:
-                        stats['recent_news'].append({
-                            'title': item.get('title', 'N/A')[:50] + '...',
-                            'source': item.get('source', 'N/A'),
-                            'saved_at': item.get('saved_at', 'N/A')
-                        })
+            stats['file_entries'] = self.storage.count_seen_news()
+            
+            # Son 5 xəbəri göstər
+            for item in self.storage.recent_seen_news(limit=5):
+                stats['recent_news'].append({
+                    'title': item.get('title', 'N/A')[:50] + '...',
+                    'source': item.get('source', 'N/A'),
+                    'saved_at': item.get('saved_at', 'N/A')
+                })
             
             return stats
         except Exception as e:
@@ -454,31 +509,23 @@ class NewsFetcher:
             current_time = datetime.now()
             cutoff_time = current_time - timedelta(hours=24)
             
-            # Fayldan son 24 saatın xəbərlərini yükləyir
-            if os.path.exists(self.seen_news_file):
-                with open(self.seen_news_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    
-                for item in data:
-                    try:
-                        # Tarix yoxlaması
-                        saved_at_str = item.get('saved_at') or item.get('published_date')
-                        if saved_at_str:
-                            saved_at = datetime.fromisoformat(saved_at_str)
-                            if saved_at > cutoff_time:
-                                # NewsItem yaradır (content məlumatı olmadığı üçün dummy content)
-                                news_item = NewsItem(
-                                    title=item['title'],
-                                    content=f"Xəbər mənbəsi: {item['source']}",  # Dummy content
-                                    url=item['url'],
-                                    source=item['source'],
-                                    published_date=saved_at,
-                                    summary=""
-                                )
-                                news_items.append(news_item)
-                    except Exception as e:
-                        logger.warning(f"24 saat xəbər parse xətası: {e}")
-                        continue
+            # Storage-dan son 24 saatın xəbərlərini yükləyir (SQLite-da indeksli range sorğusu)
+            for item in self.storage.seen_news_records(since=cutoff_time):
+                try:
+                    saved_at = datetime.fromisoformat(item['saved_at'])
+                    # NewsItem yaradır (content məlumatı olmadığı üçün dummy content)
+                    news_item = NewsItem(
+                        title=item['title'],
+                        content=f"Xəbər mənbəsi: {item['source']}",  # Dummy content
+                        url=item['url'],
+                        source=item['source'],
+                        published_date=saved_at,
+                        summary=""
+                    )
+                    news_items.append(news_item)
+                except Exception as e:
+                    logger.warning(f"24 saat xəbər parse xətası: {e}")
+                    continue
             
             # Tarihe göre sırala (en yeniler önce)
             news_items.sort(key=lambda x: x.published_date, reverse=True)
@@ -490,6 +537,16 @@ class NewsFetcher:
             logger.error(f"24 saat xəbər yükləmə xətası: {e}")
             return []
     
+    def get_http_metrics(self) -> Dict:
+        """Paylaşılan HTTP client-in bağlantı metriklərini qaytarır"""
+        return self.http.get_metrics()
+
+    def close(self):
+        """HTTP sessiyonu və worker pool-ları bağlayır"""
+        self._source_executor.shutdown(wait=False)
+        self._article_executor.shutdown(wait=False)
+        self.http.close()
+    
     async def close_session(self):
         """HTTP sessiyonu bağlayır (async uyumluluk üçün)"""
-        pass 
\ No newline at end of file
+        self.close() 
\ No newline at end of file
@@ -0,0 +1,168 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import OUTBOX_SETTINGS
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+# Çatdırılma vəziyyətləri
+PENDING = 'pending'
+SENT = 'sent'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class Outbox:
+    """Yayımlar üçün davamlı çatdırılma növbəsi (SQLite)
+
+    Hər mesaj göndərilməzdən əvvəl bütün alıcıları ilə 'pending' kimi
+    yazılır. Uğurlu göndərmələr partiyalarla 'sent' olur, yayım bitəndə
+    qalanlar 'failed'/'skipped' ilə bağlanır. Proses yayımın ortasında
+    dayansa, restart-dan sonra pending() yalnız çatdırılmamış alıcıları
+    qaytarır. Zəmanət ən azı bir dəfədir: son partiya (flush_every)
+    yazılmamışdısa həmin bir neçə mesaj təkrar gedə bilər.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS outbox_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            label TEXT NOT NULL,
+            text TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            completed_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_outbox_messages_completed_at ON outbox_messages(completed_at);
+        CREATE TABLE IF NOT EXISTS outbox_deliveries (
+            message_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            state TEXT NOT NULL,
+            reason TEXT,
+            PRIMARY KEY (message_id, chat_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_outbox_deliveries_pending
+            ON outbox_deliveries(message_id) WHERE state = 'pending';
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or OUTBOX_SETTINGS
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.settings['path'], check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+
+        self._sent_buffer: List[Tuple[int, int]] = []
+        self._last_flush = time.monotonic()
+        self.prune()
+
+    def enqueue(self, label: str, text: str, chat_ids: Iterable[int]) -> int:
+        """Mesajı alıcıları ilə birlikdə bir tranzaksiyada yazır, id qaytarır"""
+        with self._lock, self._conn:
+            message_id = self._conn.execute(
+                "INSERT INTO outbox_messages (label, text, created_at) VALUES (?, ?, ?)",
+                (label, text, time.time())
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox_deliveries (message_id, chat_id, state) VALUES (?, ?, ?)",
+                [(message_id, chat_id, PENDING) for chat_id in chat_ids]
+            )
+        return message_id
+
+    def mark_sent(self, message_id: int, chat_id: int):
+        """Uğurlu göndərmə - yaddaşda yığılır, partiya ilə yazılır"""
+        with self._lock:
+            self._sent_buffer.append((message_id, chat_id))
+            if (len(self._sent_buffer) >= self.settings['flush_every']
+                    or time.monotonic() - self._last_flush >= self.settings['flush_interval']):
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._sent_buffer:
+            with self._conn:
+                self._conn.executemany(
+                    f"UPDATE outbox_deliveries SET state = '{SENT}' WHERE message_id = ? AND chat_id = ?",
+                    self._sent_buffer
+                )
+            self._sent_buffer = []
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def complete(self, message_id: int, failures: Iterable[Tuple[int, str]] = ()):
+        """Yayımı bağlayır: uğursuzlar 'failed', toxunulmamış qalanlar 'skipped'"""
+        with self._lock:
+            self._flush_locked()
+            with self._conn:
+                self._conn.executemany(
+                    f"UPDATE outbox_deliveries SET state = '{FAILED}', reason = ? WHERE message_id = ? AND chat_id = ?",
+                    [(reason, message_id, chat_id) for chat_id, reason in failures]
+                )
+                self._conn.execute(
+                    f"UPDATE outbox_deliveries SET state = '{SKIPPED}' WHERE message_id = ? AND state = '{PENDING}'",
+                    (message_id,)
+                )
+                self._conn.execute(
+                    "UPDATE outbox_messages SET completed_at = ? WHERE id = ?", (time.time(), message_id)
+                )
+
+    def pending(self) -> List[Tuple[int, str, str, List[int]]]:
+        """Yarımçıq qalmış mesajlar: (id, label, mətn, çatdırılmamış alıcılar)
+
+        max_age-dən köhnə mesajlar artıq aktual deyil - göndərilmədən bağlanır.
+        """
+        cutoff = time.time() - self.settings['max_age']
+        with self._lock:
+            messages = self._conn.execute(
+                "SELECT id, label, text, created_at FROM outbox_messages WHERE completed_at IS NULL ORDER BY id"
+            ).fetchall()
+        result = []
+        for message_id, label, text, created_at in messages:
+            if created_at < cutoff:
+                logger.info(f"📮 OUTBOX: Message {message_id} ({label}) expired, not resumed")
+                self.complete(message_id)
+                continue
+            with self._lock:
+                chat_ids = [row[0] for row in self._conn.execute(
+                    f"SELECT chat_id FROM outbox_deliveries WHERE message_id = ? AND state = '{PENDING}'",
+                    (message_id,)
+                )]
+            result.append((message_id, label, text, chat_ids))
+        return result
+
+    def prune(self):
+        """Saxlanma müddəti keçmiş tamamlanmış mesajları silir"""
+        cutoff = time.time() - self.settings['retention']
+        with self._lock, self._conn:
+            self._conn.execute(
+                """DELETE FROM outbox_deliveries WHERE message_id IN (
+                       SELECT id FROM outbox_messages WHERE completed_at IS NOT NULL AND completed_at < ?
+                   )""",
+                (cutoff,)
+            )
+            removed = self._conn.execute(
+                "DELETE FROM outbox_messages WHERE completed_at IS NOT NULL AND completed_at < ?", (cutoff,)
+            ).rowcount
+        if removed:
+            logger.info(f"🧹 OUTBOX: Pruned {removed} completed messages")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            open_messages = self._conn.execute(
+                "SELECT COUNT(*) FROM outbox_messages WHERE completed_at IS NULL"
+            ).fetchone()[0]
+            pending = self._conn.execute(
+                f"SELECT COUNT(*) FROM outbox_deliveries WHERE state = '{PENDING}'"
+            ).fetchone()[0]
+        return {'open_messages': open_messages, 'pending_deliveries': pending}
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
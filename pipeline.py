@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import BOT_SETTINGS, PIPELINE_SETTINGS
+from news_fetcher import NewsFetcher, NewsItem
+from ai_analyzer import AIAnalyzer
+from renderer import MessageRenderer, RenderedMessage
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+# Mərhələ işçilərinə "yuxarı axın bitdi" siqnalı
+_DONE = object()
+
+
+class Stage:
+    """Pipeline mərhələsi: məhdud giriş növbəsi və sabit sayda işçi
+
+    Handler bir partiya (batch_size-a qədər, növbədə hazır olanlar)
+    qəbul edir və növbəti mərhələyə ötürüləcək elementləri qaytarır.
+    Növbə dolu olduqda yuxarıdakı mərhələ gözləyir (backpressure).
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[Any]], Awaitable[List[Any]]],
+                 concurrency: int, queue_size: int, batch_size: int = 1,
+                 on_close: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.on_close = on_close
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0.0
+
+    async def _next_batch(self) -> Tuple[List[Any], bool]:
+        """Bir element gözləyir, sonra növbədə hazır olanları götürür"""
+        item = await self.queue.get()
+        if item is _DONE:
+            return [], True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is _DONE:
+                # Hər işçi bir _DONE götürür - partiyanı bitirib çıxır
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _worker(self, downstream: Optional['Stage']):
+        done = False
+        while not done:
+            batch, done = await self._next_batch()
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                outputs = await self.handler(batch)
+            except Exception as e:
+                # Bir elementin xətası dövrü dayandırmır
+                self.errors += len(batch)
+                logger.error(f"💥 PIPELINE: {self.name} stage failed for {len(batch)} item(s): {e}")
+                continue
+            finally:
+                self.busy += time.monotonic() - started
+            self.processed += len(batch)
+            if downstream:
+                for output in outputs:
+                    await downstream.queue.put(output)
+
+    async def run(self, downstream: Optional['Stage']):
+        await asyncio.gather(*(self._worker(downstream) for _ in range(self.concurrency)))
+        if self.on_close:
+            try:
+                self.on_close()
+            except Exception as e:
+                # Aşağı mərhələlər yenə də _DONE almalıdır, yoxsa dövr ilişib qalar
+                logger.error(f"💥 PIPELINE: {self.name} close hook failed: {e}")
+        if downstream:
+            for _ in range(downstream.concurrency):
+                await downstream.queue.put(_DONE)
+
+    def get_stats(self) -> Dict:
+        return {'processed': self.processed, 'errors': self.errors, 'busy': self.busy}
+
+
+class NewsPipeline:
+    """Xəbər dövrü: fetch → dedup → enrich → analyze → render → deliver
+
+    Hər mərhələ öz növbəsi və paralelliyi ilə işləyir; ilk xəbər digər
+    mənbələr hələ çəkilərkən istifadəçilərə çata bilər. on_rendered hazır
+    mesaj üçün sinxron çağırılır (məs. /latest buferi, outbox), qaytardığı
+    dəyər deliver-ə ötürülür.
+    """
+
+    def __init__(self, fetcher: NewsFetcher, analyzer: AIAnalyzer, renderer: MessageRenderer,
+                 deliver: Callable[[RenderedMessage, Any], Awaitable[None]],
+                 on_rendered: Optional[Callable[[RenderedMessage], Any]] = None,
+                 settings: Optional[Dict] = None):
+        self.fetcher = fetcher
+        self.analyzer = analyzer
+        self.renderer = renderer
+        self.deliver = deliver
+        self.on_rendered = on_rendered
+        self.settings = settings or PIPELINE_SETTINGS
+        self.last_cycle: Dict = {}
+        # Cari dövrün vəziyyəti - SingleFlight sayəsində eyni anda bir dövr olur
+        self._started = 0.0
+        self._first_delivery: Optional[float] = None
+        self._admitted = 0
+        self._rendered: List[RenderedMessage] = []
+
+    def _build_stages(self) -> List[Stage]:
+        size = self.settings['queue_size']
+        return [
+            Stage('fetch', self._fetch, self.settings['fetch_concurrency'], size),
+            Stage('dedup', self._dedup, 1, size, on_close=self.fetcher.storage.flush_seen_news),
+            Stage('enrich', self._enrich, self.settings['enrich_concurrency'], size),
+            Stage('analyze', self._analyze, self.settings['analyze_concurrency'], size,
+                  batch_size=self.settings['analyze_batch']),
+            Stage('render', self._render, 1, size),
+            Stage('deliver', self._deliver, self.settings['deliver_concurrency'], size)
+        ]
+
+    async def run(self) -> List[RenderedMessage]:
+        """Bir dövr - vaxtı çatmış mənbələrdən başlayaraq; hazırlanan mesajları qaytarır"""
+        started = self._started = time.monotonic()
+        self._first_delivery = None
+        self._admitted = 0
+        self._rendered = []
+
+        sources = self.fetcher.scheduler.due_sources(self.fetcher.sources.enabled())
+        logger.info(f"🚰 PIPELINE: {len(sources)}/{len(self.fetcher.sources.enabled())} sources due for polling")
+
+        stages = self._build_stages()
+        tasks = [
+            asyncio.create_task(stage.run(downstream))
+            for stage, downstream in zip(stages, stages[1:] + [None])
+        ]
+        # Prioritetli mənbələr növbəyə əvvəl düşür
+        for source in sources:
+            await stages[0].queue.put(source)
+        for _ in range(stages[0].concurrency):
+            await stages[0].queue.put(_DONE)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        self.last_cycle = {
+            'duration': time.monotonic() - started,
+            'time_to_first_delivery': self._first_delivery,
+            'sources': len(sources),
+            'items': len(self._rendered),
+            'stages': {stage.name: stage.get_stats() for stage in stages}
+        }
+        first = f"{self._first_delivery:.2f}s" if self._first_delivery is not None else "-"
+        logger.info(
+            f"🚰 PIPELINE: {len(self._rendered)} items in {self.last_cycle['duration']:.2f}s "
+            f"(first delivery after {first})"
+        )
+        return self._rendered
+
+    async def _fetch(self, sources: List[Any]) -> List[Any]:
+        results = [(source, await asyncio.to_thread(self.fetcher.poll, source)) for source in sources]
+        # Uğursuz sorğular (None) artıq scheduler-də qeyd olunub
+        return [(source, news_items) for source, news_items in results if news_items is not None]
+
+    async def _dedup(self, batches: List[Any]) -> List[NewsItem]:
+        admitted = []
+        for source, news_items in batches:
+            new_items = self.fetcher.claim_new(news_items)
+            self.fetcher.scheduler.record_poll(source, len(new_items))
+            new_items.sort(key=lambda news: news.published_date, reverse=True)
+            # Dövr limitindən artıq xəbərlər görülmüş sayılır, göndərilmir (əvvəlki kimi)
+            room = max(0, BOT_SETTINGS['max_news_per_check'] - self._admitted)
+            admitted.extend(new_items[:room])
+            self._admitted += len(new_items[:room])
+        return admitted
+
+    async def _enrich(self, news_items: List[NewsItem]) -> List[NewsItem]:
+        return await asyncio.to_thread(self.fetcher.enrich_news, news_items)
+
+    async def _analyze(self, news_items: List[NewsItem]) -> List[Any]:
+        """Növbədə hazır olan xəbərlər tək Gemini sorğusunda analiz edilir"""
+        if not BOT_SETTINGS['ai_analysis']:
+            return [(news, None) for news in news_items]
+        pending = [news for news in news_items if not self.renderer.is_rendered(news)]
+        analyses = {}
+        if pending:
+            try:
+                results = await self.analyzer.analyze_news_batch_async(pending)
+                analyses = dict(zip((news.hash for news in pending), results))
+            except Exception as e:
+                # Analizsiz də olsa xəbər çatdırılır
+                logger.error(f"💥 PIPELINE: Batch analysis failed: {e}")
+        return [(news, analyses.get(news.hash)) for news in news_items]
+
+    async def _render(self, items: List[Any]) -> List[Any]:
+        outputs = []
+        for news, analysis in items:
+            rendered = self.renderer.get(news) or self.renderer.render(news, analysis)
+            self._rendered.append(rendered)
+            ticket = self.on_rendered(rendered) if self.on_rendered else None
+            outputs.append((rendered, ticket))
+        return outputs
+
+    async def _deliver(self, items: List[Any]) -> List[Any]:
+        for rendered, ticket in items:
+            if self._first_delivery is None:
+                self._first_delivery = time.monotonic() - self._started
+            await self.deliver(rendered, ticket)
+        return []
+
+    def get_stats(self) -> Dict:
+        return dict(self.last_cycle)
+
+
+if __name__ == '__main__':
+    # Time-to-first-alert benchmark: saxta mənbələrlə köhnə ardıcıl dövr və pipeline
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    FEED_LATENCIES = [0.2, 0.5, 1.0, 2.0, 3.0]   # Mənbə cavab müddətləri (s)
+    ARTICLE_LATENCY = 0.3
+    ANALYSIS_LATENCY = 1.0                        # Bir toplu Gemini sorğusu
+    DELIVERY_LATENCY = 0.5                        # Bir xəbərin yayımı
+
+    class FakeFetcher:
+        def __init__(self):
+            self.sources = SimpleNamespace(enabled=lambda: [
+                SimpleNamespace(name=f"source-{i}", latency=latency) for i, latency in enumerate(FEED_LATENCIES)
+            ])
+            self.scheduler = SimpleNamespace(due_sources=lambda sources: sources, record_poll=lambda source, count: None)
+            self.storage = SimpleNamespace(flush_seen_news=lambda: None)
+            self.seen = set()
+
+        def poll(self, source):
+            time.sleep(source.latency)
+            return [NewsItem(f"{source.name} news {n}", "", f"https://example.com/{source.name}/{n}",
+                             source.name, datetime.utcnow()) for n in range(2)]
+
+        def claim_new(self, news_items):
+            new_items = [news for news in news_items if news.hash not in self.seen]
+            self.seen.update(news.hash for news in new_items)
+            return new_items
+
+        def enrich_news(self, news_items):
+            time.sleep(ARTICLE_LATENCY)
+            for news in news_items:
+                news.content = "content"
+            return news_items
+
+    class FakeAnalyzer:
+        async def analyze_news_batch_async(self, news_items):
+            await asyncio.sleep(ANALYSIS_LATENCY)
+            return [f"analysis of {news.title}" for news in news_items]
+
+    async def fake_deliver(rendered, ticket, log, started):
+        log.append(time.monotonic() - started)
+        await asyncio.sleep(DELIVERY_LATENCY)
+
+    async def inline_cycle():
+        # Köhnə davranış: hər mərhələ bütün xəbərlər üçün bitir, sonra növbəti başlayır
+        fetcher, analyzer, renderer, log = FakeFetcher(), FakeAnalyzer(), MessageRenderer(), []
+        started = time.monotonic()
+        polled = await asyncio.gather(*(asyncio.to_thread(fetcher.poll, source) for source in fetcher.sources.enabled()))
+        news_list = [news for batch in polled for news in fetcher.claim_new(batch)][:BOT_SETTINGS['max_news_per_check']]
+        await asyncio.to_thread(fetcher.enrich_news, news_list)
+        analyses = await analyzer.analyze_news_batch_async(news_list)
+        for news, analysis in zip(news_list, analyses):
+            await fake_deliver(renderer.render(news, analysis), None, log, started)
+        return log, time.monotonic() - started
+
+    async def pipeline_cycle():
+        log = []
+        started = time.monotonic()
+        pipeline = NewsPipeline(
+            FakeFetcher(), FakeAnalyzer(), MessageRenderer(),
+            deliver=lambda rendered, ticket: fake_deliver(rendered, ticket, log, started)
+        )
+        await pipeline.run()
+        return log, pipeline.get_stats()
+
+    async def main():
+        log, duration = await inline_cycle()
+        print(f"Inline cycle:   first alert after {log[0]:.2f}s, {len(log)} alerts, cycle {duration:.2f}s")
+        log, stats = await pipeline_cycle()
+        print(f"Staged pipeline: first alert after {log[0]:.2f}s, {len(log)} alerts, cycle {stats['duration']:.2f}s")
+        for name, stage in stats['stages'].items():
+            print(f"  {name:8} processed {stage['processed']:2}, errors {stage['errors']}, busy {stage['busy']:.2f}s")
+
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from config import SCHEDULER_SETTINGS
+from sources import NewsSource
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+
+class SourceSchedule:
+    """Bir mənbənin müşahidə olunan yayım sürəti və cari sorğu intervalı"""
+
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self.next_due = 0.0            # İlk dövrdə dərhal sorğulanır
+        self.last_polled: Optional[float] = None
+        self.rate_ewma = 0.0           # Yeni xəbər / saniyə (eksponensial orta)
+        self.empty_ratio_ewma = 0.0    # Boş qayıdan sorğuların payı
+        self.polls = 0
+        self.empty_polls = 0
+        self.new_items = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            'interval': round(self.interval),
+            'rate_per_hour': round(self.rate_ewma * 3600, 2),
+            'empty_ratio': round(self.empty_ratio_ewma, 2),
+            'polls': self.polls,
+            'empty_polls': self.empty_polls,
+            'new_items': self.new_items
+        }
+
+
+class PollScheduler:
+    """Mənbə üzrə adaptiv sorğu planlayıcısı
+
+    Hər sorğudan sonra yeni xəbər sayı ilə yayım sürəti (EWMA) yenilənir.
+    Növbəti interval təxminən bir yeni xəbər gözlənilən müddətə uyğunlaşdırılır;
+    boş qayıdan sorğular intervalı tədricən uzadır. Nəticə həmişə
+    min_interval / max_interval sərhədləri daxilində saxlanılır.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or SCHEDULER_SETTINGS
+        self.min_interval = self.settings['min_interval']
+        self.max_interval = self.settings['max_interval']
+        self.alpha = self.settings['ewma_alpha']
+        self._schedules: Dict[str, SourceSchedule] = {}
+        self._lock = threading.Lock()
+
+    def _clamp(self, interval: float) -> float:
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def _schedule_for(self, source: NewsSource) -> SourceSchedule:
+        schedule = self._schedules.get(source.key)
+        if schedule is None:
+            # Başlanğıc interval mənbənin konfiqurasiyasındakı poll_interval-dır
+            schedule = SourceSchedule(source.name, self._clamp(source.poll_interval))
+            self._schedules[source.key] = schedule
+        return schedule
+
+    def due_sources(self, sources: List[NewsSource], now: Optional[float] = None) -> List[NewsSource]:
+        """Vaxtı çatmış mənbələri qaytarır (sıra qorunur)"""
+        now = time.monotonic() if now is None else now
+        # Yarım tik tolerans - job sürüşməsi mənbəni bütöv bir tik gecikdirməsin
+        slack = self.settings['tick_interval'] / 2
+        with self._lock:
+            return [source for source in sources if self._schedule_for(source).next_due - slack <= now]
+
+    def record_poll(self, source: NewsSource, new_items: int, now: Optional[float] = None):
+        """Sorğu nəticəsinə görə mənbənin növbəti intervalını yeniləyir"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            schedule = self._schedule_for(source)
+            schedule.polls += 1
+            schedule.new_items += new_items
+            if schedule.last_polled is None:
+                # İlk sorğu son 24 saatın yığılmış xəbərlərini qaytarır - sürət ölçüsü deyil
+                schedule.last_polled = now
+                schedule.next_due = now + schedule.interval
+                return
+            elapsed = max(now - schedule.last_polled, 1.0)
+
+            is_empty = 1.0 if new_items == 0 else 0.0
+            if is_empty:
+                schedule.empty_polls += 1
+            schedule.rate_ewma = self.alpha * (new_items / elapsed) + (1 - self.alpha) * schedule.rate_ewma
+            schedule.empty_ratio_ewma = self.alpha * is_empty + (1 - self.alpha) * schedule.empty_ratio_ewma
+
+            previous = schedule.interval
+            if new_items:
+                # Təxminən target_items_per_poll yeni xəbər yığılanda yenidən sorğula
+                interval = self.settings['target_items_per_poll'] / schedule.rate_ewma
+            else:
+                # Boş sorğu - boşluq payı artdıqca daha yavaş geri çəkil
+                interval = previous * (1 + (self.settings['backoff_factor'] - 1) * schedule.empty_ratio_ewma)
+            schedule.interval = self._clamp(interval)
+            schedule.last_polled = now
+            schedule.next_due = now + schedule.interval
+
+        if abs(schedule.interval - previous) >= 1:
+            logger.info(
+                f"⏱️ SCHEDULER: {source.name} interval {previous:.0f}s → {schedule.interval:.0f}s "
+                f"({new_items} new, {schedule.rate_ewma * 3600:.1f}/h)"
+            )
+
+    def record_failure(self, source: NewsSource, now: Optional[float] = None):
+        """Xətalı sorğudan sonra mənbəni cari intervalla təxirə salır"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            schedule = self._schedule_for(source)
+            schedule.next_due = now + schedule.interval
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Mənbə adı üzrə planlayıcı vəziyyəti"""
+        with self._lock:
+            return {schedule.name: schedule.to_dict() for schedule in self._schedules.values()}
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from config import GEMINI_RATE_LIMITS
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+# Prioritet zolaqları: təcili xəbər analizi toplu işlərdən (günlük özet) əvvəl keçir
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
+PRIORITY_NAMES = {PRIORITY_HIGH: 'high', PRIORITY_LOW: 'low'}
+
+
+class TokenBucket:
+    """Dəqiqəlik limit üçün sadə token bucket (thread-safe deyil - çağıran kilidləyir)"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount qədər token üçün gözləmə müddəti (0 = dərhal mövcuddur)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self):
+        self.tokens = 0.0
+
+
+class RateLimiter:
+    """Gemini üçün RPM və təxmini TPM limitləyicisi, prioritet zolağı ilə
+
+    Yüksək prioritetli sorğu gözləyərkən aşağı prioritetlilər bucket-dən
+    götürə bilmir. max_wait ərzində yer tapılmazsa sorğu rədd edilir və
+    çağıran fallback-ə keçir.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or GEMINI_RATE_LIMITS
+        self.max_wait = self.settings['max_wait']
+        self._requests = TokenBucket(self.settings['requests_per_minute'])
+        self._tokens = TokenBucket(self.settings['tokens_per_minute'])
+        self._lock = threading.Lock()
+        self._high_waiting = 0
+        self.stats = {
+            'requests': 0,
+            'requests_high': 0,
+            'requests_low': 0,
+            'estimated_tokens': 0,
+            'throttled': 0,
+            'wait_seconds': 0.0,
+            'rejected': 0,
+            'quota_errors': 0
+        }
+
+    @staticmethod
+    def estimate_tokens(prompt: str, max_output_tokens: int) -> int:
+        """Təxmini token sayı: ~4 simvol/token + cavab limiti"""
+        return len(prompt) // 4 + max_output_tokens
+
+    def _reserve(self, tokens: int, priority: int) -> float:
+        """Yer varsa tutur və 0 qaytarır, yoxdursa gözləmə müddətini"""
+        now = time.monotonic()
+        with self._lock:
+            if priority != PRIORITY_HIGH and self._high_waiting:
+                return 0.1
+            wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self._requests.consume(1)
+            self._tokens.consume(tokens)
+            self.stats['requests'] += 1
+            self.stats[f"requests_{PRIORITY_NAMES[priority]}"] += 1
+            self.stats['estimated_tokens'] += tokens
+            return 0.0
+
+    def _begin(self, priority: int):
+        if priority == PRIORITY_HIGH:
+            with self._lock:
+                self._high_waiting += 1
+
+    def _end(self, priority: int, waited: float, granted: bool):
+        with self._lock:
+            if priority == PRIORITY_HIGH:
+                self._high_waiting -= 1
+            if waited >= 0.01:
+                self.stats['throttled'] += 1
+                self.stats['wait_seconds'] += waited
+            if not granted:
+                self.stats['rejected'] += 1
+        if not granted:
+            logger.warning(f"🚦 AI_RATE_LIMIT: {PRIORITY_NAMES[priority]} priority request rejected after {waited:.1f}s wait")
+
+    async def acquire(self, tokens: int, priority: int = PRIORITY_HIGH) -> bool:
+        """Limit daxilində yer gözləyir (async); max_wait keçərsə False"""
+        start = time.monotonic()
+        granted = False
+        self._begin(priority)
+        try:
+            while True:
+                wait = self._reserve(tokens, priority)
+                if wait == 0:
+                    granted = True
+                    return True
+                if time.monotonic() - start + wait > self.max_wait:
+                    return False
+                await asyncio.sleep(min(wait, 0.5))
+        finally:
+            self._end(priority, time.monotonic() - start, granted)
+
+    def acquire_sync(self, tokens: int, priority: int = PRIORITY_HIGH) -> bool:
+        """acquire-in bloklayan variantı (sync çağırışlar üçün)"""
+        start = time.monotonic()
+        granted = False
+        self._begin(priority)
+        try:
+            while True:
+                wait = self._reserve(tokens, priority)
+                if wait == 0:
+                    granted = True
+                    return True
+                if time.monotonic() - start + wait > self.max_wait:
+                    return False
+                time.sleep(min(wait, 0.5))
+        finally:
+            self._end(priority, time.monotonic() - start, granted)
+
+    def record_quota_error(self):
+        """Server kvota xətası - bucket boşaldılır ki, növbəti sorğular gözləsin"""
+        with self._lock:
+            self.stats['quota_errors'] += 1
+            self._requests.drain()
+        logger.warning("🚫 AI_RATE_LIMIT: Gemini quota exceeded, backing off")
+
+    def get_stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            self._requests._refill(now)
+            self._tokens._refill(now)
+            stats = dict(self.stats)
+            stats['available_requests'] = int(self._requests.tokens)
+            stats['available_tokens'] = int(self._tokens.tokens)
+        return stats
@@ -0,0 +1,149 @@
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pytz
+
+from config import RENDER_SETTINGS
+from news_fetcher import NewsItem
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+# Mənbə emojiləri - bütün mesajlar üçün bir dəfə təyin olunur
+SOURCE_EMOJI = {
+    'CoinDesk': '📰',
+    'The Block': '🔷',
+    'Cointelegraph': '📊',
+    'Crypto News': '🌐',
+    'NewsBTC': '₿'
+}
+DEFAULT_EMOJI = '📰'
+
+# Dil üzrə mətnlər və saat qurşağı
+LOCALES = {
+    'az': {
+        'timezone': pytz.timezone('Asia/Baku'),
+        'timezone_label': 'AZT',
+        'source': 'Mənbə',
+        'date': 'Tarix',
+        'read_more': 'Ətraflı oxu',
+        'analysis': 'AI Analizi'
+    }
+}
+
+
+class RenderedMessage(NamedTuple):
+    """Göndərməyə hazır, dəyişməz mesaj"""
+    news_hash: int
+    locale: str
+    text: str
+    has_analysis: bool
+
+
+class MessageRenderer:
+    """Xəbər mesajlarını bir dəfə formatlaşdırıb (hash, dil) üzrə keşləyir
+
+    Yayım, /latest və təkrar cəhdlər eyni hazır mətni istifadə edir -
+    AI analizi və formatlaşdırma auditoriya ölçüsündən asılı olmayaraq
+    hər xəbər üçün bir dəfə baş verir.
+    """
+
+    def __init__(self, settings: Optional[Dict] = None):
+        self.settings = settings or RENDER_SETTINGS
+        self.default_locale = self.settings['locale']
+        self._cache: "OrderedDict[Tuple[int, str], RenderedMessage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, news: NewsItem, locale: Optional[str] = None) -> Optional[RenderedMessage]:
+        """Keşdəki hazır mesaj (yoxdursa None)"""
+        key = (news.hash, locale or self.default_locale)
+        with self._lock:
+            rendered = self._cache.get(key)
+            if rendered is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return rendered
+
+    def is_rendered(self, news: NewsItem, locale: Optional[str] = None) -> bool:
+        """Hazır mesaj varmı (statistikaya təsir etmir)"""
+        with self._lock:
+            return (news.hash, locale or self.default_locale) in self._cache
+
+    def render(self, news: NewsItem, analysis: Optional[str] = None, locale: Optional[str] = None) -> RenderedMessage:
+        """Mesajı formatlaşdırır və keşə yazır"""
+        locale = locale or self.default_locale
+        try:
+            text = self._format(news, analysis, LOCALES[locale])
+        except Exception as e:
+            # Sadə variant keşlənmir - növbəti çağırışda yenidən cəhd edilir
+            logger.error(f"Mesaj formatlaşdırma xətası: {e}")
+            return RenderedMessage(news.hash, locale, f"📰 **{news.title}**\n🔗 [Link]({news.url})", False)
+
+        rendered = RenderedMessage(news.hash, locale, text, bool(analysis))
+        with self._lock:
+            self._cache[(news.hash, locale)] = rendered
+            self._cache.move_to_end((news.hash, locale))
+            while len(self._cache) > self.settings['cache_size']:
+                self._cache.popitem(last=False)
+        return rendered
+
+    @staticmethod
+    def _format(news: NewsItem, analysis: Optional[str], texts: Dict) -> str:
+        analysis_block = f"\n\n🧠 **{texts['analysis']}:**\n{analysis}" if analysis else ""
+        source_emoji = SOURCE_EMOJI.get(news.source, DEFAULT_EMOJI)
+
+        # Yerli saata çevirmək
+        utc_time = news.published_date.replace(tzinfo=pytz.UTC)
+        local_time = utc_time.astimezone(texts['timezone'])
+
+        message = f"""
+{source_emoji} **{news.title}**
+
+📍 {texts['source']}: {news.source}
+🕐 {texts['date']}: {local_time.strftime('%d.%m.%Y %H:%M')} ({texts['timezone_label']})
+
+🔗 [{texts['read_more']}]({news.url}){analysis_block}
+
+---
+"""
+        return message.strip()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached': len(self._cache),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class RecentNews:
+    """Son emal olunmuş xəbərlərin halqa buferi (/latest üçün)
+
+    Xəbər yoxlama işi hazır mesajları bura yazır; /latest şəbəkəyə
+    müraciət etmədən və xəbərləri "görülmüş" etmədən buradan oxuyur.
+    """
+
+    def __init__(self, size: Optional[int] = None):
+        self._items: "deque[RenderedMessage]" = deque(maxlen=size or RENDER_SETTINGS['recent_size'])
+        self._lock = threading.Lock()
+
+    def add(self, rendered: RenderedMessage):
+        with self._lock:
+            self._items.append(rendered)
+
+    def latest(self, count: int) -> List[RenderedMessage]:
+        """Ən yenidən köhnəyə doğru son `count` mesaj"""
+        with self._lock:
+            return [self._items[-i] for i in range(1, min(count, len(self._items)) + 1)]
+
+    def __len__(self) -> int:
+        return len(self._items)
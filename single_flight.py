@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+
+class CycleMetrics:
+    """Dövr müddətləri və interval aşımları (thread-safe deyil - çağıran kilidləyir)"""
+
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self.runs = 0
+        self.coalesced = 0    # Gedən dövrün nəticəsini gözləyib paylaşan çağırışlar
+        self.skipped = 0      # Gedən dövr olduğu üçün buraxılan çağırışlar
+        self.overruns = 0     # Müddəti intervalı aşan dövrlər
+        self.failures = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    def record(self, duration: float, failed: bool):
+        self.runs += 1
+        self.failures += failed
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        if duration > self.interval:
+            self.overruns += 1
+            logger.warning(
+                f"⏱️ OVERRUN: {self.name} cycle took {duration:.1f}s "
+                f"(interval {self.interval}s, {self.overruns} overruns)"
+            )
+
+    def skip(self):
+        self.skipped += 1
+        logger.info(f"⏭️ SINGLE-FLIGHT: {self.name} cycle still running, call skipped")
+
+    def as_dict(self, in_flight: bool) -> Dict:
+        return {
+            'runs': self.runs,
+            'coalesced': self.coalesced,
+            'skipped': self.skipped,
+            'overruns': self.overruns,
+            'failures': self.failures,
+            'last_duration': self.last_duration,
+            'max_duration': self.max_duration,
+            'avg_duration': self.total_duration / self.runs if self.runs else 0.0,
+            'interval': self.interval,
+            'in_flight': in_flight
+        }
+
+
+class _Flight:
+    """Bir dövrün nəticəsi - gözləyənlər onu paylaşır"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Eyni anda yalnız bir dövr (v13 - handler və job-lar ayrı thread-lərdə)
+
+    Dövr gedərkən gələn çağıran ya onun nəticəsini gözləyib paylaşır
+    (join=True), ya da dərhal None alır (join=False, növbəti tick üçün).
+    """
+
+    def __init__(self, name: str, interval: float):
+        self.metrics = CycleMetrics(name, interval)
+        self._lock = threading.Lock()
+        self._flight: Optional[_Flight] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._flight is not None
+
+    def run(self, fn: Callable[[], Any], join: bool = True) -> Any:
+        with self._lock:
+            flight = self._flight
+            if flight is None:
+                self._flight = _Flight()
+            elif not join:
+                self.metrics.skip()
+                return None
+            else:
+                self.metrics.coalesced += 1
+        if flight is not None:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        return self._lead(fn)
+
+    def wait(self) -> Any:
+        """Gedən dövrün nəticəsini gözləyir - dövr yoxdursa yenisini başlatmadan None"""
+        with self._lock:
+            flight = self._flight
+            if flight is None:
+                return None
+            self.metrics.coalesced += 1
+        flight.done.wait()
+        return flight.result
+
+    def _lead(self, fn: Callable[[], Any]) -> Any:
+        flight = self._flight
+        started = time.monotonic()
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self.metrics.record(time.monotonic() - started, flight.error is not None)
+                self._flight = None
+            flight.done.set()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return self.metrics.as_dict(self.in_flight)
+
+
+class AsyncSingleFlight:
+    """SingleFlight-in asyncio variantı - gözləyənlər eyni Future-u paylaşır"""
+
+    def __init__(self, name: str, interval: float):
+        self.metrics = CycleMetrics(name, interval)
+        self._future: Optional[asyncio.Future] = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._future is not None
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], join: bool = True) -> Any:
+        if self._future is not None:
+            if not join:
+                self.metrics.skip()
+                return None
+            self.metrics.coalesced += 1
+            # shield: bir gözləyənin ləğvi dövrü dayandırmır
+            return await asyncio.shield(self._future)
+
+        future = self._future = asyncio.get_running_loop().create_future()
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self.metrics.record(time.monotonic() - started, True)
+            future.cancel()
+            raise
+        except Exception as e:
+            self.metrics.record(time.monotonic() - started, True)
+            future.set_exception(e)
+            # Gözləyən yoxdursa "exception was never retrieved" xəbərdarlığı olmasın
+            future.exception()
+            raise
+        else:
+            self.metrics.record(time.monotonic() - started, False)
+            future.set_result(result)
+            return result
+        finally:
+            self._future = None
+
+    async def wait(self) -> Any:
+        """Gedən dövrün nəticəsini gözləyir - dövr yoxdursa yenisini başlatmadan None"""
+        if self._future is None:
+            return None
+        self.metrics.coalesced += 1
+        try:
+            return await asyncio.shield(self._future)
+        except Exception:
+            return None
+
+    def get_stats(self) -> Dict:
+        return self.metrics.as_dict(self.in_flight)
@@ -0,0 +1,60 @@
+import logging
+from typing import Dict, List, Optional
+
+from config import NEWS_SOURCES, FETCH_SETTINGS, BOT_SETTINGS
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+
+
+class NewsSource:
+    """NEWS_SOURCES-dakı bir mənbənin konfiqurasiyası"""
+
+    def __init__(self, key: str, config: Dict):
+        self.key = key
+        self.name = config['name']
+        self.rss_url = config['rss_url']
+        self.max_entries = config.get('max_entries', FETCH_SETTINGS['max_entries_per_feed'])
+        # Məqalə mətni üçün CSS selektoru - yoxdursa ümumi heuristika işlədilir
+        self.content_selector = config.get('content_selector')
+        self.priority = config.get('priority', 0)
+        self.poll_interval = config.get('poll_interval', BOT_SETTINGS['check_interval'])
+        self.enabled = config.get('enabled', True)
+
+    def __repr__(self):
+        return f"NewsSource({self.key!r}, priority={self.priority})"
+
+
+class SourceRegistry:
+    """Bütün mənbələr config-dən yüklənir - yeni mənbə üçün kod lazım deyil"""
+
+    def __init__(self, sources_config: Optional[Dict[str, Dict]] = None):
+        self._sources: Dict[str, NewsSource] = {}
+        self._by_name: Dict[str, NewsSource] = {}
+        for key, config in (sources_config or NEWS_SOURCES).items():
+            try:
+                source = NewsSource(key, config)
+            except KeyError as e:
+                logger.error(f"❌ SOURCES: '{key}' mənbəsində {e} sahəsi yoxdur, keçildi")
+                continue
+            self._sources[key] = source
+            self._by_name[source.name] = source
+        logger.info(f"📚 SOURCES: {len(self.enabled())}/{len(self._sources)} sources enabled")
+
+    def enabled(self) -> List[NewsSource]:
+        """Aktiv mənbələr, prioritetə görə azalan sırada"""
+        return sorted(
+            (source for source in self._sources.values() if source.enabled),
+            key=lambda source: source.priority,
+            reverse=True
+        )
+
+    def get(self, key: str) -> Optional[NewsSource]:
+        return self._sources.get(key)
+
+    def by_name(self, name: str) -> Optional[NewsSource]:
+        """NewsItem.source (görünən ad) üzrə axtarış"""
+        return self._by_name.get(name)
+
+    def __len__(self):
+        return len(self._sources)
@@ -0,0 +1,728 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+# Enhanced logging setup
+logger = logging.getLogger(__name__)
+performance_logger = logging.getLogger('performance')
+
+
+def _atomic_write_json(path: str, data, **kwargs):
+    """JSON-u müvəqqəti fayla yazıb atomik əvəz edir - yarımçıq fayl qalmır"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SeenNewsJournal:
+    """Görülən xəbərlər üçün append-only JSON-lines jurnalı
+
+    Hər xəbər bir sətir kimi əlavə olunur, yazılar yaddaşda toplanır və
+    fetch dövrünün sonunda bir dəfə flush edilir. Köhnə sətirlər yalnız
+    compact() zamanı silinir.
+    """
+
+    def __init__(self, path: str = 'seen_news.jsonl', legacy_path: Optional[str] = 'seen_news.json'):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def _import_legacy_file(self):
+        """Köhnə seen_news.json faylını jurnal formatına bir dəfəlik köçürür"""
+        if not self.legacy_path or os.path.exists(self.path) or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._write_records(data)
+            os.replace(self.legacy_path, f"{self.legacy_path}.migrated")
+            logger.info(f"📦 SEEN_JOURNAL: {len(data)} qeyd {self.legacy_path} faylından köçürüldü")
+        except Exception as e:
+            logger.error(f"💥 SEEN_JOURNAL: Köhnə fayl köçürmə xətası: {e}")
+
+    def _read_lines(self) -> List[Dict]:
+        """Jurnalı oxuyur, eyni hash üçün son sətir qalib gəlir"""
+        records: Dict[int, Dict] = {}
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    records[record['hash']] = record
+                except Exception as e:
+                    # Yarımçıq yazılmış son sətir crash-dən qala bilər
+                    logger.warning(f"⚠️  SEEN_JOURNAL: Sətir {line_no} oxunmadı: {e}")
+        return list(records.values())
+
+    def _write_records(self, records: List[Dict]):
+        """Qeydləri müvəqqəti fayla yazıb atomik əvəz edir"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> List[Dict]:
+        """Jurnaldakı bütün qeydləri qaytarır (lazım olsa köhnə faylı köçürür)"""
+        with self._lock:
+            self._import_legacy_file()
+            return self._read_lines()
+
+    def records(self) -> List[Dict]:
+        """Diskdəki və hələ flush olunmamış qeydləri qaytarır"""
+        with self._lock:
+            records = {record['hash']: record for record in self._read_lines()}
+            for record in self._pending:
+                records[record['hash']] = record
+            return list(records.values())
+
+    def append(self, record: Dict):
+        """Qeydi buferə əlavə edir - diskə flush() ilə yazılır"""
+        with self._lock:
+            self._pending.append(record)
+
+    def flush(self) -> int:
+        """Buferdəki qeydləri tək bir append əməliyyatı ilə yazır"""
+        with self._lock:
+            return self._flush_locked()
+
+    def _flush_locked(self) -> int:
+        if not self._pending:
+            return 0
+        pending = self._pending
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in pending))
+            self._pending = []
+            logger.info(f"💾 SEEN_JOURNAL: {len(pending)} yeni qeyd jurnala yazıldı")
+            return len(pending)
+        except Exception as e:
+            logger.error(f"💥 SEEN_JOURNAL: Flush xətası: {e}")
+            return 0
+
+    def rewrite(self, records: List[Dict]):
+        """Jurnalı verilən qeydlərlə tam əvəz edir (miqrasiya üçün)"""
+        with self._lock:
+            self._write_records(records)
+
+    def compact(self, cutoff_time: datetime) -> Set[int]:
+        """cutoff_time-dan köhnə qeydləri silir, silinən hash-ləri qaytarır"""
+        with self._lock:
+            self._flush_locked()
+            live_records = []
+            expired_hashes = set()
+            for record in self._read_lines():
+                try:
+                    if datetime.fromisoformat(record['saved_at']) > cutoff_time:
+                        live_records.append(record)
+                        continue
+                except Exception:
+                    pass
+                expired_hashes.add(record['hash'])
+            self._write_records(live_records)
+        logger.info(f"🧹 SEEN_JOURNAL: Kompaksiya - {len(live_records)} qeyd saxlandı, {len(expired_hashes)} silindi")
+        return expired_hashes
+
+    def reset(self) -> Optional[str]:
+        """Jurnalı backup edib boş jurnal yaradır, backup adını qaytarır"""
+        with self._lock:
+            self._pending = []
+            backup_name = None
+            if os.path.exists(self.path):
+                backup_name = f"{self.path}.emergency_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                os.rename(self.path, backup_name)
+            self._write_records([])
+            return backup_name
+
+
+class BaseStorage:
+    """Saxlama qatının ümumi interfeysi (görülən xəbərlər, abunəçilər, ayarlar)"""
+
+    name = 'base'
+
+    def __init__(self):
+        self._compact_thread: Optional[threading.Thread] = None
+
+    # --- Görülən xəbərlər ---
+    def load_seen_news(self) -> List[Dict]:
+        raise NotImplementedError
+
+    def add_seen_news(self, record: Dict):
+        raise NotImplementedError
+
+    def flush_seen_news(self) -> int:
+        return 0
+
+    def rewrite_seen_news(self, records: List[Dict]):
+        raise NotImplementedError
+
+    def seen_news_records(self, since: Optional[datetime] = None) -> List[Dict]:
+        raise NotImplementedError
+
+    def count_seen_news(self) -> int:
+        return len(self.seen_news_records())
+
+    def recent_seen_news(self, limit: int = 5) -> List[Dict]:
+        records = sorted(self.seen_news_records(), key=lambda x: x.get('saved_at', ''), reverse=True)
+        return records[:limit]
+
+    def compact_seen_news(self, cutoff_time: datetime) -> Set[int]:
+        raise NotImplementedError
+
+    def compact_seen_news_in_background(self, cutoff_time: datetime, on_done=None) -> threading.Thread:
+        """Kompaksiyanı fon thread-də işə salır"""
+        def run():
+            try:
+                expired_hashes = self.compact_seen_news(cutoff_time)
+                if on_done:
+                    on_done(expired_hashes)
+            except Exception as e:
+                logger.error(f"💥 STORAGE: Kompaksiya xətası: {e}")
+
+        if self._compact_thread and self._compact_thread.is_alive():
+            logger.info("⏳ STORAGE: Kompaksiya artıq işləyir, yenisi başladılmadı")
+            return self._compact_thread
+        self._compact_thread = threading.Thread(target=run, name='seen-news-compact', daemon=True)
+        self._compact_thread.start()
+        return self._compact_thread
+
+    def reset_seen_news(self) -> Optional[str]:
+        raise NotImplementedError
+
+    # --- Abunəçilər ---
+    def load_subscribers(self) -> Set[int]:
+        raise NotImplementedError
+
+    def add_subscriber(self, user_id: int):
+        raise NotImplementedError
+
+    def remove_subscribers(self, user_ids: List[int]):
+        raise NotImplementedError
+
+    # --- İstifadəçi ayarları ---
+    def load_user_settings(self) -> Dict[int, Dict]:
+        raise NotImplementedError
+
+    def save_user_settings(self, user_id: int, settings: Dict):
+        raise NotImplementedError
+
+    def apply_user_changes(self, added: Set[int], removed: Set[int], settings: Dict[int, Dict]):
+        """Yığılmış abunəçi/ayar dəyişikliklərini bir dəfəyə yazır"""
+        if removed:
+            self.remove_subscribers(list(removed))
+        for user_id in added:
+            self.add_subscriber(user_id)
+        for user_id, user_settings in settings.items():
+            self.save_user_settings(user_id, user_settings)
+
+    # --- Feed vəziyyəti (ETag / Last-Modified) ---
+    def load_feed_states(self) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+    def save_feed_state(self, feed_url: str, state: Dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JSONStorage(BaseStorage):
+    """Fayl əsaslı backend: seen_news.jsonl jurnalı + subscribers.json + user_settings.json"""
+
+    name = 'json'
+
+    def __init__(self, seen_news_file: str = 'seen_news.jsonl',
+                 subscribers_file: str = 'subscribers.json',
+                 user_settings_file: str = 'user_settings.json',
+                 feed_state_file: str = 'feed_state.json'):
+        super().__init__()
+        self.seen_journal = SeenNewsJournal(seen_news_file, legacy_path='seen_news.json')
+        self.subscribers_file = subscribers_file
+        self.user_settings_file = user_settings_file
+        self.feed_state_file = feed_state_file
+        self._subscribers: Set[int] = set()
+        self._user_settings: Dict[int, Dict] = {}
+        self._feed_states: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def load_seen_news(self) -> List[Dict]:
+        return self.seen_journal.load()
+
+    def add_seen_news(self, record: Dict):
+        self.seen_journal.append(record)
+
+    def flush_seen_news(self) -> int:
+        return self.seen_journal.flush()
+
+    def rewrite_seen_news(self, records: List[Dict]):
+        self.seen_journal.rewrite(records)
+
+    def seen_news_records(self, since: Optional[datetime] = None) -> List[Dict]:
+        records = self.seen_journal.records()
+        if since is None:
+            return records
+        since_str = since.isoformat()
+        return [record for record in records if record.get('saved_at', '') > since_str]
+
+    def compact_seen_news(self, cutoff_time: datetime) -> Set[int]:
+        return self.seen_journal.compact(cutoff_time)
+
+    def reset_seen_news(self) -> Optional[str]:
+        return self.seen_journal.reset()
+
+    def load_subscribers(self) -> Set[int]:
+        if os.path.exists(self.subscribers_file):
+            with open(self.subscribers_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._subscribers = set(data.get('subscribers', []))
+        return set(self._subscribers)
+
+    def _write_subscribers(self):
+        data = {
+            'subscribers': list(self._subscribers),
+            'last_updated': datetime.now().isoformat(),
+            'total_count': len(self._subscribers)
+        }
+        _atomic_write_json(self.subscribers_file, data)
+
+    def _write_user_settings(self):
+        # Int key'leri string'e çevir JSON için
+        _atomic_write_json(self.user_settings_file, {str(k): v for k, v in self._user_settings.items()})
+
+    def add_subscriber(self, user_id: int):
+        with self._lock:
+            self._subscribers.add(user_id)
+            self._write_subscribers()
+
+    def remove_subscribers(self, user_ids: List[int]):
+        with self._lock:
+            self._subscribers.difference_update(user_ids)
+            self._write_subscribers()
+
+    def load_user_settings(self) -> Dict[int, Dict]:
+        if os.path.exists(self.user_settings_file):
+            with open(self.user_settings_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            # String key'leri int'e çevir
+            self._user_settings = {int(k): v for k, v in data.items()}
+        return {user_id: dict(settings) for user_id, settings in self._user_settings.items()}
+
+    def save_user_settings(self, user_id: int, settings: Dict):
+        with self._lock:
+            self._user_settings[user_id] = dict(settings)
+            self._write_user_settings()
+
+    def apply_user_changes(self, added: Set[int], removed: Set[int], settings: Dict[int, Dict]):
+        """Hər fayl ən çox bir dəfə yenidən yazılır"""
+        with self._lock:
+            if added or removed:
+                self._subscribers.difference_update(removed)
+                self._subscribers.update(added)
+                self._write_subscribers()
+            if settings:
+                self._user_settings.update({user_id: dict(values) for user_id, values in settings.items()})
+                self._write_user_settings()
+
+    def load_feed_states(self) -> Dict[str, Dict]:
+        if os.path.exists(self.feed_state_file):
+            with open(self.feed_state_file, 'r', encoding='utf-8') as f:
+                self._feed_states = json.load(f)
+        return {feed_url: dict(state) for feed_url, state in self._feed_states.items()}
+
+    def save_feed_state(self, feed_url: str, state: Dict):
+        with self._lock:
+            self._feed_states[feed_url] = dict(state)
+            _atomic_write_json(self.feed_state_file, self._feed_states)
+
+
+class SQLiteStorage(BaseStorage):
+    """SQLite (WAL) backend - hər dəyişiklik kiçik sətir yazısıdır"""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS seen_news (
+            hash INTEGER PRIMARY KEY,
+            hash_version INTEGER,
+            title TEXT,
+            source TEXT,
+            url TEXT,
+            published_date TEXT,
+            saved_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_seen_news_saved_at ON seen_news(saved_at);
+        CREATE TABLE IF NOT EXISTS subscribers (
+            user_id INTEGER PRIMARY KEY,
+            subscribed_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id INTEGER PRIMARY KEY,
+            settings TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS feed_state (
+            feed_url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            updated_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    SEEN_COLUMNS = ('hash', 'hash_version', 'title', 'source', 'url', 'published_date', 'saved_at')
+
+    def __init__(self, path: str = 'cryptonews.db',
+                 seen_news_file: str = 'seen_news.jsonl',
+                 subscribers_file: str = 'subscribers.json',
+                 user_settings_file: str = 'user_settings.json'):
+        super().__init__()
+        self.path = path
+        self._lock = threading.RLock()
+        # Bir bağlantı bütün thread-lər arasında lock ilə paylaşılır
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+        self._import_json_files(seen_news_file, subscribers_file, user_settings_file)
+
+    def _import_json_files(self, seen_news_file: str, subscribers_file: str, user_settings_file: str):
+        """İlk başlanğıcda mövcud JSON fayllarını bazaya köçürür"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+            if row:
+                return
+            try:
+                legacy = JSONStorage(seen_news_file, subscribers_file, user_settings_file)
+                seen_records = legacy.load_seen_news()
+                subscribers = legacy.load_subscribers()
+                user_settings = legacy.load_user_settings()
+                with self._conn:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO seen_news ({', '.join(self.SEEN_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [self._seen_row(record) for record in seen_records if 'hash' in record]
+                    )
+                    now = datetime.now().isoformat()
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO subscribers (user_id, subscribed_at) VALUES (?, ?)",
+                        [(user_id, now) for user_id in subscribers]
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO user_settings (user_id, settings) VALUES (?, ?)",
+                        [(user_id, json.dumps(settings, ensure_ascii=False)) for user_id, settings in user_settings.items()]
+                    )
+                    self._conn.execute("INSERT INTO meta (key, value) VALUES ('json_imported', ?)", (now,))
+                for path in (seen_news_file, subscribers_file, user_settings_file):
+                    if os.path.exists(path):
+                        os.replace(path, f"{path}.imported")
+                logger.info(
+                    f"📦 STORAGE: JSON import - {len(seen_records)} xəbər, {len(subscribers)} abunəçi, "
+                    f"{len(user_settings)} ayar SQLite-a köçürüldü"
+                )
+            except Exception as e:
+                logger.error(f"💥 STORAGE: JSON import xətası: {e}")
+
+    def _seen_row(self, record: Dict) -> tuple:
+        saved_at = record.get('saved_at') or record.get('published_date') or datetime.now().isoformat()
+        return (
+            record['hash'], record.get('hash_version'), record.get('title'), record.get('source'),
+            record.get('url'), record.get('published_date'), saved_at
+        )
+
+    def load_seen_news(self) -> List[Dict]:
+        return self.seen_news_records()
+
+    def add_seen_news(self, record: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO seen_news ({', '.join(self.SEEN_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._seen_row(record)
+            )
+
+    def rewrite_seen_news(self, records: List[Dict]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM seen_news")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO seen_news ({', '.join(self.SEEN_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._seen_row(record) for record in records]
+            )
+
+    def seen_news_records(self, since: Optional[datetime] = None) -> List[Dict]:
+        with self._lock:
+            if since is None:
+                rows = self._conn.execute("SELECT * FROM seen_news ORDER BY saved_at DESC").fetchall()
+            else:
+                # saved_at indeksi üzrə range sorğusu
+                rows = self._conn.execute(
+                    "SELECT * FROM seen_news WHERE saved_at > ? ORDER BY saved_at DESC",
+                    (since.isoformat(),)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count_seen_news(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen_news").fetchone()[0]
+
+    def recent_seen_news(self, limit: int = 5) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM seen_news ORDER BY saved_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def compact_seen_news(self, cutoff_time: datetime) -> Set[int]:
+        cutoff_str = cutoff_time.isoformat()
+        with self._lock, self._conn:
+            expired_hashes = {
+                row[0] for row in self._conn.execute(
+                    "SELECT hash FROM seen_news WHERE saved_at <= ?", (cutoff_str,)
+                )
+            }
+            self._conn.execute("DELETE FROM seen_news WHERE saved_at <= ?", (cutoff_str,))
+        logger.info(f"🧹 STORAGE: {len(expired_hashes)} köhnə xəbər bazadan silindi")
+        return expired_hashes
+
+    def reset_seen_news(self) -> Optional[str]:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM seen_news")
+        return None
+
+    def load_subscribers(self) -> Set[int]:
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT user_id FROM subscribers")}
+
+    def add_subscriber(self, user_id: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO subscribers (user_id, subscribed_at) VALUES (?, ?)",
+                (user_id, datetime.now().isoformat())
+            )
+
+    def remove_subscribers(self, user_ids: List[int]):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM subscribers WHERE user_id = ?", [(user_id,) for user_id in user_ids])
+
+    def load_user_settings(self) -> Dict[int, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT user_id, settings FROM user_settings").fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def save_user_settings(self, user_id: int, settings: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_settings (user_id, settings) VALUES (?, ?)",
+                (user_id, json.dumps(settings, ensure_ascii=False))
+            )
+
+    def apply_user_changes(self, added: Set[int], removed: Set[int], settings: Dict[int, Dict]):
+        """Bütün dəyişikliklər bir tranzaksiyada"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM subscribers WHERE user_id = ?", [(user_id,) for user_id in removed])
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO subscribers (user_id, subscribed_at) VALUES (?, ?)",
+                [(user_id, now) for user_id in added]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO user_settings (user_id, settings) VALUES (?, ?)",
+                [(user_id, json.dumps(values, ensure_ascii=False)) for user_id, values in settings.items()]
+            )
+
+    def load_feed_states(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT feed_url, etag, last_modified, content_hash FROM feed_state"
+            ).fetchall()
+        return {
+            row['feed_url']: {
+                'etag': row['etag'],
+                'last_modified': row['last_modified'],
+                'content_hash': row['content_hash']
+            }
+            for row in rows
+        }
+
+    def save_feed_state(self, feed_url: str, state: Dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feed_state (feed_url, etag, last_modified, content_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (feed_url, state.get('etag'), state.get('last_modified'), state.get('content_hash'),
+                 datetime.now().isoformat())
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class WriteBehindStorage(BaseStorage):
+    """Abunəçi və ayar yazılarını yığıb fon thread-də yazan qat
+
+    Komandalar yalnız yaddaşdakı dəyişikliyi qeyd edir və dərhal qayıdır.
+    Fon thread-i ilk dəyişiklikdən sonra debounce müddəti gözləyir ki,
+    ardıcıl dəyişikliklər birləşsin, sonra hamısını backend-in
+    apply_user_changes() çağırışı ilə bir dəfəyə yazır. close() qalanları
+    yazır. Digər əməliyyatlar birbaşa backend-ə ötürülür.
+    """
+
+    def __init__(self, backend: BaseStorage, delay: float = 2.0):
+        super().__init__()
+        self.backend = backend
+        self.name = backend.name
+        self.delay = delay
+        self._pending_subscribers: Dict[int, bool] = {}   # user_id -> True (əlavə) / False (silmə)
+        self._pending_settings: Dict[int, Dict] = {}
+        self._cond = threading.Condition()
+        self._closing = False
+        self.flushes = 0
+        self._thread = threading.Thread(target=self._run, name='storage-write-behind', daemon=True)
+        self._thread.start()
+
+    # --- Yığılan yazılar ---
+    def add_subscriber(self, user_id: int):
+        with self._cond:
+            self._pending_subscribers[user_id] = True
+            self._cond.notify()
+
+    def remove_subscribers(self, user_ids: List[int]):
+        with self._cond:
+            for user_id in user_ids:
+                self._pending_subscribers[user_id] = False
+            self._cond.notify()
+
+    def save_user_settings(self, user_id: int, settings: Dict):
+        with self._cond:
+            # Nüsxə saxlanılır - çağıranın dict-i sonradan dəyişə bilər
+            self._pending_settings[user_id] = dict(settings)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not (self._pending_subscribers or self._pending_settings) and not self._closing:
+                    self._cond.wait()
+                if self._closing:
+                    return
+            # Debounce: bu müddətdə gələn dəyişikliklər eyni yazıya düşür
+            time.sleep(self.delay)
+            self.flush()
+
+    def flush(self) -> int:
+        """Gözləyən dəyişiklikləri backend-ə yazır, yazılan dəyişiklik sayını qaytarır"""
+        with self._cond:
+            subscribers, self._pending_subscribers = self._pending_subscribers, {}
+            settings, self._pending_settings = self._pending_settings, {}
+        if not subscribers and not settings:
+            return 0
+        added = {user_id for user_id, subscribed in subscribers.items() if subscribed}
+        removed = {user_id for user_id, subscribed in subscribers.items() if not subscribed}
+        try:
+            self.backend.apply_user_changes(added, removed, settings)
+        except Exception as e:
+            logger.error(f"💥 STORAGE: Write-behind yazı xətası, növbəti cəhddə təkrarlanacaq: {e}")
+            with self._cond:
+                # Bu arada gələn daha yeni dəyişikliklər üstündür
+                for user_id, subscribed in subscribers.items():
+                    self._pending_subscribers.setdefault(user_id, subscribed)
+                for user_id, values in settings.items():
+                    self._pending_settings.setdefault(user_id, values)
+            return 0
+        self.flushes += 1
+        count = len(subscribers) + len(settings)
+        performance_logger.info(f"💾 STORAGE: Write-behind flush - {count} dəyişiklik ({len(added)}+/{len(removed)}-, {len(settings)} ayar)")
+        return count
+
+    # --- Oxumalar əvvəlcə gözləyən yazıları tətbiq edir ---
+    def load_subscribers(self) -> Set[int]:
+        self.flush()
+        return self.backend.load_subscribers()
+
+    def load_user_settings(self) -> Dict[int, Dict]:
+        self.flush()
+        return self.backend.load_user_settings()
+
+    # --- Birbaşa ötürülənlər ---
+    def load_seen_news(self) -> List[Dict]:
+        return self.backend.load_seen_news()
+
+    def add_seen_news(self, record: Dict):
+        self.backend.add_seen_news(record)
+
+    def flush_seen_news(self) -> int:
+        return self.backend.flush_seen_news()
+
+    def rewrite_seen_news(self, records: List[Dict]):
+        self.backend.rewrite_seen_news(records)
+
+    def seen_news_records(self, since: Optional[datetime] = None) -> List[Dict]:
+        return self.backend.seen_news_records(since)
+
+    def count_seen_news(self) -> int:
+        return self.backend.count_seen_news()
+
+    def recent_seen_news(self, limit: int = 5) -> List[Dict]:
+        return self.backend.recent_seen_news(limit)
+
+    def compact_seen_news(self, cutoff_time: datetime) -> Set[int]:
+        return self.backend.compact_seen_news(cutoff_time)
+
+    def reset_seen_news(self) -> Optional[str]:
+        return self.backend.reset_seen_news()
+
+    def load_feed_states(self) -> Dict[str, Dict]:
+        return self.backend.load_feed_states()
+
+    def save_feed_state(self, feed_url: str, state: Dict):
+        self.backend.save_feed_state(feed_url, state)
+
+    def close(self):
+        """Fon thread-ini dayandırır, qalan dəyişiklikləri yazır və backend-i bağlayır"""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join(timeout=self.delay + 5)
+        self.flush()
+        self.backend.close()
+
+
+def create_storage(settings: Optional[Dict] = None) -> BaseStorage:
+    """STORAGE_SETTINGS əsasında backend yaradır"""
+    if settings is None:
+        from config import STORAGE_SETTINGS
+        settings = STORAGE_SETTINGS
+    backend = settings.get('backend', 'sqlite')
+    files = {
+        'seen_news_file': settings.get('seen_news_file', 'seen_news.jsonl'),
+        'subscribers_file': settings.get('subscribers_file', 'subscribers.json'),
+        'user_settings_file': settings.get('user_settings_file', 'user_settings.json')
+    }
+    if backend == 'json':
+        storage = JSONStorage(feed_state_file=settings.get('feed_state_file', 'feed_state.json'), **files)
+    elif backend == 'sqlite':
+        storage = SQLiteStorage(settings.get('sqlite_path', 'cryptonews.db'), **files)
+    else:
+        raise ValueError(f"Naməlum storage backend: {backend}")
+    logger.info(f"💾 STORAGE: '{storage.name}' backend istifadə olunur")
+    if settings.get('write_behind', True):
+        storage = WriteBehindStorage(storage, settings.get('write_behind_delay', 2.0))
+    return storage
@@ -1,11 +1,9 @@
 import asyncio
 import logging
-import json
-import os
 import time
 import traceback
 from datetime import datetime
-from typing import List, Dict, Set
+from typing import List, Dict, Optional, Set
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application, CommandHandler, CallbackQueryHandler, 
@@ -13,9 +11,16 @@ from telegram.ext import (
 )
 from telegram.constants import ParseMode
 
-from config import TELEGRAM_BOT_TOKEN, BOT_SETTINGS
+from config import TELEGRAM_BOT_TOKEN, BOT_SETTINGS, SCHEDULER_SETTINGS, DAILY_SUMMARY_SETTINGS, BROADCAST_SETTINGS, OUTBOX_SETTINGS, RENDER_SETTINGS
 from news_fetcher import NewsFetcher, NewsItem
 from ai_analyzer import AIAnalyzer
+from broadcaster import BroadcastEngine, BroadcastResult, PERMANENT
+from outbox import Outbox
+from audience import AudienceIndex
+from renderer import MessageRenderer, RecentNews, RenderedMessage
+from single_flight import AsyncSingleFlight
+from pipeline import NewsPipeline
+from storage import create_storage
 
 # Enhanced logging setup
 logger = logging.getLogger(__name__)
@@ -46,15 +51,28 @@ class CryptoNewsBot:
         logger.info("🚀 SYSTEM: CryptoNewsBot initialization started")
         
         self.token = TELEGRAM_BOT_TOKEN
-        self.news_fetcher = NewsFetcher()
+        self.storage = create_storage()
+        self.news_fetcher = NewsFetcher(storage=self.storage)
         self.ai_analyzer = AIAnalyzer()
         self.application = None
+        # Yarımçıq yayımlar restart-dan sonra outbox-dan davam etdirilir
+        self.outbox = Outbox() if OUTBOX_SETTINGS['enabled'] else None
+        self.broadcaster = BroadcastEngine(self._send_markdown, outbox=self.outbox)
         self.subscribers: Set[int] = set()
         self.admin_users: Set[int] = set()
         self.last_news_check = datetime.now()
-        self.subscribers_file = 'subscribers.json'
-        self.user_settings_file = 'user_settings.json'
         self.user_settings: Dict[int, Dict] = {}
+        # Yayım alıcıları ayar dəyişəndə yenilənir - göndərmə zamanı ayarlara baxılmır
+        self.audience = AudienceIndex()
+        # Hər xəbər bir dəfə analiz edilib formatlaşdırılır, sonra hazır mətn istifadə olunur
+        self.renderer = MessageRenderer()
+        self.recent_news = RecentNews()
+        # Xəbər yoxlama dövrləri üst-üstə düşmür
+        self.news_cycle = AsyncSingleFlight('news_check', SCHEDULER_SETTINGS['tick_interval'])
+        self.pipeline = NewsPipeline(
+            self.news_fetcher, self.ai_analyzer, self.renderer,
+            deliver=self._deliver_news, on_rendered=self._publish_news
+        )
         
         # Statistics tracking
         self.stats = {
@@ -70,6 +88,7 @@ class CryptoNewsBot:
         # Başlangıçta subscribe verilerini yükle
         self._load_subscribers()
         self._load_user_settings()
+        self.audience.rebuild(self.subscribers, self.user_settings)
         
         logger.info("✅ SYSTEM: CryptoNewsBot initialization completed successfully")
     
@@ -97,62 +116,58 @@ class CryptoNewsBot:
             logger.info(log_message)
         
     def _load_subscribers(self):
-        """Subscribe verilerini JSON dosyasından yükler"""
+        """Abunəçiləri storage-dan yükləyir"""
         timer_id = performance.start_timer("load_subscribers")
         try:
-            if os.path.exists(self.subscribers_file):
-                with open(self.subscribers_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.subscribers = set(data.get('subscribers', []))
-                    self._log_system_event("DATA_LOAD", f"{len(self.subscribers)} abunəçi yükləndi")
-                    logger.info(f"📂 SUBSCRIBERS: Loaded {len(self.subscribers)} subscribers from file")
-            else:
-                self._log_system_event("DATA_LOAD", "Subscribe faylı tapılmadı, yeni fayl yaradılacaq")
-                logger.info("📂 SUBSCRIBERS: No existing subscribers file found, will create new")
+            self.subscribers = self.storage.load_subscribers()
+            self._log_system_event("DATA_LOAD", f"{len(self.subscribers)} abunəçi yükləndi")
+            logger.info(f"📂 SUBSCRIBERS: Loaded {len(self.subscribers)} subscribers from {self.storage.name} storage")
         except Exception as e:
-            self._log_system_event("DATA_LOAD", f"Subscribe fayl yükləmə xətası: {e}", "error")
+            self._log_system_event("DATA_LOAD", f"Subscribe yükləmə xətası: {e}", "error")
             logger.error(f"💥 ERROR: Failed to load subscribers: {e}")
             logger.error(f"📍 TRACEBACK: {traceback.format_exc()}")
             self.subscribers = set()
         finally:
             performance.end_timer(timer_id, "load_subscribers")
     
-    def _save_subscribers(self):
-        """Subscribe verilerini JSON dosyasına saxlayır"""
+    def _add_subscriber(self, user_id: int):
+        """Abunəçini əlavə edir və storage-a yazır (tək sətir)"""
+        timer_id = performance.start_timer("save_subscribers")
+        self.subscribers.add(user_id)
+        self.audience.add(user_id, self.user_settings.get(user_id))
+        try:
+            self.storage.add_subscriber(user_id)
+            self._log_system_event("DATA_SAVE", f"Abunəçi {user_id} saxlanıldı")
+        except Exception as e:
+            self._log_system_event("DATA_SAVE", f"Subscribe saxlama xətası: {e}", "error")
+            logger.error(f"💥 ERROR: Failed to save subscriber {user_id}: {e}")
+            logger.error(f"📍 TRACEBACK: {traceback.format_exc()}")
+        finally:
+            performance.end_timer(timer_id, "save_subscribers")
+    
+    def _remove_subscribers(self, user_ids: List[int]):
+        """Abunəçiləri silir və storage-dan çıxarır"""
         timer_id = performance.start_timer("save_subscribers")
+        for user_id in user_ids:
+            self.subscribers.discard(user_id)
+        self.audience.remove(user_ids)
         try:
-            data = {
-                'subscribers': list(self.subscribers),
-                'last_updated': datetime.now().isoformat(),
-                'total_count': len(self.subscribers),
-                'save_timestamp': time.time()
-            }
-            with open(self.subscribers_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self._log_system_event("DATA_SAVE", f"{len(self.subscribers)} abunəçi faylda saxlanıldı")
-            logger.info(f"💾 SUBSCRIBERS: Saved {len(self.subscribers)} subscribers to file")
+            self.storage.remove_subscribers(list(user_ids))
+            self._log_system_event("DATA_SAVE", f"{len(user_ids)} abunəçi silindi, {len(self.subscribers)} qaldı")
         except Exception as e:
-            self._log_system_event("DATA_SAVE", f"Subscribe fayl saxlama xətası: {e}", "error")
-            logger.error(f"💥 ERROR: Failed to save subscribers: {e}")
+            self._log_system_event("DATA_SAVE", f"Subscribe silmə xətası: {e}", "error")
+            logger.error(f"💥 ERROR: Failed to remove subscribers: {e}")
             logger.error(f"📍 TRACEBACK: {traceback.format_exc()}")
         finally:
             performance.end_timer(timer_id, "save_subscribers")
     
     def _load_user_settings(self):
-        """Kullanıcı ayarlarını JSON dosyasından yükler"""
+        """Kullanıcı ayarlarını storage-dan yükler"""
         timer_id = performance.start_timer("load_user_settings")
         try:
-            if os.path.exists(self.user_settings_file):
-                with open(self.user_settings_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # String key'leri int'e çevir
-                    self.user_settings = {int(k): v for k, v in data.items()}
-                    self._log_system_event("SETTINGS_LOAD", f"{len(self.user_settings)} kullanıcı ayarı yükləndi")
-                    logger.info(f"⚙️ USER_SETTINGS: Loaded {len(self.user_settings)} user settings")
-            else:
-                self._log_system_event("SETTINGS_LOAD", "Kullanıcı ayarları faylı tapılmadı, yeni yaradılacaq")
-                logger.info("⚙️ USER_SETTINGS: No existing settings file found, will create new")
-                self.user_settings = {}
+            self.user_settings = self.storage.load_user_settings()
+            self._log_system_event("SETTINGS_LOAD", f"{len(self.user_settings)} kullanıcı ayarı yükləndi")
+            logger.info(f"⚙️ USER_SETTINGS: Loaded {len(self.user_settings)} user settings")
         except Exception as e:
             self._log_system_event("SETTINGS_LOAD", f"Kullanıcı ayarları yükləmə xətası: {e}", "error")
             logger.error(f"💥 ERROR: Failed to load user settings: {e}")
@@ -161,16 +176,11 @@ class CryptoNewsBot:
         finally:
             performance.end_timer(timer_id, "load_user_settings")
     
-    def _save_user_settings(self):
-        """Kullanıcı ayarlarını JSON dosyasına kaydet"""
+    def _save_user_settings(self, user_id: int):
+        """Kullanıcının ayarlarını storage-a kaydet (tək sətir)"""
         timer_id = performance.start_timer("save_user_settings")
         try:
-            # Int key'leri string'e çevir JSON için
-            data = {str(k): v for k, v in self.user_settings.items()}
-            with open(self.user_settings_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            self._log_system_event("SETTINGS_SAVE", f"{len(self.user_settings)} kullanıcı ayarı saxlanıldı")
-            logger.info(f"💾 USER_SETTINGS: Saved {len(self.user_settings)} user settings")
+            self.storage.save_user_settings(user_id, self.user_settings[user_id])
         except Exception as e:
             self._log_system_event("SETTINGS_SAVE", f"Kullanıcı ayarları saxlama xətası: {e}", "error")
             logger.error(f"💥 ERROR: Failed to save user settings: {e}")
@@ -189,7 +199,7 @@ class CryptoNewsBot:
         
         if user_id not in self.user_settings:
             self.user_settings[user_id] = default_settings.copy()
-            self._save_user_settings()
+            self._save_user_settings(user_id)
         
         return self.user_settings[user_id]
     
@@ -199,7 +209,9 @@ class CryptoNewsBot:
         settings[setting_key] = value
         settings['last_activity'] = datetime.now().isoformat()
         self.user_settings[user_id] = settings
-        self._save_user_settings()
+        self._save_user_settings(user_id)
+        if user_id in self.subscribers:
+            self.audience.update(user_id, settings)
     
     async def initialize(self):
         """Botu başladır"""
@@ -207,7 +219,13 @@ class CryptoNewsBot:
             raise ValueError("Telegram Bot Token təyin edilməyib!")
             
         # Application yaradır
-        self.application = Application.builder().token(self.token).build()
+        # Connection pool paralel yayım sorğularına kifayət etməlidir
+        self.application = (
+            Application.builder()
+            .token(self.token)
+            .connection_pool_size(BROADCAST_SETTINGS['max_concurrency'] + 4)
+            .build()
+        )
         
         # Komanda handler-lərini əlavə edir
         self.application.add_handler(CommandHandler("start", self.start_command))
@@ -226,10 +244,14 @@ class CryptoNewsBot:
         
         # Job queue-nu konfiqurasiya edir
         job_queue = self.application.job_queue
+        # Əvvəlki prosesdən qalan yarımçıq yayımlar ilk yoxlamadan əvvəl tamamlanır
+        job_queue.run_once(self.resume_outbox_job, when=5)
+        # Üst-üstə düşən tick-lər APScheduler-də səssizcə atılmır - AsyncSingleFlight sayır
         job_queue.run_repeating(
             self.check_news_job,
-            interval=BOT_SETTINGS['check_interval'],
-            first=10
+            interval=SCHEDULER_SETTINGS['tick_interval'],
+            first=10,
+            job_kwargs={'max_instances': 2}
         )
         
         # Günlük temizlik işi
@@ -244,8 +266,19 @@ class CryptoNewsBot:
             time=datetime.now().time().replace(hour=0, minute=5)  # 00:05'te çalışır
         )
         
+        # Günlük özet hissələri gün ərzində hazırlanır - gecə yalnız yekunlaşdırılır
+        job_queue.run_repeating(
+            self.rolling_summary_job,
+            interval=DAILY_SUMMARY_SETTINGS['rolling_interval'],
+            first=300
+        )
+        
         logger.info("Bot uğurla başladıldı")
     
+    def _format_source_list(self, prefix: str, suffix: str = "") -> str:
+        """Aktiv mənbələrin siyahısını registry-dən qurur"""
+        return "\n".join(f"{prefix}{source.name}{suffix}" for source in self.news_fetcher.sources.enabled())
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start komandası"""
         user_id = update.effective_user.id
@@ -260,10 +293,7 @@ class CryptoNewsBot:
 Salamlar! Mən sizə real-time kripto xəbərlərini AI analizi ilə birlikdə çatdırıram.
 
 📰 **Xəbər Mənbələri:**
-• CoinDesk
-• The Block
-• Crypto News
-• NewsBTC
+{self._format_source_list('• ')}
 
 🧠 **AI Analizi:**
 • Market təsiri (Bullish/Bearish/Neytral)
@@ -345,8 +375,7 @@ Admin: @davudov07
                 await update.message.reply_text("🔔 Siz artıq xəbər abunəçisisiniz!")
                 self._log_user_action(user_id, "SUBSCRIBE", "Already subscribed", True)
             else:
-                self.subscribers.add(user_id)
-                self._save_subscribers()  # Dosyaya kaydet
+                self._add_subscriber(user_id)
                 await update.message.reply_text(
                     f"✅ Təbriklər {user_name}! Artıq kripto xəbərləri alacaqsınız.\n\n"
                     f"📊 Abunəçi sayı: {len(self.subscribers)}\n"
@@ -366,8 +395,7 @@ Admin: @davudov07
         user_id = update.effective_user.id
         
         if user_id in self.subscribers:
-            self.subscribers.remove(user_id)
-            self._save_subscribers()  # Dosyaya kaydet
+            self._remove_subscribers([user_id])
             await update.message.reply_text("❌ Abunəlikdən çıxdınız. İstədiyiniz vaxt yenidən abunə ola bilərsiniz.")
         else:
             await update.message.reply_text("ℹ️ Siz artıq abunə deyilsiniz.")
@@ -379,16 +407,13 @@ Admin: @davudov07
 
 👥 Abunəçi sayı: {len(self.subscribers)}
 🕐 Son yoxlama: {self.last_news_check.strftime('%H:%M:%S')}
-⚙️ Yoxlama intervalı: {BOT_SETTINGS['check_interval']} saniyə
+⚙️ Yoxlama intervalı: adaptiv, {SCHEDULER_SETTINGS['min_interval']}-{SCHEDULER_SETTINGS['max_interval']} saniyə
 🔍 Maksimum xəbər: {BOT_SETTINGS['max_news_per_check']}
 🤖 AI analizi: {'Aktiv' if BOT_SETTINGS['ai_analysis'] else 'Deaktiv'}
-💾 Subscribe faylı: {'✅ Mövcud' if os.path.exists(self.subscribers_file) else '❌ Yoxdur'}
+💾 Saxlama: {self.storage.name}
 
 **Mənbələr:**
-📰 CoinDesk - RSS
-📰 The Block - RSS
-📰 Crypto News - RSS
-📰 NewsBTC - RSS
+{self._format_source_list('📰 ', ' - RSS')}
 
 Bot normal işləyir ✅
 """
@@ -396,20 +421,21 @@ Bot normal işləyir ✅
     
     async def latest_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Son xəbərləri göstər"""
-        await update.message.reply_text("🔍 Son xəbərlər axtarılır...")
-        
         try:
-            news_list = await self.news_fetcher.fetch_all_news()
+            # Yoxlama işinin hazırladığı mesajlar - şəbəkə sorğusu yoxdur
+            latest = self.recent_news.latest(RENDER_SETTINGS['latest_count'])
+            if not latest and self.news_cycle.in_flight:
+                # İlk yoxlama hələ gedir - yenisini başlatmadan onun nəticəsini gözləyirik
+                await update.message.reply_text("🔍 Son xəbərlər hazırlanır...")
+                await self.news_cycle.wait()
+                latest = self.recent_news.latest(RENDER_SETTINGS['latest_count'])
             
-            if not news_list:
+            if not latest:
                 await update.message.reply_text("📭 Hal-hazırda yeni xəbər yoxdur.")
                 return
             
-            # İlk 3 xəbəri göstər
-            for news in news_list[:3]:
-                message = await self.format_news_message(news)
-                await update.message.reply_text(message, parse_mode=ParseMode.MARKDOWN)
-                await asyncio.sleep(1)  # Rate limiting
+            for rendered in latest:
+                await update.message.reply_text(rendered.text, parse_mode=ParseMode.MARKDOWN)
                 
         except Exception as e:
             logger.error(f"Latest komanda xətası: {e}")
@@ -511,14 +537,13 @@ Köhnə xəbərlər bir daha gəlməyəcək.
             # Günlük özet açık olan abunəçilərə özeti göndər
             await self.broadcast_daily_summary(summary_message)
             
-            # Günlük özet alan kullanıcı sayısını hesapla
-            daily_users = [uid for uid in self.subscribers 
-                          if self._get_user_settings(uid).get('daily_summary', True)]
+            # Günlük özet alan kullanıcı sayısı - auditoriya indeksindən
+            daily_users = self.audience.count('daily')
             
             await update.message.reply_text(
-                f"✅ Manuel günlük özet {len(daily_users)} kullanıcıya göndərildi!\n"
+                f"✅ Manuel günlük özet {daily_users} kullanıcıya göndərildi!\n"
                 f"📊 Analiz edilən xəbər sayı: {len(last_24h_news)}\n"
-                f"👥 Günlük özet açık olan: {len(daily_users)}/{len(self.subscribers)}"
+                f"👥 Günlük özet açık olan: {daily_users}/{len(self.subscribers)}"
             )
             
             logger.info(f"🔧 Admin {user_id} tərəfindən manuel günlük özet göndərildi")
@@ -598,10 +623,20 @@ Köhnə xəbərlər bir daha gəlməyəcək.
 
 📊 **Statistika:**
 👥 Abunəçilər: {len(self.subscribers)}
+🔔 Anlık xəbər / 📅 Günlük özet: {self.audience.count('instant')} / {self.audience.count('daily')}
 📰 Görülən xəbərlər: {len(self.news_fetcher.seen_news)}
+📡 Feed keşi (dəyişməyib / sorğu): {self._format_feed_stats()}
+🌐 HTTP bağlantı reuse: {self.news_fetcher.get_http_metrics()['connection_reuse_ratio']:.0%}
+🧠 AI keş hit rate: {self.ai_analyzer.get_cache_stats()['hit_rate']:.0%}
+🚦 Gemini: {self._format_ai_usage()}
+🌓 Günlük özet hazırlığı: {self._format_summary_state()}
+📣 Yayım: {self._format_broadcast_stats()}
+📮 Outbox: {self._format_outbox_stats()}
+🔄 Yoxlama dövrü: {self._format_cycle_stats()}
+🖼️ Hazır mesajlar: {self.renderer.get_stats()['cached']}, təkrar istifadə {self.renderer.get_stats()['hit_rate']:.0%}
 
 ⚙️ **Konfiqurasiya:**
-⏱️ Yoxlama intervalı: {BOT_SETTINGS['check_interval']}s
+⏱️ Yoxlama intervalı: {SCHEDULER_SETTINGS['min_interval']}-{SCHEDULER_SETTINGS['max_interval']}s (adaptiv)
 📄 Max xəbər: {BOT_SETTINGS['max_news_per_check']}
 🤖 AI: {'ON' if BOT_SETTINGS['ai_analysis'] else 'OFF'}
 
@@ -612,6 +647,70 @@ Köhnə xəbərlər bir daha gəlməyəcək.
 """
         await update.message.reply_text(admin_text, parse_mode=ParseMode.MARKDOWN)
 
+    def _format_ai_usage(self) -> str:
+        """Gemini limit sayğaclarını admin paneli üçün formatlaşdırır"""
+        usage = self.ai_analyzer.get_usage_stats()
+        return (
+            f"{usage['requests']} sorğu, ~{usage['estimated_tokens']} token, "
+            f"gözləmə {usage['throttled']}, rədd {usage['rejected']}, "
+            f"kvota {usage['quota_errors']}, fallback {usage['fallbacks']}"
+        )
+
+    def _format_broadcast_stats(self) -> str:
+        """Yayım mühərrikinin sayğacları"""
+        stats = self.broadcaster.get_stats()
+        return (
+            f"{stats['sent']} göndərildi, {stats['failed']} uğursuz, "
+            f"RetryAfter {stats['retry_after']}, son sürət {stats['last_rate']:.1f} msg/s, "
+            f"səbəblər: {self._format_error_counts(stats['errors'])}"
+        )
+
+    @staticmethod
+    def _format_error_counts(errors: Dict[str, int]) -> str:
+        """Səbəb üzrə göndərmə xətaları (çoxdan aza)"""
+        if not errors:
+            return "-"
+        return ", ".join(f"{reason} {count}" for reason, count in sorted(errors.items(), key=lambda item: -item[1]))
+
+    def _format_outbox_stats(self) -> str:
+        """Outbox-da gözləyən çatdırılmalar"""
+        if not self.outbox:
+            return "söndürülüb"
+        stats = self.outbox.get_stats()
+        return f"{stats['open_messages']} açıq mesaj, {stats['pending_deliveries']} gözləyən çatdırılma"
+
+    def _format_cycle_stats(self) -> str:
+        """Yoxlama dövrünün müddəti və interval aşımları"""
+        stats = self.news_cycle.get_stats()
+        text = (
+            f"son {stats['last_duration']:.1f}s, maks {stats['max_duration']:.1f}s (interval {stats['interval']}s), "
+            f"aşım {stats['overruns']}/{stats['runs']}, buraxılan tick {stats['skipped']}"
+        )
+        first = self.pipeline.get_stats().get('time_to_first_delivery')
+        if first is not None:
+            text += f", ilk xəbər {first:.1f}s-də"
+        return text
+
+    def _format_summary_state(self) -> str:
+        """Gün ərzində hazırlanan günlük özetin vəziyyəti"""
+        state = self.ai_analyzer.daily_summary_state
+        if not state:
+            return "-"
+        return f"{state['ready']}/{state['chunks']} parça, {state['items']} xəbər ({state['updated_at'].strftime('%H:%M')})"
+
+    def _format_feed_stats(self) -> str:
+        """Feed şərti GET sayğaclarını admin paneli üçün formatlaşdırır"""
+        feed_stats = self.news_fetcher.get_feed_stats()
+        if not feed_stats:
+            return "-"
+        scheduler_stats = self.news_fetcher.get_scheduler_stats()
+        parts = []
+        for source, counters in feed_stats.items():
+            unchanged = counters['not_modified'] + counters['unchanged_body']
+            interval = scheduler_stats.get(source, {}).get('interval', '-')
+            parts.append(f"{source} {unchanged}/{counters['polls']} @{interval}s")
+        return ", ".join(parts)
+
     async def button_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Inline keyboard düymələrini idarə edir"""
         query = update.callback_query
@@ -625,8 +724,7 @@ Köhnə xəbərlər bir daha gəlməyəcək.
             if user_id in self.subscribers:
                 await query.edit_message_text("🔔 Siz artıq xəbər abunəçisisiniz!")
             else:
-                self.subscribers.add(user_id)
-                self._save_subscribers()  # Dosyaya kaydet
+                self._add_subscriber(user_id)
                 await query.edit_message_text(
                     f"✅ Təbriklər {user_name}! Artıq kripto xəbərləri alacaqsınız.\n\n"
                     f"📊 Abunəçi sayı: {len(self.subscribers)}\n"
@@ -791,10 +889,7 @@ Köhnə xəbərlər bir daha gəlməyəcək.
 Salamlar! Mən sizə real-time kripto xəbərlərini AI analizi ilə birlikdə çatdırıram.
 
 📰 **Xəbər Mənbələri:**
-• CoinDesk
-• The Block
-• Crypto News
-• NewsBTC
+{self._format_source_list('• ')}
 
 🧠 **AI Analizi:**
 • Market təsiri (Bullish/Bearish/Neytral)
@@ -829,35 +924,67 @@ Bot istifadəyə hazırdır! ✨
     async def check_news_job(self, context: ContextTypes.DEFAULT_TYPE):
         """Müntəzəm xəbər yoxlama işi"""
         try:
-            logger.info("Xəbərlər yoxlanılır...")
-            self.last_news_check = datetime.now()
-            
-            # Yeni xəbərləri çəkir
-            news_list = await self.news_fetcher.fetch_all_news()
-            
-            if news_list and self.subscribers:
-                # İlk bir neçə xəbəri abunəçilərə göndərir
-                for news in news_list[:BOT_SETTINGS['max_news_per_check']]:
-                    message = await self.format_news_message(news)
-                    await self.broadcast_instant_news(message)  # Anlık haber gönderme
-                    await asyncio.sleep(2)  # Rate limiting
-                    
-                # Instant notifications açık olan kullanıcı sayısını logla
-                instant_users = [uid for uid in self.subscribers 
-                               if self._get_user_settings(uid).get('instant_notifications', True)]
-                logger.info(f"{len(news_list)} xəbər {len(instant_users)} anlık bildirim kullanıcısına göndərildi")
-            
+            # Əvvəlki dövr hələ gedirsə bu tick buraxılır
+            await self.news_cycle.run(self._run_news_cycle, join=False)
         except Exception as e:
             logger.error(f"Xəbər yoxlama xətası: {e}")
     
+    async def _run_news_cycle(self) -> List[RenderedMessage]:
+        """Bir yoxlama dövrü - mərhələli pipeline ilə"""
+        logger.info("Xəbərlər yoxlanılır...")
+        self.last_news_check = datetime.now()
+        return await self.pipeline.run()
+    
+    def _publish_news(self, rendered: RenderedMessage):
+        """Hazır mesaj: /latest buferinə və göndərilməzdən əvvəl outbox-a yazılır"""
+        self.recent_news.add(rendered)
+        if not self.subscribers:
+            return None
+        # Xəbər artıq "görülüb" - outbox-dakı qeyd restart-da itməməsini təmin edir
+        recipients = self._instant_recipients()
+        return recipients, self.broadcaster.enqueue(recipients, rendered.text, 'instant_news')
+    
+    async def _deliver_news(self, rendered: RenderedMessage, ticket):
+        """Pipeline-ın son mərhələsi - outbox-a yazılmış xəbəri yayımlayır"""
+        if ticket is None:
+            return
+        recipients, message_id = ticket
+        await self.broadcast_instant_news(rendered.text, message_id=message_id, recipients=recipients)
+    
+    async def resume_outbox_job(self, context: ContextTypes.DEFAULT_TYPE):
+        """Restart-dan əvvəl yarımçıq qalmış yayımları davam etdirir"""
+        if not self.outbox:
+            return
+        try:
+            for message_id, label, text, chat_ids in self.outbox.pending():
+                # Aradakı müddətdə abunəlikdən çıxanlara göndərilmir
+                recipients = [user_id for user_id in chat_ids if user_id in self.subscribers]
+                logger.info(f"📮 OUTBOX: Resuming {label} message {message_id} for {len(recipients)}/{len(chat_ids)} recipients")
+                await self._broadcast(recipients, text, label, message_id)
+        except Exception as e:
+            logger.error(f"Outbox davam etdirmə xətası: {e}")
+    
     async def daily_cleanup_job(self, context: ContextTypes.DEFAULT_TYPE):
         """Günlük temizlik işi"""
         try:
             self.news_fetcher.cleanup_seen_news(hours=24)
+            if self.outbox:
+                self.outbox.prune()
             logger.info("Günlük temizlik tamamlandı")
         except Exception as e:
             logger.error(f"Temizlik xətası: {e}")
     
+    async def rolling_summary_job(self, context: ContextTypes.DEFAULT_TYPE):
+        """Günlük özetin bağlanmış hissələrini əvvəlcədən hazırlayır"""
+        try:
+            if not self.subscribers:
+                return
+            last_24h_news = await asyncio.to_thread(self.news_fetcher.get_last_24_hours_news)
+            state = await self.ai_analyzer.warm_daily_summary(last_24h_news)
+            logger.info(f"🌓 Günlük özet hazırlığı: {state['ready']}/{state['chunks']} parça hazır")
+        except Exception as e:
+            logger.error(f"Günlük özet hazırlığı xətası: {e}")
+
     async def daily_summary_job(self, context: ContextTypes.DEFAULT_TYPE):
         """Günlük özet işi - gece 00:05'te son 24 saatın xəbərlərini özetləyir"""
         try:
@@ -905,9 +1032,7 @@ Bot istifadəyə hazırdır! ✨
             await self.broadcast_daily_summary(summary_message)
             
             # Günlük özet alan kullanıcı sayısını logla
-            daily_users = [uid for uid in self.subscribers 
-                          if self._get_user_settings(uid).get('daily_summary', True)]
-            logger.info(f"✅ Günlük özet {len(daily_users)} kullanıcıya göndərildi")
+            logger.info(f"✅ Günlük özet {self.audience.count('daily')} kullanıcıya göndərildi")
             
         except Exception as e:
             logger.error(f"Günlük özet işi xətası: {e}")
@@ -926,134 +1051,73 @@ Admin məlumatlandırıldı."""
             except:
                 pass
     
-    async def format_news_message(self, news: NewsItem) -> str:
-        """Xəbər mesajını formatlaşdırır"""
-        try:
-            # AI analizi
-            analysis = ""
-            if BOT_SETTINGS['ai_analysis']:
-                analysis = await self.ai_analyzer.analyze_news(news)
-                if analysis:
-                    analysis = f"\n\n🧠 **AI Analizi:**\n{analysis}"
-            
-            # Emoji seçir
-            source_emoji = {
-                'CoinDesk': '📰',
-                'The Block': '🔷',
-                'Cointelegraph': '📊',
-                'Crypto News': '🌐',
-                'NewsBTC': '₿'
-            }.get(news.source, '📰')
-            
-            message = f"""
-{source_emoji} **{news.title}**
-
-📍 Mənbə: {news.source}
-🕐 Tarix: {news.published_date.strftime('%d.%m.%Y %H:%M')}
-
-🔗 [Ətraflı oxu]({news.url}){analysis}
+    async def render_news(self, news: NewsItem, analysis: Optional[str] = None) -> RenderedMessage:
+        """Xəbərin hazır mesajı - yoxdursa analiz edib bir dəfə formatlaşdırır"""
+        rendered = self.renderer.get(news)
+        if rendered:
+            return rendered
+        if BOT_SETTINGS['ai_analysis']:
+            if analysis is None:
+                analysis = await self.ai_analyzer.analyze_news_async(news)
+        else:
+            analysis = None
+        return self.renderer.render(news, analysis)
 
----
-"""
-            return message.strip()
-            
-        except Exception as e:
-            logger.error(f"Mesaj formatlaşdırma xətası: {e}")
-            return f"📰 **{news.title}**\n🔗 [Link]({news.url})"
+    async def format_news_message(self, news: NewsItem, analysis: Optional[str] = None) -> str:
+        """Xəbərin hazır mesaj mətni"""
+        return (await self.render_news(news, analysis)).text
+    
+    async def _send_markdown(self, chat_id: int, text: str):
+        """Bir çata Markdown mesajı göndərir"""
+        await self.application.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            parse_mode=ParseMode.MARKDOWN,
+            disable_web_page_preview=True
+        )
+    
+    async def _broadcast(self, recipients: List[int], message: str, label: str,
+                         message_id: Optional[int] = None) -> BroadcastResult:
+        """Mesajı alıcılara BroadcastEngine ilə göndərir, uğursuzları çıxarır"""
+        result = await self.broadcaster.broadcast(recipients, message, label, message_id)
+        
+        # Yalnız həmişəlik əlçatmaz çatlar (bloklanıb, silinib) abunəlikdən çıxarılır;
+        # timeout/flood kimi müvəqqəti xətalar engine-in retry növbəsində qalır
+        removed = result.permanent_ids
+        if removed:
+            for user_id, kind, reason in result.failed:
+                if kind == PERMANENT:
+                    logger.info(f"User {user_id} abunəlikdən çıxarıldı ({reason})")
+            self._remove_subscribers(removed)
+        kept = len(result.failed) - len(removed)
+        if kept:
+            logger.warning(f"⚠️ {label}: {kept} abunəçiyə çatdırılmadı (müvəqqəti xəta), abunəlik saxlanıldı")
+        return result
     
     async def broadcast_message(self, message: str):
         """Bütün abunəçilərə mesaj göndərir"""
-        failed_sends = []
-        
-        for user_id in self.subscribers.copy():
-            try:
-                await self.application.bot.send_message(
-                    chat_id=user_id,
-                    text=message,
-                    parse_mode=ParseMode.MARKDOWN,
-                    disable_web_page_preview=True
-                )
-                await asyncio.sleep(0.1)  # Rate limiting
-                
-            except Exception as e:
-                logger.warning(f"User {user_id} göndərim xətası: {e}")
-                failed_sends.append(user_id)
-        
-        # Uğursuz göndərimləri temizlə ve dosyaya kaydet
-        if failed_sends:
-            for user_id in failed_sends:
-                if user_id in self.subscribers:
-                    self.subscribers.remove(user_id)
-                    logger.info(f"User {user_id} abunəlikdən çıxarıldı (göndərim xətası)")
-            self._save_subscribers()  # Güncel listeyi dosyaya kaydet
+        await self._broadcast(list(self.subscribers), message, 'message')
+    
+    def _instant_recipients(self) -> List[int]:
+        """Anlık bildirim açık olan kullanıcılar"""
+        return self.audience.recipients('instant')
     
-    async def broadcast_instant_news(self, message: str):
+    def _daily_recipients(self) -> List[int]:
+        """Günlük özet açık olan kullanıcılar"""
+        return self.audience.recipients('daily')
+    
+    async def broadcast_instant_news(self, message: str, message_id: Optional[int] = None,
+                                     recipients: Optional[List[int]] = None):
         """Anlık bildirim açık olan kullanıcılara haber gönderir"""
-        failed_sends = []
-        sent_count = 0
-        
-        for user_id in self.subscribers.copy():
-            settings = self._get_user_settings(user_id)
-            
-            # Sadece instant notifications açık olanlara gönder
-            if settings.get('instant_notifications', True):
-                try:
-                    await self.application.bot.send_message(
-                        chat_id=user_id,
-                        text=message,
-                        parse_mode=ParseMode.MARKDOWN,
-                        disable_web_page_preview=True
-                    )
-                    sent_count += 1
-                    await asyncio.sleep(0.1)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.warning(f"User {user_id} anlık göndərim xətası: {e}")
-                    failed_sends.append(user_id)
-        
-        # Uğursuz göndərimləri temizlə
-        if failed_sends:
-            for user_id in failed_sends:
-                if user_id in self.subscribers:
-                    self.subscribers.remove(user_id)
-                    logger.info(f"User {user_id} abunəlikdən çıxarıldı (göndərim xətası)")
-            self._save_subscribers()
-        
-        logger.info(f"Anlık xəbər {sent_count} kullanıcıya göndərildi")
+        if recipients is None:
+            recipients = self._instant_recipients()
+        result = await self._broadcast(recipients, message, 'instant_news', message_id)
+        logger.info(f"Anlık xəbər {result.sent} kullanıcıya göndərildi")
     
     async def broadcast_daily_summary(self, message: str):
         """Günlük özet açık olan kullanıcılara özet gönderir"""
-        failed_sends = []
-        sent_count = 0
-        
-        for user_id in self.subscribers.copy():
-            settings = self._get_user_settings(user_id)
-            
-            # Sadece daily summary açık olanlara gönder
-            if settings.get('daily_summary', True):
-                try:
-                    await self.application.bot.send_message(
-                        chat_id=user_id,
-                        text=message,
-                        parse_mode=ParseMode.MARKDOWN,
-                        disable_web_page_preview=True
-                    )
-                    sent_count += 1
-                    await asyncio.sleep(0.1)  # Rate limiting
-                    
-                except Exception as e:
-                    logger.warning(f"User {user_id} günlük özet göndərim xətası: {e}")
-                    failed_sends.append(user_id)
-        
-        # Uğursuz göndərimləri temizlə
-        if failed_sends:
-            for user_id in failed_sends:
-                if user_id in self.subscribers:
-                    self.subscribers.remove(user_id)
-                    logger.info(f"User {user_id} abunəlikdən çıxarıldı (göndərim xətası)")
-            self._save_subscribers()
-        
-        logger.info(f"Günlük özet {sent_count} kullanıcıya göndərildi")
+        result = await self._broadcast(self._daily_recipients(), message, 'daily_summary')
+        logger.info(f"Günlük özet {result.sent} kullanıcıya göndərildi")
     
     async def start_bot(self):
         """Botu başladır"""
@@ -1072,6 +1136,10 @@ Admin məlumatlandırıldı."""
             raise
         finally:
             await self.news_fetcher.close_session()
+            self.ai_analyzer.close()
+            if self.outbox:
+                self.outbox.close()
+            self.storage.close()
     
     async def stop_bot(self):
         """Botu dayandırır"""